@@ -0,0 +1,77 @@
+"""
+    Fixtures for benchmarks.
+
+    Run with `make bench`, see the Makefile for baseline and regression options.
+"""
+
+import copy
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pytwitter import Api, StreamApi  # noqa: E402
+
+
+def load_json_data(filename):
+    with open(filename, "rb") as f:
+        return json.loads(f.read().decode("utf-8"))
+
+
+def scale_page(resp_json, size):
+    """
+    Make a large page by repeating the items in data and includes with new ids.
+    :param resp_json: Response json data from testdata.
+    :param size: Count of items for data and each includes list.
+    :return: New response json data.
+    """
+
+    def repeat(items, key):
+        result = []
+        for idx in range(size):
+            item = copy.deepcopy(items[idx % len(items)])
+            if idx >= len(items):
+                item[key] = f"{item[key]}{idx}"
+            result.append(item)
+        return result
+
+    page = {"data": repeat(resp_json["data"], "id"), "includes": {}}
+    for name, items in resp_json.get("includes", {}).items():
+        key = "media_key" if name == "media" else "id"
+        page["includes"][name] = repeat(items, key)
+    page["meta"] = copy.deepcopy(resp_json.get("meta", {}))
+    return page
+
+
+@pytest.fixture(scope="session")
+def tweet_json():
+    return load_json_data("testdata/models/tweet.json")
+
+
+@pytest.fixture(scope="session")
+def user_json():
+    return load_json_data("testdata/models/user.json")
+
+
+@pytest.fixture(scope="session")
+def tweets_page():
+    """A 100 tweets page, with 100 users and 100 tweets in includes."""
+    tweets = load_json_data("testdata/apis/searches/search_tweets_query.json")
+    return scale_page(tweets, size=100)
+
+
+@pytest.fixture(scope="session")
+def users_page():
+    users = load_json_data("testdata/apis/user/users_resp.json")
+    return scale_page(users, size=100)
+
+
+@pytest.fixture
+def api():
+    return Api(bearer_token="access token")
+
+
+@pytest.fixture
+def stream_api():
+    return StreamApi(bearer_token="bearer token")
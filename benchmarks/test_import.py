@@ -0,0 +1,23 @@
+"""
+    benchmarks for import time
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "pass",
+        "import pytwitter",
+        "from pytwitter import Api",
+        "from pytwitter import Api; Api(bearer_token='token')",
+        "import pytwitter.models as md; md.Response",
+    ],
+    ids=["interpreter", "pytwitter", "api", "api_instance", "all_models"],
+)
+def test_import_time(benchmark, code):
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", code],), rounds=10)
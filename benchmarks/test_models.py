@@ -0,0 +1,39 @@
+"""
+    benchmarks for model parsing
+"""
+
+import pytwitter.models as md
+
+
+def test_tweet_from_json(benchmark, tweet_json):
+    tweet = benchmark(md.Tweet.new_from_json_dict, tweet_json)
+    assert tweet.id == tweet_json["id"]
+
+
+def test_user_from_json(benchmark, user_json):
+    user = benchmark(md.User.new_from_json_dict, user_json)
+    assert user.id == user_json["id"]
+
+
+def test_tweets_page_from_json(benchmark, tweets_page):
+    def parse():
+        return [md.Tweet.new_from_json_dict(item) for item in tweets_page["data"]]
+
+    tweets = benchmark(parse)
+    assert len(tweets) == 100
+
+
+def test_includes_from_json(benchmark, tweets_page):
+    includes = benchmark(md.Includes.new_from_json_dict, tweets_page["includes"])
+    assert len(includes.users) == 100
+
+
+def test_format_tweets_response(benchmark, api, tweets_page):
+    resp = benchmark(api._format_response, tweets_page, md.Tweet, True)
+    assert len(resp.data) == 100
+    assert len(resp.includes.tweets) == 100
+
+
+def test_format_users_response(benchmark, api, users_page):
+    resp = benchmark(api._format_response, users_page, md.User, True)
+    assert len(resp.data) == 100
@@ -0,0 +1,49 @@
+"""
+    benchmarks for rate limit
+"""
+
+import pytest
+
+from pytwitter.rate_limit import RateLimit
+
+HEADERS = {
+    "x-rate-limit-limit": "300",
+    "x-rate-limit-remaining": "299",
+    "x-rate-limit-reset": "1612522029",
+}
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://api.twitter.com/2/tweets",
+        "https://api.twitter.com/2/users/2244994945/following",
+        "https://api.twitter.com/2/trends/by/woeid/1",
+        "https://api.twitter.com/2/not/exists",
+    ],
+    ids=["first", "middle", "last", "not_match"],
+)
+def test_url_to_endpoint(benchmark, url):
+    endpoint = benchmark(RateLimit.url_to_endpoint, url)
+    assert endpoint.resource
+
+
+def test_set_limit(benchmark):
+    rate_limit = RateLimit()
+    data = benchmark(
+        rate_limit.set_limit,
+        url="https://api.twitter.com/2/users/2244994945/following",
+        headers=HEADERS,
+        method="GET",
+    )
+    assert data.remaining == 299
+
+
+def test_get_limit(benchmark):
+    rate_limit = RateLimit()
+    data = benchmark(
+        rate_limit.get_limit,
+        url="https://api.twitter.com/2/users/2244994945/following",
+        method="GET",
+    )
+    assert data.limit == 15
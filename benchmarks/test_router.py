@@ -0,0 +1,23 @@
+"""
+    benchmarks for routing streamed tweets
+"""
+
+import pytest
+
+from pytwitter.models import StreamRule, Tweet
+from pytwitter.router import TweetRouter
+
+
+@pytest.mark.parametrize("handlers", [5, 500])
+def test_route(benchmark, handlers):
+    router = TweetRouter()
+    for idx in range(handlers):
+        router.add_handler(lambda tweet: None, tag=f"tag {idx}")
+    router.add_handler(lambda tweet: None, tag="*")
+    tweet = Tweet(
+        id="1",
+        text="text",
+        matching_rules=[StreamRule(id="1", tag="tag 3"), StreamRule(id="2", tag="x")],
+    )
+
+    assert benchmark(router.route, tweet) == 2
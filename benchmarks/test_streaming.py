@@ -0,0 +1,141 @@
+"""
+    benchmarks for stream line parsing
+"""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from pytwitter import StreamApi
+from pytwitter.streaming import iter_line_batches
+
+LINES = 2000
+
+
+# tweet with default fields
+TWEET = {
+    "data": {
+        "edit_history_tweet_ids": ["1067094924124872705"],
+        "id": "1067094924124872705",
+        "text": "Just getting started with Twitter APIs? Find out what you need in order to build an app.",
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def stream_payload():
+    line = json.dumps(TWEET).encode("utf-8")
+    # keep alive signal every 100 lines
+    lines = [line if idx % 100 else b"" for idx in range(1, LINES + 1)]
+    return b"\r\n".join(lines) + b"\r\n"
+
+
+class CountStreamApi(StreamApi):
+    def __init__(self, **kwargs):
+        super().__init__(bearer_token="bearer token", max_retries=1, **kwargs)
+        self.count = 0
+
+    def on_tweet(self, tweet):
+        self.count += 1
+        if self.count >= LINES - LINES // 100:
+            self.disconnect()
+
+
+def fake_stream(payload):
+    """Local fake stream, serve the payload from memory."""
+
+    def get(*args, **kwargs):
+        resp = requests.models.Response()
+        resp.status_code = 200
+        resp.raw = io.BytesIO(payload)
+        return resp
+
+    return get
+
+
+@pytest.mark.parametrize("return_json", [True, False], ids=["json", "model"])
+@pytest.mark.parametrize("chunk_size", [1024, 64 * 1024])
+def test_stream_lines(benchmark, stream_payload, return_json, chunk_size):
+    def run():
+        api = CountStreamApi(chunk_size=chunk_size)
+        with patch.object(api.session, "get", fake_stream(stream_payload)):
+            api.sample_stream(return_json=return_json)
+        return api.count
+
+    count = benchmark(run)
+    assert count == LINES - LINES // 100
+    benchmark.extra_info["lines"] = LINES
+
+
+@pytest.fixture(scope="module")
+def fake_server():
+    from pytwitter.testing import FakeTwitterServer
+
+    with FakeTwitterServer(
+        stream_limit=LINES, keep_alive_interval=0.01, rate_limit=False
+    ) as server:
+        yield server
+
+
+def count_lines(resp, framing):
+    count = 0
+    if framing == "iter_lines":
+        for _ in resp.iter_lines(chunk_size=1024):
+            count += 1
+    else:
+        for lines in iter_line_batches(resp.iter_content(64 * 1024)):
+            count += len(lines)
+    return count
+
+
+@pytest.mark.parametrize("framing", ["iter_lines", "batches"])
+def test_stream_framing(benchmark, stream_payload, framing):
+    """Lines per second framed from memory, compare with the `iter_lines` path."""
+
+    def run():
+        return count_lines(fake_stream(stream_payload)(), framing)
+
+    count = benchmark(run)
+    assert count == LINES
+    if benchmark.stats:
+        # no stats with --benchmark-disable.
+        benchmark.extra_info["lines_per_second"] = count / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize("framing", ["iter_lines", "batches"])
+def test_stream_framing_server(benchmark, fake_server, framing):
+    """Lines per second read from a local fake stream server."""
+    url = f"{fake_server.api_url}/tweets/sample/stream"
+    headers = {"Authorization": "Bearer bearer token"}
+
+    def run():
+        with requests.get(url, headers=headers, stream=True) as resp:
+            return count_lines(resp, framing)
+
+    count = benchmark(run)
+    assert count >= LINES
+    if benchmark.stats:
+        # no stats with --benchmark-disable.
+        benchmark.extra_info["lines_per_second"] = count / benchmark.stats.stats.mean
+
+
+class BatchStreamApi(CountStreamApi):
+    def on_batch(self, tweets):
+        self.count += len(tweets)
+        if self.count >= LINES - LINES // 100:
+            self.disconnect()
+
+
+@pytest.mark.parametrize("decode_processes", [None, 4], ids=["inline", "processes"])
+def test_stream_batches(benchmark, stream_payload, decode_processes):
+    def run():
+        api = BatchStreamApi(batch_size=100, decode_processes=decode_processes)
+        with patch.object(api.session, "get", fake_stream(stream_payload)):
+            api.sample_stream()
+        return api.count
+
+    count = benchmark.pedantic(run, rounds=3)
+    assert count >= LINES - LINES // 100
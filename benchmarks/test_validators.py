@@ -0,0 +1,36 @@
+"""
+    benchmarks for parameter validators
+"""
+
+import pytest
+
+from pytwitter.utils.validators import enf_comma_separated
+
+TWEET_FIELDS = [
+    "attachments",
+    "author_id",
+    "context_annotations",
+    "conversation_id",
+    "created_at",
+    "entities",
+    "geo",
+    "id",
+    "in_reply_to_user_id",
+    "lang",
+    "public_metrics",
+    "possibly_sensitive",
+    "referenced_tweets",
+    "reply_settings",
+    "source",
+    "text",
+    "withheld",
+]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [None, ",".join(TWEET_FIELDS), TWEET_FIELDS, tuple(TWEET_FIELDS)],
+    ids=["none", "str", "list", "tuple"],
+)
+def test_enf_comma_separated(benchmark, value):
+    benchmark(enf_comma_separated, name="tweet_fields", value=value)
@@ -1,6 +1,29 @@
 __version__ = "0.9.2"
 
-from .api import Api
-from .streaming import StreamApi
-from .rate_limit import RateLimit, RateLimitData
+import importlib
+
 from .error import PyTwitterError, PythonTwitterDeprecationWarning
+
+# Heavy modules are imported at the first access, keep `import pytwitter` fast.
+_LAZY_ATTRS = {
+    "Api": "api",
+    "StreamApi": "streaming",
+    "RateLimit": "rate_limit",
+    "RateLimitData": "rate_limit",
+    "EntityStore": "store",
+}
+
+__all__ = ["PyTwitterError", "PythonTwitterDeprecationWarning", *_LAZY_ATTRS]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
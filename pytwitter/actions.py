@@ -0,0 +1,422 @@
+"""
+    Persistent queue for bulk write actions, like likes, follows or list members.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.actions import ActionQueue
+
+    api = Api(consumer_key="", consumer_secret="", access_token="", access_secret="")
+    actions = ActionQueue(api, path="actions.db")
+    for user_id in ["2244994945", "783214"]:
+        actions.add("follow", owner="1301152652357595137", target=user_id)
+    actions.run(workers=4)
+    ```
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from pytwitter.error import PyTwitterError
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+@dataclass(frozen=True)
+class ActionSpec:
+    """
+    Api method for an action, and the path to apply the rate limit.
+    """
+
+    method: str
+    opposite: str
+    verb: str
+    path: str
+    owner_arg: str = "user_id"
+    target_arg: str = "tweet_id"
+
+
+ACTIONS: Dict[str, ActionSpec] = {
+    "like": ActionSpec("like_tweet", "unlike", "POST", "/users/{owner}/likes"),
+    "unlike": ActionSpec(
+        "unlike_tweet", "like", "DELETE", "/users/{owner}/likes/{target}"
+    ),
+    "retweet": ActionSpec(
+        "retweet_tweet", "unretweet", "POST", "/users/{owner}/retweets"
+    ),
+    "unretweet": ActionSpec(
+        "remove_retweet_tweet", "retweet", "DELETE", "/users/{owner}/retweets/{target}"
+    ),
+    "bookmark": ActionSpec(
+        "bookmark_tweet", "unbookmark", "POST", "/users/{owner}/bookmarks"
+    ),
+    "unbookmark": ActionSpec(
+        "bookmark_tweet_remove",
+        "bookmark",
+        "DELETE",
+        "/users/{owner}/bookmarks/{target}",
+    ),
+    "follow": ActionSpec(
+        "follow_user",
+        "unfollow",
+        "POST",
+        "/users/{owner}/following",
+        target_arg="target_user_id",
+    ),
+    "unfollow": ActionSpec(
+        "unfollow_user",
+        "follow",
+        "DELETE",
+        "/users/{owner}/following/{target}",
+        target_arg="target_user_id",
+    ),
+    "mute": ActionSpec(
+        "mute_user",
+        "unmute",
+        "POST",
+        "/users/{owner}/muting",
+        target_arg="target_user_id",
+    ),
+    "unmute": ActionSpec(
+        "unmute_user",
+        "mute",
+        "DELETE",
+        "/users/{owner}/muting/{target}",
+        target_arg="target_user_id",
+    ),
+    "block": ActionSpec(
+        "block_user",
+        "unblock",
+        "POST",
+        "/users/{owner}/blocking",
+        target_arg="target_user_id",
+    ),
+    "unblock": ActionSpec(
+        "unblock_user",
+        "block",
+        "DELETE",
+        "/users/{owner}/blocking/{target}",
+        target_arg="target_user_id",
+    ),
+    "add_list_member": ActionSpec(
+        "add_list_member",
+        "remove_list_member",
+        "POST",
+        "/lists/{owner}/members",
+        owner_arg="list_id",
+        target_arg="user_id",
+    ),
+    "remove_list_member": ActionSpec(
+        "remove_list_member",
+        "add_list_member",
+        "DELETE",
+        "/lists/{owner}/members/{target}",
+        owner_arg="list_id",
+        target_arg="user_id",
+    ),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    target TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS actions_pending ON actions (status, owner, target);
+"""
+
+Row = Tuple[int, str, str, str, int]
+
+
+def _batches(items: list, size: int) -> Iterator[list]:
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+def _is_rate_limited(exc: PyTwitterError) -> bool:
+    message = exc.message
+    return isinstance(message, dict) and message.get("status") == 429
+
+
+class ActionQueue:
+    """
+    Write actions stored in sqlite, sent in parallel under the rate limit of each endpoint.
+
+    Adding an action already pending is ignored, and adding the opposite of a pending action
+    (unfollow after follow) cancels both, so neither is sent. Adding an action already done is also
+    ignored, unless its opposite was done after it. Status is saved after each action, so a restarted
+    queue only sends the actions not done yet.
+    """
+
+    def __init__(self, api: Api, path: str = ":memory:", max_attempts: int = 3):
+        """
+        :param api: Api instance with user auth.
+        :param path: Sqlite database file to store the actions.
+        :param max_attempts: Max attempts for an action before marked failed. Rate limited
+            responses are not counted.
+        """
+        self.api = api
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            # actions running when the process stopped may not be sent.
+            self._conn.execute(
+                "UPDATE actions SET status = ? WHERE status = ?", (PENDING, RUNNING)
+            )
+
+    def add(
+        self, action: str, owner: str, target: str, skip_done: bool = True
+    ) -> Optional[int]:
+        """
+        :param action: Action name, one of `ACTIONS`, like follow or add_list_member.
+        :param owner: User id for the action, or list id for list member actions.
+        :param target: Tweet id or user id for the action.
+        :param skip_done: Ignore the action if it is done and not reverted by its opposite later,
+            so adding the same actions after a restart does not send them again.
+        :return: Id for the queued action, None if ignored or cancelled.
+        """
+        spec = ACTIONS.get(action)
+        if spec is None:
+            raise PyTwitterError(f"Not support for action {action}")
+        owner, target = str(owner), str(target)
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, action FROM actions WHERE status = ? AND owner = ? AND target = ?"
+                " AND action IN (?, ?)",
+                (PENDING, owner, target, action, spec.opposite),
+            ).fetchall()
+            for row_id, name in rows:
+                if name == action:
+                    return None
+            if rows:
+                self._conn.execute(
+                    "UPDATE actions SET status = ?, updated_at = ? WHERE id = ?",
+                    (CANCELLED, now, rows[0][0]),
+                )
+                return None
+            if skip_done:
+                last = self._conn.execute(
+                    "SELECT action FROM actions WHERE status = ? AND owner = ? AND target = ?"
+                    " AND action IN (?, ?) ORDER BY id DESC LIMIT 1",
+                    (DONE, owner, target, action, spec.opposite),
+                ).fetchone()
+                if last is not None and last[0] == action:
+                    return None
+            cursor = self._conn.execute(
+                "INSERT INTO actions (action, owner, target, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (action, owner, target, PENDING, now, now),
+            )
+            return cursor.lastrowid
+
+    def add_many(
+        self, actions: Iterable[Tuple[str, str, str]], skip_done: bool = True
+    ) -> int:
+        """
+        :param actions: Tuples of action, owner and target.
+        :param skip_done: Ignore the actions done before, see `add`.
+        :return: Count of queued actions.
+        """
+        return sum(
+            self.add(action, owner, target, skip_done=skip_done) is not None
+            for action, owner, target in actions
+        )
+
+    def cancel(self, owner: str, actions: Optional[Iterable[str]] = None) -> int:
+        """
+        Cancel the pending actions for the owner.
+        :param owner: User id, or list id for list member actions.
+        :param actions: Action names to cancel. None for all actions.
+        :return: Count of cancelled actions.
+        """
+        names = list(actions) if actions is not None else list(ACTIONS)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE actions SET status = ?, updated_at = ? WHERE status = ?"
+                f" AND owner = ? AND action IN ({', '.join('?' * len(names))})",
+                (CANCELLED, time.time(), PENDING, str(owner), *names),
+            )
+            return cursor.rowcount
+
+    def counts(
+        self, owner: Optional[str] = None, ids: Optional[Iterable[int]] = None
+    ) -> Dict[str, int]:
+        """
+        :param owner: Only count actions for the user id or list id.
+        :param ids: Only count actions with these ids, returned by `add`.
+        :return: Count of actions by status.
+        """
+        where, args = (
+            ("WHERE owner = ?", (str(owner),)) if owner is not None else ("", ())
+        )
+        if ids is None:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT status, COUNT(*) FROM actions {where} GROUP BY status",
+                    args,
+                ).fetchall()
+            return dict(rows)
+
+        ids = list(ids)
+        result: Dict[str, int] = {}
+        where = f"{where} AND" if where else "WHERE"
+        # keep under the sqlite limit for query variables.
+        for batch in _batches(ids, 500):
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT status, COUNT(*) FROM actions {where}"
+                    f" id IN ({', '.join('?' * len(batch))}) GROUP BY status",
+                    (*args, *batch),
+                ).fetchall()
+            for status, count in rows:
+                result[status] = result.get(status, 0) + count
+        return result
+
+    def _set_status(self, row_id: int, status: str, attempts: int, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE actions SET status = ?, attempts = ?, error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (status, attempts, error, time.time(), row_id),
+            )
+
+    def _send(self, row: Row) -> dict:
+        _, action, owner, target, _ = row
+        spec = ACTIONS[action]
+        method = getattr(self.api, spec.method)
+        return method(**{spec.owner_arg: owner, spec.target_arg: target})
+
+    def run(self, workers: int = 4, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Send the pending actions. Each endpoint is sent in parallel while its rate limit has
+        requests left, the endpoints out of requests wait for the window reset.
+
+        :param workers: Max actions sending at the same time.
+        :param timeout: Seconds to stop sending new actions. None for until all sent.
+        :return: Count of actions by status.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, action, owner, target, attempts FROM actions"
+                " WHERE status = ? ORDER BY id",
+                (PENDING,),
+            ).fetchall()
+        base_url = self.api.BASE_URL_V2
+        queues: Dict[Tuple[str, str], Deque[Row]] = {}
+        for row in rows:
+            spec = ACTIONS[row[1]]
+            url = base_url + spec.path.format(owner=row[2], target=row[3])
+            endpoint = self.api.rate_limit.url_to_endpoint(url)
+            queues.setdefault((spec.verb, endpoint.resource), deque()).append(row)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        blocked: Dict[Tuple[str, str], float] = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while queues or running:
+                now = time.monotonic()
+                expired = deadline is not None and now >= deadline
+                for key in list(queues):
+                    if expired or len(running) >= workers:
+                        break
+                    if blocked.get(key, 0) > now:
+                        continue
+                    verb, _ = key
+                    rows = queues[key]
+                    row = rows[0]
+                    spec = ACTIONS[row[1]]
+                    url = base_url + spec.path.format(owner=row[2], target=row[3])
+                    wait_time = self.api.rate_limit.acquire(url, verb, block=False)
+                    if wait_time:
+                        blocked[key] = now + wait_time
+                        continue
+                    rows.popleft()
+                    if not rows:
+                        del queues[key]
+                    self._set_status(row[0], RUNNING, row[4])
+                    running[executor.submit(self._send, row)] = (key, row)
+                if expired and not running:
+                    break
+
+                if running:
+                    done, _ = wait(
+                        running,
+                        timeout=self._next_wake(blocked),
+                        return_when=FIRST_COMPLETED,
+                    )
+                elif queues:
+                    time.sleep(self._next_wake(blocked) or 0)
+                    continue
+                else:
+                    done = set()
+                for future in done:
+                    key, row = running.pop(future)
+                    row_id, attempts = row[0], row[4]
+                    try:
+                        future.result()
+                    except PyTwitterError as exc:
+                        if _is_rate_limited(exc):
+                            # the rate limit data is updated by the response.
+                            queues.setdefault(key, deque()).appendleft(row)
+                            self._set_status(row_id, PENDING, attempts)
+                            continue
+                        self._fail(queues, key, row, exc)
+                    except Exception as exc:
+                        self._fail(queues, key, row, exc)
+                    else:
+                        self._set_status(row_id, DONE, attempts + 1)
+        return self.counts()
+
+    def _fail(self, queues, key, row, exc) -> None:
+        row_id, action, owner, target, attempts = row
+        attempts += 1
+        logger.warning(f"Action {action} {owner} {target} failed, exc: {exc}")
+        if attempts >= self.max_attempts:
+            self._set_status(row_id, FAILED, attempts, error=str(exc))
+        else:
+            queues.setdefault(key, deque()).append(
+                (row_id, action, owner, target, attempts)
+            )
+            self._set_status(row_id, PENDING, attempts, error=str(exc))
+
+    @staticmethod
+    def _next_wake(blocked: Dict[Tuple[str, str], float]) -> Optional[float]:
+        now = time.monotonic()
+        waits = [at - now for at in blocked.values() if at > now]
+        return min(waits) if waits else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "ActionQueue":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
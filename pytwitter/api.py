@@ -2,25 +2,33 @@
     Api Impl
 """
 
+from __future__ import annotations
+
 import base64
+import functools
 import logging
 import os
 import re
+import threading
 import time
-from typing import List, Optional, Tuple, Union, IO
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union, IO
 
 import requests
 from requests.models import Response
-from authlib.integrations.requests_client import (
-    OAuth2Session,
-    OAuth2Auth,
-    OAuth1Auth,
-    OAuth1Session,
-)
+
+if TYPE_CHECKING:
+    # authlib is slow to import, import it when need auth.
+    from authlib.integrations.requests_client import OAuth1Session, OAuth2Session
 
 import pytwitter.models as md
+from pytwitter.actions import ActionQueue
 from pytwitter.error import PyTwitterError
+from pytwitter.executor import MapResult, map_calls
+from pytwitter.hedging import HedgePolicy
+from pytwitter.metrics import Hook, RequestRecord, dispatch
 from pytwitter.rate_limit import RateLimit
+from pytwitter.store import EntityStore
+from pytwitter.tokens import OAuth2UserAuth, TokenCache
 from pytwitter.utils.validators import enf_comma_separated
 
 logger = logging.getLogger(__name__)
@@ -53,6 +61,12 @@ class Api:
         proxies: Optional[dict] = None,
         callback_uri: Optional[str] = None,
         scopes: Optional[List[str]] = None,
+        entity_store: Optional[EntityStore] = None,
+        hooks: Optional[List[Hook]] = None,
+        token_cache: Optional[TokenCache] = None,
+        oauth2_token: Optional[dict] = None,
+        token_key: Optional[str] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
     ) -> None:
         """
         Initial the Api instance.
@@ -72,6 +86,19 @@ class Api:
         :param proxies: Proxies for requests.
         :param callback_uri: Your callback URL. This value must correspond to one of the Callback URLs defined in your App settings.
         :param scopes: Scopes allow you to set granular access for your App so that your App only has the permissions that it needs.
+        :param entity_store: Store to share the users, tweets, media and places objects between responses.
+            Useful for paginating with expansions, the same object only decode once.
+        :param hooks: Hooks to receive a record for each request. See `pytwitter.metrics`.
+        :param token_cache: Cache for the app bearer token by consumer key, to share the token
+            between instances and processes. Also the store for OAuth2 user tokens.
+            See `pytwitter.tokens`.
+        :param oauth2_token: OAuth2 user token from `generate_oauth2_access_token`, with client_id.
+            Refreshed automatically if it has the refresh token (scope `offline.access`).
+        :param token_key: Key for the OAuth2 user token in `token_cache`, needed with token_cache,
+            like the client id with the user id. With a stored token, the instance can be
+            initialized by client_id, token_cache and token_key only.
+        :param hedge_policy: Policy to send a second request for slow GET requests.
+            See `pytwitter.hedging`.
         """
         self.session = requests.Session()
         self._auth = None
@@ -89,6 +116,17 @@ class Api:
             callback_uri if callback_uri is not None else self.DEFAULT_CALLBACK_URI
         )
         self.scopes = scopes if scopes is not None else self.DEFAULT_SCOPES
+        self.entity_store = entity_store
+        self.hooks = list(hooks) if hooks else []
+        self.hedge_policy = hedge_policy
+        if hedge_policy is not None and hedge_policy not in self.hooks:
+            # the policy needs the latencies of the requests.
+            self.hooks.append(hedge_policy)
+        self.token_cache = token_cache
+        self.token_key = token_key
+        self._local = threading.local()
+
+        from authlib.integrations.requests_client import OAuth1Auth, OAuth2Auth
 
         # just use bearer token
         if bearer_token:
@@ -97,9 +135,15 @@ class Api:
             )
         # use app auth
         elif consumer_key and consumer_secret and application_only_auth:
-            resp = self.generate_bearer_token(
-                consumer_key=consumer_key, consumer_secret=consumer_secret
+            fetch = functools.partial(
+                self.generate_bearer_token,
+                consumer_key=consumer_key,
+                consumer_secret=consumer_secret,
             )
+            if token_cache is not None:
+                resp = token_cache.get_or_fetch(consumer_key, fetch)
+            else:
+                resp = fetch()
             self._auth = OAuth2Auth(
                 token={"access_token": resp["access_token"], "token_type": "Bearer"}
             )
@@ -115,6 +159,14 @@ class Api:
             self.auth_user_id = self.get_uid_from_access_token_key(
                 access_token=access_token
             )
+        # use oauth2 user token
+        elif client_id and (
+            oauth2_token or (token_cache and token_key and token_cache.get(token_key))
+        ):
+            self._auth = self._get_oauth2_auth(
+                oauth2_token or token_cache.get(token_key)
+            )
+            self.rate_limit = RateLimit("user")
         # use oauth flow by hand
         elif consumer_key and consumer_secret and oauth_flow:
             pass
@@ -133,6 +185,34 @@ class Api:
         uid, _ = access_token.split("-")
         return uid
 
+    def add_hook(self, hook: Hook) -> None:
+        """
+        :param hook: RequestHook instance or callable receiving the RequestRecord.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        self.hooks.remove(hook)
+
+    def _start_record(self, url, verb, params=None) -> RequestRecord:
+        # finish record for the previous call which not parse the response.
+        self._finish_record()
+        record = RequestRecord(
+            endpoint=RateLimit.url_to_endpoint(url).resource,
+            method=verb.upper(),
+            url=url,
+            params=params,
+        )
+        dispatch(self.hooks, "on_request", record)
+        self._local.record = record
+        return record
+
+    def _finish_record(self) -> None:
+        record = getattr(self._local, "record", None)
+        if record is not None:
+            self._local.record = None
+            dispatch(self.hooks, "on_response", record)
+
     def _request(
         self,
         url,
@@ -153,6 +233,10 @@ class Api:
         :param enforce_auth: Whether api need auth
         :return: A json object
         """
+        record = None
+        if self.hooks:
+            record = self._start_record(url=url, verb=verb, params=params)
+
         auth = None
         if enforce_auth:
             if not self._auth:
@@ -160,7 +244,12 @@ class Api:
 
             auth = self._auth
 
-            if url and self.sleep_on_rate_limit:
+            if url and getattr(self._local, "gate_rate_limit", False):
+                s_time = time.perf_counter()
+                self.rate_limit.acquire(url=url, method=verb)
+                if record is not None:
+                    record.wait_time = time.perf_counter() - s_time
+            elif url and self.sleep_on_rate_limit:
                 limit = self.rate_limit.get_limit(url=url, method=verb)
                 if limit.remaining == 0:
                     s_time = max((limit.reset - time.time()), 0) + 10.0
@@ -168,21 +257,57 @@ class Api:
                         f"Rate limited requesting [{url}], sleeping for [{s_time}]"
                     )
                     time.sleep(s_time)
+                    if record is not None:
+                        record.wait_time = s_time
 
-        resp = self.session.request(
-            url=url,
-            method=verb,
-            params=params,
-            data=data,
-            auth=auth,
-            json=json,
-            files=files,
-            timeout=self.timeout,
-            proxies=self.proxies,
-        )
+        start = time.perf_counter()
+        try:
+            send = functools.partial(
+                self.session.request,
+                url=url,
+                method=verb,
+                params=params,
+                data=data,
+                auth=auth,
+                json=json,
+                files=files,
+                timeout=self.timeout,
+                proxies=self.proxies,
+            )
+            for attempt in range(2):
+                if self.hedge_policy is not None and verb.upper() == "GET":
+                    resp = self.hedge_policy.send(url, send, self.rate_limit)
+                else:
+                    resp = send()
+                # the user token may be revoked or refreshed by other instances.
+                if not (
+                    attempt == 0
+                    and resp.status_code == 401
+                    and files is None
+                    and isinstance(auth, OAuth2UserAuth)
+                    and auth.on_unauthorized(resp.request)
+                ):
+                    break
+                if record is not None:
+                    record.retries += 1
+        except Exception as exc:
+            if record is not None:
+                record.network_time = time.perf_counter() - start
+                record.error = repr(exc)
+                self._finish_record()
+            raise
+
+        if record is not None:
+            record.network_time = time.perf_counter() - start
+            record.status_code = resp.status_code
+            record.bytes = len(resp.content)
 
         if url and self.rate_limit:
-            self.rate_limit.set_limit(url=url, headers=resp.headers, method=verb)
+            limit = self.rate_limit.set_limit(
+                url=url, headers=resp.headers, method=verb
+            )
+            if record is not None and "x-rate-limit-remaining" in resp.headers:
+                record.rate_limit_remaining = limit.remaining
 
         return resp
 
@@ -203,6 +328,8 @@ class Api:
         if callback_uri is None:
             callback_uri = self.callback_uri
 
+        from authlib.integrations.requests_client import OAuth1Session
+
         session = OAuth1Session(
             client_id=self.consumer_key,
             client_secret=self.consumer_secret,
@@ -237,6 +364,8 @@ class Api:
         data = session.fetch_access_token(
             self.BASE_ACCESS_TOKEN_URL, proxies=self.proxies
         )
+        from authlib.integrations.requests_client import OAuth1Auth
+
         self._auth = OAuth1Auth(
             client_id=self.consumer_key,
             client_secret=self.consumer_secret,
@@ -260,6 +389,8 @@ class Api:
         if not self._auth:
             raise PyTwitterError("Must have authorized credentials")
 
+        from authlib.integrations.requests_client import OAuth1Auth
+
         if not isinstance(self._auth, OAuth1Auth):
             raise PyTwitterError("Can only revoke oauth1 token")
 
@@ -333,6 +464,8 @@ class Api:
         if scope is None:
             scope = self.scopes
 
+        from authlib.integrations.requests_client import OAuth2Session
+
         session = OAuth2Session(
             client_id=self.client_id,
             client_secret=self.client_secret,
@@ -382,50 +515,127 @@ class Api:
             code_verifier=code_verifier,
             proxies=self.proxies,
         )
-        self._auth = OAuth2Auth(token=token)
+        self._auth = self._get_oauth2_auth(token)
         return token
 
-    @staticmethod
-    def _parse_response(resp: Response) -> dict:
+    def _get_oauth2_auth(self, token: dict):
         """
-        :param resp: Response
-        :return: json data
+        :param token: OAuth2 user token.
+        :return: Auth refresh the token if it has the refresh token.
         """
+        if not token.get("refresh_token"):
+            from authlib.integrations.requests_client import OAuth2Auth
+
+            return OAuth2Auth(token=token)
+        if self.token_cache is not None and not self.token_key:
+            # users of an app must not share the token in the cache.
+            raise PyTwitterError(
+                "Need token_key for the OAuth2 user token in token_cache"
+            )
+        return OAuth2UserAuth(
+            token=token,
+            refresh=self.refresh_oauth2_token,
+            store=self.token_cache,
+            key=self.token_key or "oauth2",
+        )
+
+    def refresh_oauth2_token(self, refresh_token: str) -> dict:
+        """
+        Get a new OAuth2 user token by the refresh token.
+
+        :param refresh_token: Refresh token from the token.
+        :return: token data
+        """
+        auth = (self.client_id, self.client_secret) if self.client_secret else None
+        resp = requests.post(
+            url=self.BASE_OAUTH2_ACCESS_TOKEN_URL,
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": refresh_token,
+                "client_id": self.client_id,
+            },
+            auth=auth,
+            timeout=self.timeout,
+            proxies=self.proxies,
+        )
+        # not parse by `_parse_response`, the refresh may run in a request with record.
         try:
             data = resp.json()
         except ValueError:
             raise PyTwitterError(f"Unknown error: {resp.content}")
-
         if not resp.ok:
             raise PyTwitterError(data)
+        return data
 
-        # note:
-        # If only errors will raise
-        if "errors" in data and len(data.keys()) == 1:
-            raise PyTwitterError(data["errors"])
-
-        # v1 token not
-        if "reason" in data:
-            raise PyTwitterError(data)
+    def _parse_response(self, resp: Response, finish: bool = True) -> dict:
+        """
+        :param resp: Response
+        :param finish: Whether finish the request record. Set False if will build models after.
+        :return: json data
+        """
+        record = getattr(self._local, "record", None)
+        start = time.perf_counter()
+        try:
+            try:
+                data = resp.json()
+            except ValueError:
+                raise PyTwitterError(f"Unknown error: {resp.content}")
+
+            if not resp.ok:
+                raise PyTwitterError(data)
+
+            # note:
+            # If only errors will raise
+            if "errors" in data and len(data.keys()) == 1:
+                raise PyTwitterError(data["errors"])
+
+            # v1 token not
+            if "reason" in data:
+                raise PyTwitterError(data)
+
+            if record is not None and isinstance(data.get("data"), list):
+                record.result_count = len(data["data"])
+            elif record is not None and isinstance(data.get("data"), dict):
+                record.result_count = 1
+        except PyTwitterError as exc:
+            if record is not None:
+                record.error = str(exc.message)
+            raise
+        finally:
+            if record is not None:
+                record.decode_time = time.perf_counter() - start
+                if finish:
+                    self._finish_record()
 
         return data
 
-    @staticmethod
-    def _format_response(resp_json, cls, multi=False) -> md.Response:
+    def _format_response(self, resp_json, cls, multi=False) -> md.Response:
+        record = getattr(self._local, "record", None)
+        start = time.perf_counter()
         data, includes, meta, errors = (
             resp_json.get("data", []),
             resp_json.get("includes"),
             resp_json.get("meta"),
             resp_json.get("errors"),
         )
+        store = self.entity_store
+        if store is not None and store.supports(cls):
+            new_from_json_dict = functools.partial(store.intern, cls)
+        else:
+            new_from_json_dict = cls.new_from_json_dict
+
         if multi:
-            data = [cls.new_from_json_dict(item) for item in data]
+            data = [new_from_json_dict(item) for item in data]
         else:
-            data = cls.new_from_json_dict(data)
+            data = new_from_json_dict(data)
 
         res = md.Response(
             data=data,
-            includes=md.Includes.new_from_json_dict(includes),
+            includes=(
+                store.build_includes(includes)
+                if store is not None
+                else md.Includes.new_from_json_dict(includes)
+            ),
             meta=md.Meta.new_from_json_dict(meta),
             errors=(
                 [md.Error.new_from_json_dict(err) for err in errors]
@@ -434,6 +644,10 @@ class Api:
             ),
             _json=resp_json,
         )
+        if record is not None:
+            record.build_time = time.perf_counter() - start
+            dispatch(self.hooks, "on_build", record, res)
+            self._finish_record()
         return res
 
     def _get(
@@ -455,12 +669,15 @@ class Api:
             - includes: If have expansions, will return
         """
         resp = self._request(url=url, params=params)
-        resp_json = self._parse_response(resp)
+        try:
+            resp_json = self._parse_response(resp, finish=return_json)
 
-        if return_json:
-            return resp_json
-        else:
-            return self._format_response(resp_json, cls, multi)
+            if return_json:
+                return resp_json
+            else:
+                return self._format_response(resp_json, cls, multi)
+        finally:
+            self._finish_record()
 
     def get_tweets(
         self,
@@ -708,6 +925,7 @@ class Api:
             data=args,
             files=files,
         )
+        self._finish_record()
         if resp.ok:
             return True
         raise PyTwitterError(resp.json())
@@ -870,7 +1088,7 @@ class Api:
             verb="POST",
             json=args,
         )
-        data = self._parse_response(resp=resp)
+        data = self._parse_response(resp=resp, finish=return_json)
         if return_json:
             return data
         else:
@@ -897,6 +1115,7 @@ class Api:
             json={"segment_index": segment_index},
             files={"media": media},
         )
+        self._finish_record()
         if resp.ok:
             return True
         raise PyTwitterError(resp.json())
@@ -919,7 +1138,7 @@ class Api:
             url=f"{self.BASE_URL_V2}/media/upload/{media_id}/finalize",
             verb="POST",
         )
-        data = self._parse_response(resp=resp)
+        data = self._parse_response(resp=resp, finish=return_json)
         if return_json:
             return data
         else:
@@ -947,7 +1166,7 @@ class Api:
                 "media_id": media_id,
             },
         )
-        data = self._parse_response(resp=resp)
+        data = self._parse_response(resp=resp, finish=return_json)
         if return_json:
             return data
         else:
@@ -2970,6 +3189,101 @@ class Api:
         data = self._parse_response(resp=resp)
         return data
 
+    def sync_list_members(
+        self,
+        list_id: str,
+        desired_user_ids: Iterable[str],
+        *,
+        path: str = ":memory:",
+        workers: int = 4,
+        dry_run: bool = False,
+    ) -> dict:
+        """
+        Add and remove members to make the List members same as the desired users.
+
+        Current members are fetched with json pages, the changes are sent by `ActionQueue` under
+        the rate limits for add and remove members. With a `path`, an interrupted sync can be run
+        again, only the changes not done yet are sent.
+
+        :param list_id: The ID of the List you own.
+        :param desired_user_ids: IDs for the users should be members.
+        :param path: Sqlite database file to store the progress.
+        :param workers: Max requests sending at the same time.
+        :param dry_run: Only compute the changes.
+        :return: Count of users to add, remove and keep, and count of actions queued by this sync
+            by status.
+        """
+        list_id = str(list_id)
+        current, token = set(), None
+        while True:
+            resp = self.get_list_members(
+                list_id=list_id,
+                max_results=100,
+                pagination_token=token,
+                return_json=True,
+            )
+            current.update(user["id"] for user in resp.get("data", []))
+            token = resp.get("meta", {}).get("next_token")
+            if not token:
+                break
+
+        desired = {str(user_id) for user_id in desired_user_ids}
+        add, remove = desired - current, current - desired
+        result = {
+            "add": len(add),
+            "remove": len(remove),
+            "keep": len(desired & current),
+        }
+        if dry_run:
+            return result
+
+        with ActionQueue(self, path=path) as actions:
+            # changes queued by a previous sync may be stale.
+            actions.cancel(list_id, ["add_list_member", "remove_list_member"])
+            changes = [("remove_list_member", user_id) for user_id in sorted(remove)]
+            changes += [("add_list_member", user_id) for user_id in sorted(add)]
+            # the changes are from the current members, actions done before may be reverted since.
+            ids = [
+                actions.add(action, list_id, user_id, skip_done=False)
+                for action, user_id in changes
+            ]
+            actions.run(workers=workers)
+            # only count the actions queued by this sync, not the history in the database.
+            result.update(actions.counts(list_id, ids=filter(None, ids)))
+        return result
+
+    def map(
+        self,
+        method: str,
+        kwargs_list: Iterable[dict],
+        *,
+        concurrency: int = 4,
+        ordered: bool = False,
+        retries: int = 2,
+    ) -> Iterator[MapResult]:
+        """
+        Call the api method for each keyword arguments on a thread pool.
+
+        Each request reserves from the rate limit of its endpoint before sending, and waits for
+        the window reset if no request left. Errors are returned in the results, not raised,
+        so a failed call does not abort the others.
+
+        :param method: Name of the api method, like `get_timelines`.
+        :param kwargs_list: Keyword arguments for each call.
+        :param concurrency: Max calls running at the same time.
+        :param ordered: Yield results in the order of the arguments, default as completed.
+        :param retries: Retries for a call got 429.
+        :return: Iterator for `MapResult` with the index, kwargs, value or error.
+        """
+        return map_calls(
+            self,
+            method,
+            kwargs_list,
+            concurrency=concurrency,
+            ordered=ordered,
+            retries=retries,
+        )
+
     def follow_list(
         self,
         *,
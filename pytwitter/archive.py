@@ -0,0 +1,311 @@
+"""
+    Archive raw stream lines to rotating compressed NDJSON segments.
+
+    ``` python
+    from pytwitter import StreamApi
+    from pytwitter.archive import SegmentReader, SegmentWriter
+
+    writer = SegmentWriter("archive", compression="gzip", max_bytes=64 * 1024 * 1024)
+    stream_api = StreamApi(bearer_token="bearer token", line_sinks=[writer])
+    stream_api.sample_stream()
+    writer.close()
+
+    # replay the archived lines into the same handlers
+    SegmentReader("archive").replay(stream_api)
+    ```
+"""
+
+import gzip
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+from typing import IO, Iterator, List, Optional
+
+from pytwitter.error import PyTwitterError
+from pytwitter.streaming import iter_line_batches
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", "none": ".ndjson"}
+PART_SUFFIX = ".part"
+
+_STOP = object()
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise PyTwitterError(
+            "zstd compression need package zstandard, "
+            "install with `pip install python-twitter-v2[zstd]`"
+        )
+    return zstandard
+
+
+class SegmentWriter:
+    """
+    Write raw lines to segments on a background thread.
+
+    A segment is written as `<name>.part` and renamed when it is rotated by size or age, so only
+    complete segments are read. Data is flushed and fsynced every `fsync_interval` seconds,
+    instead of for each line.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "stream",
+        compression: str = "gzip",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_seconds: Optional[float] = 3600,
+        fsync_interval: float = 1.0,
+        queue_size: int = 1000,
+        level: int = 3,
+    ) -> None:
+        """
+        :param directory: Directory for segments.
+        :param prefix: Prefix for segment file names.
+        :param compression: gzip, zstd (need package zstandard) or none.
+        :param max_bytes: Rotate the segment after these uncompressed bytes.
+        :param max_seconds: Rotate the segment after these seconds. None for only by size.
+        :param fsync_interval: Seconds between flush and fsync.
+        :param queue_size: Max batches of lines waiting for write, the stream waits when full.
+        :param level: Compression level.
+        """
+        if compression not in EXTENSIONS:
+            raise PyTwitterError(f"Not support for compression {compression}")
+        if compression == "zstd":
+            _zstandard()
+        self.directory = directory
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.fsync_interval = fsync_interval
+        self.level = level
+        self.lines = 0
+        self.segments: List[str] = []
+        self.error: Optional[BaseException] = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._raw: Optional[IO[bytes]] = None
+        self._file = None
+        self._path: Optional[str] = None
+        self._bytes = 0
+        self._opened_at = 0.0
+        self._seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write_lines(self, lines: List[bytes]) -> None:
+        """
+        Queue lines to write, keep alive signals (empty lines) are skipped.
+        :param lines: Raw lines without line break.
+        """
+        if self.error is not None:
+            raise PyTwitterError(f"Segment writer failed: {self.error!r}")
+        lines = [line for line in lines if line]
+        if lines:
+            self._queue.put(lines)
+
+    def write(self, line: bytes) -> None:
+        self.write_lines([line])
+
+    def close(self) -> None:
+        """
+        Write the queued lines, and close the current segment.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def __enter__(self) -> "SegmentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _open(self) -> None:
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        while True:
+            # writers in other processes or restarted in the same second use the directory too.
+            self._seq += 1
+            name = f"{self.prefix}-{stamp}-{self._seq:06d}-{os.getpid()}"
+            path = os.path.join(self.directory, name + EXTENSIONS[self.compression])
+            if os.path.exists(path):
+                continue
+            try:
+                self._raw = open(path + PART_SUFFIX, "xb")
+            except FileExistsError:
+                continue
+            self._path = path
+            break
+        if self.compression == "gzip":
+            self._file = gzip.GzipFile(
+                fileobj=self._raw, mode="wb", compresslevel=self.level
+            )
+        elif self.compression == "zstd":
+            compressor = _zstandard().ZstdCompressor(level=self.level)
+            self._file = compressor.stream_writer(self._raw, closefd=False)
+        else:
+            self._file = self._raw
+        self._bytes = 0
+        self._opened_at = time.monotonic()
+
+    def _sync(self) -> None:
+        if self._file is not self._raw:
+            self._file.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def _rotate(self) -> None:
+        if self._file is None:
+            return
+        if self._file is not self._raw:
+            self._file.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self._path + PART_SUFFIX, self._path)
+        self.segments.append(self._path)
+        self._file = self._raw = self._path = None
+
+    def _run(self) -> None:
+        last_sync = time.monotonic()
+        dirty = False
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.fsync_interval)
+                except queue.Empty:
+                    item = None
+                items = [item] if item is not None else []
+                # write all queued batches at once.
+                while len(items) < 1000:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = _STOP in items
+                for lines in items:
+                    if lines is _STOP:
+                        continue
+                    if self._file is None:
+                        self._open()
+                    data = b"\n".join(lines) + b"\n"
+                    self._file.write(data)
+                    self._bytes += len(data)
+                    self.lines += len(lines)
+                    dirty = True
+                    if self._bytes >= self.max_bytes:
+                        self._rotate()
+                        dirty = False
+
+                now = time.monotonic()
+                if (
+                    self._file is not None
+                    and self.max_seconds is not None
+                    and now - self._opened_at >= self.max_seconds
+                ):
+                    self._rotate()
+                    dirty = False
+                if dirty and (stop or now - last_sync >= self.fsync_interval):
+                    self._sync()
+                    dirty, last_sync = False, now
+                if stop:
+                    break
+        except Exception as exc:
+            logger.exception(f"Exception in segment writer, exc: {exc}")
+            self.error = exc
+        finally:
+            try:
+                self._rotate()
+            except Exception as exc:
+                logger.exception(f"Exception in close segment, exc: {exc}")
+                self.error = self.error or exc
+
+
+class SegmentReader:
+    """
+    Read archived lines from complete segments, in the written order.
+    """
+
+    def __init__(
+        self, path: str, prefix: str = "stream", chunk_size: int = 1024 * 1024
+    ) -> None:
+        """
+        :param path: Segment file or the directory for segments.
+        :param prefix: Prefix for segment file names in the directory.
+        :param chunk_size: Size for read decompressed data.
+        """
+        self.path = path
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return [self.path]
+        return sorted(
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path)
+            if name.startswith(f"{self.prefix}-")
+            and any(name.endswith(ext) for ext in EXTENSIONS.values())
+        )
+
+    def _iter_chunks(self, segment: str) -> Iterator[bytes]:
+        with open(segment, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if segment.endswith(EXTENSIONS["gzip"]):
+                    reader = gzip.GzipFile(fileobj=mm, mode="rb")
+                elif segment.endswith(EXTENSIONS["zstd"]):
+                    reader = _zstandard().ZstdDecompressor().stream_reader(mm)
+                else:
+                    # plain segments are read from the mapped memory directly.
+                    for offset in range(0, len(mm), self.chunk_size):
+                        yield mm[offset : offset + self.chunk_size]
+                    return
+                with reader:
+                    while True:
+                        chunk = reader.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        yield chunk
+
+    def iter_batches(self) -> Iterator[List[bytes]]:
+        """
+        :return: Batches of raw lines.
+        """
+        for segment in self.segments():
+            yield from iter_line_batches(self._iter_chunks(segment), delimiter=b"\n")
+
+    def __iter__(self) -> Iterator[bytes]:
+        for lines in self.iter_batches():
+            yield from lines
+
+    def replay(self, api, return_json: bool = False) -> int:
+        """
+        Feed the archived lines into the handlers of a StreamApi, like `on_batch` or `on_tweet`.
+        :param api: StreamApi instance.
+        :param return_json: Type for returned data. If you set True JSON data will be returned.
+        :return: Count of lines replayed.
+        """
+        count = 0
+        api.running = True
+        try:
+            for lines in self.iter_batches():
+                count += len(lines)
+                api.on_lines(lines=lines, return_json=return_json)
+                if not api.running:
+                    break
+        finally:
+            api._close_batches(return_json=return_json)
+            api.running = False
+        return count
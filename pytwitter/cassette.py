@@ -0,0 +1,301 @@
+"""
+    Record and replay the http traffic of Api and StreamApi.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.cassette import Cassette
+
+    api = Api(bearer_token="bearer token")
+    with Cassette("traffic.jsonl.gz", mode="record").install(api):
+        api.get_tweet("1354143047324299264")
+
+    # later, without network
+    with Cassette("traffic.jsonl.gz", mode="replay", speed=10).install(api):
+        api.get_tweet("1354143047324299264")
+    ```
+"""
+
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from requests import Response, Session
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from pytwitter.error import PyTwitterError
+
+
+def _encode_body(data: bytes) -> dict:
+    try:
+        return {"body": data.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode_body(entry: dict) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+class _RecordingRaw:
+    """
+    Wrap the raw stream response, record the chunks with the time offset.
+    """
+
+    def __init__(self, raw, entry: dict, cassette: "Cassette") -> None:
+        self._raw = raw
+        self._entry = entry
+        self._cassette = cassette
+        self._start = time.perf_counter()
+        self._saved = False
+
+    def _record(self, chunk: bytes) -> None:
+        if chunk:
+            offset = round(time.perf_counter() - self._start, 6)
+            # raw bytes, a multibyte character may be split between chunks.
+            self._entry["chunks_b64"].append(
+                [offset, base64.b64encode(chunk).decode("ascii")]
+            )
+
+    def _save(self) -> None:
+        if not self._saved:
+            self._saved = True
+            self._cassette._write(self._entry)
+
+    def stream(self, amt=2**16, decode_content=None):
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                self._record(chunk)
+                yield chunk
+        finally:
+            self._save()
+
+    def read(self, amt=None, *args, **kwargs):
+        chunk = self._raw.read(amt, *args, **kwargs)
+        self._record(chunk)
+        if not chunk:
+            self._save()
+        return chunk
+
+    def close(self) -> None:
+        self._save()
+        self._raw.close()
+
+    def __getattr__(self, item):
+        return getattr(self._raw, item)
+
+
+class _ReplayRaw:
+    """
+    File like raw response, serve the recorded chunks at the recorded pace.
+    """
+
+    def __init__(self, chunks: List[Tuple[float, bytes]], speed: Optional[float]):
+        self._chunks = deque(chunks)
+        self._speed = speed
+        self._start = time.perf_counter()
+        self._buffer = b""
+        self.closed = False
+
+    def _next_chunk(self) -> bytes:
+        if not self._chunks:
+            self.closed = True
+            return b""
+        offset, chunk = self._chunks.popleft()
+        if self._speed:
+            delay = offset / self._speed - (time.perf_counter() - self._start)
+            if delay > 0:
+                time.sleep(delay)
+        return chunk
+
+    def stream(self, amt=2**16, decode_content=None) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                break
+            yield chunk
+
+    def read(self, amt=None, *args, **kwargs) -> bytes:
+        if amt is None:
+            data = self._buffer + b"".join(
+                self._next_chunk() for _ in range(len(self._chunks))
+            )
+            self._buffer = b""
+            self.closed = True
+            return data
+        if not self._buffer:
+            self._buffer = self._next_chunk()
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self) -> None:
+        self.closed = True
+
+    def release_conn(self) -> None:
+        pass
+
+
+class _RecordingAdapter(HTTPAdapter):
+    def __init__(self, cassette: "Cassette") -> None:
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, stream=False, **kwargs):
+        start = time.perf_counter()
+        resp = super().send(request, stream=stream, **kwargs)
+        entry = {
+            "method": request.method,
+            "url": request.url,
+            "status": resp.status_code,
+            "reason": resp.reason,
+            "headers": dict(resp.headers),
+            "elapsed": round(time.perf_counter() - start, 6),
+        }
+        if stream:
+            entry["chunks_b64"] = []
+            resp.raw = _RecordingRaw(resp.raw, entry, self.cassette)
+        else:
+            entry.update(_encode_body(resp.content))
+            self.cassette._write(entry)
+        return resp
+
+
+class _ReplayAdapter(BaseAdapter):
+    def __init__(self, cassette: "Cassette") -> None:
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, stream=False, **kwargs):
+        entry = self.cassette._next_entry(request.method, request.url)
+        speed = self.cassette.speed
+        if speed:
+            time.sleep(entry["elapsed"] / speed)
+
+        resp = Response()
+        resp.status_code = entry["status"]
+        resp.reason = entry.get("reason")
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.headers.pop("content-encoding", None)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        if "chunks_b64" in entry:
+            chunks = [
+                (offset, base64.b64decode(data)) for offset, data in entry["chunks_b64"]
+            ]
+            resp.raw = _ReplayRaw(chunks, speed)
+        elif "chunks" in entry:
+            # cassettes recorded with text chunks.
+            chunks = [
+                (offset, data.encode("utf-8")) for offset, data in entry["chunks"]
+            ]
+            resp.raw = _ReplayRaw(chunks, speed)
+        else:
+            resp.raw = _ReplayRaw([(0.0, _decode_body(entry))], None)
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+class Cassette:
+    """
+    Record every response (headers, body, timing) and stream chunks into a gzip json lines file,
+    and serve them back without network.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        speed: Optional[float] = None,
+        repeat: bool = False,
+    ) -> None:
+        """
+        :param path: File for the cassette.
+        :param mode: record or replay.
+        :param speed: Pace for replay. 1 for recorded pace, 10 for 10x faster.
+            None will serve as fast as possible.
+        :param repeat: When recorded responses for a request used up, replay from the first one.
+            Otherwise will raise an error.
+        """
+        if mode not in ("record", "replay"):
+            raise PyTwitterError(f"Not support for cassette mode {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.repeat = repeat
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: Dict[Tuple[str, str], Deque[dict]] = defaultdict(deque)
+        self._used: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+        # sessions installed, with their adapters before, restored by `close`.
+        self._sessions: List[Tuple[Session, OrderedDict]] = []
+
+        if mode == "record":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._entries[(entry["method"], entry["url"])].append(entry)
+
+    def install(self, *apis) -> "Cassette":
+        """
+        Mount the cassette to the sessions of Api or StreamApi instances.
+        :param apis: Api or StreamApi instances.
+        :return: The cassette
+        """
+        adapter = (
+            _RecordingAdapter(self) if self.mode == "record" else _ReplayAdapter(self)
+        )
+        for api in apis:
+            session = api.session
+            if all(installed is not session for installed, _ in self._sessions):
+                self._sessions.append((session, OrderedDict(session.adapters)))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        return self
+
+    def _write(self, entry: dict) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _next_entry(self, method: str, url: str) -> dict:
+        key = (method, url)
+        with self._lock:
+            entries = self._entries[key]
+            if not entries and self.repeat and self._used[key]:
+                entries.extend(self._used.pop(key))
+            if not entries:
+                raise PyTwitterError(f"No recorded response for {method} {url}")
+            entry = entries.popleft()
+            self._used[key].append(entry)
+            return entry
+
+    def close(self) -> None:
+        """
+        Close the file, and restore the adapters of the installed sessions.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            sessions, self._sessions = self._sessions, []
+        for session, adapters in sessions:
+            for adapter in set(session.adapters.values()) - set(adapters.values()):
+                adapter.close()
+            session.adapters = adapters
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
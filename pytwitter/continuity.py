@@ -0,0 +1,205 @@
+"""
+    De-duplication and gap backfill for streams across reconnects.
+
+    ``` python
+    from pytwitter import Api, StreamApi
+    from pytwitter.continuity import Backfiller, BloomFilter
+
+    stream_api = StreamApi(bearer_token="bearer token", dedup=BloomFilter(capacity=1_000_000))
+    stream_api.gap_handler = Backfiller(Api(bearer_token="bearer token"), stream_api)
+    stream_api.search_stream(backfill_minutes=5)
+    ```
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+    from pytwitter.streaming import StreamApi
+
+logger = logging.getLogger(__name__)
+
+
+class WindowedIdSet:
+    """
+    Remember ids seen in the last `window` seconds, and at most `max_size` ids.
+    """
+
+    def __init__(self, window: float = 600, max_size: Optional[int] = None) -> None:
+        """
+        :param window: Seconds to remember an id.
+        :param max_size: Max ids to remember, the oldest ones are dropped first.
+        """
+        self.window = window
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, item_id: str) -> bool:
+        """
+        :param item_id: Tweet id.
+        :return: True if the id was seen, otherwise remember it and return False.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ids = self._ids
+            while ids:
+                oldest, at = next(iter(ids.items()))
+                if now - at < self.window and (
+                    self.max_size is None or len(ids) < self.max_size
+                ):
+                    break
+                del ids[oldest]
+            if item_id in ids:
+                return True
+            ids[item_id] = now
+            return False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class BloomFilter:
+    """
+    Bloom filter for seen ids with fixed memory. When `capacity` ids added, a new filter is started
+    and the previous one is kept for lookup, so the memory is bounded for endless streams.
+    An unseen id may be reported as seen with probability `error_rate`.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001) -> None:
+        """
+        :param capacity: Ids for one filter generation.
+        :param error_rate: False positive rate for one generation.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous: Optional[bytearray] = None
+        self._lock = threading.Lock()
+
+    def _positions(self, item_id: str):
+        digest = hashlib.blake2b(item_id.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _contains(bits: bytearray, positions) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def seen(self, item_id: str) -> bool:
+        """
+        :param item_id: Tweet id.
+        :return: True if the id was (probably) seen, otherwise remember it and return False.
+        """
+        positions = self._positions(item_id)
+        with self._lock:
+            if self._contains(self._current, positions) or (
+                self._previous is not None and self._contains(self._previous, positions)
+            ):
+                return True
+            if self.count >= self.capacity:
+                self._previous, self._current = self._current, bytearray(
+                    len(self._current)
+                )
+                self.count = 0
+            for p in positions:
+                self._current[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+            return False
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+class Backfiller:
+    """
+    Gap handler for StreamApi. Search the tweets for the active rules in the gaps not covered by
+    `backfill_minutes`, and deliver them to the stream handlers with the matching rules.
+    """
+
+    def __init__(
+        self,
+        api: Api,
+        stream_api: StreamApi,
+        query_type: str = "recent",
+        max_results: int = 100,
+        max_pages: Optional[int] = None,
+        end_time_delay: float = 10.0,
+        **search_kwargs,
+    ) -> None:
+        """
+        :param api: Api instance to search tweets.
+        :param stream_api: StreamApi instance to get rules and deliver tweets.
+        :param query_type: recent or all, see `Api.search_tweets`.
+        :param max_results: Results for one page.
+        :param max_pages: Max pages for a rule in one gap. None for all pages.
+        :param end_time_delay: Seconds the search end time is kept before now,
+            the search api rejects end times within the last 10 seconds.
+        :param search_kwargs: Other arguments for `Api.search_tweets`, like `tweet_fields`.
+        """
+        self.api = api
+        self.stream_api = stream_api
+        self.query_type = query_type
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.end_time_delay = end_time_delay
+        self.search_kwargs = search_kwargs
+        self.backfilled = 0
+
+    def __call__(self, start: float, end: float, covered: bool) -> None:
+        if covered:
+            return
+        # the last seconds of a recent gap can not be searched yet.
+        end = min(end, time.time() - self.end_time_delay)
+        if end <= start:
+            logger.debug(f"Gap from {start} is too recent to backfill")
+            return
+        rules = self.stream_api.get_rules(return_json=True).get("data", [])
+        for rule in rules:
+            next_token, pages = None, 0
+            while self.max_pages is None or pages < self.max_pages:
+                resp = self.api.search_tweets(
+                    query=rule["value"],
+                    query_type=self.query_type,
+                    start_time=_format_time(start),
+                    end_time=_format_time(end),
+                    max_results=self.max_results,
+                    next_token=next_token,
+                    return_json=True,
+                    **self.search_kwargs,
+                )
+                pages += 1
+                for data in resp.get("data", []):
+                    line = {"data": data, "matching_rules": [rule]}
+                    self.backfilled += 1
+                    self.stream_api.deliver(line)
+                next_token = resp.get("meta", {}).get("next_token")
+                if not next_token:
+                    break
+        logger.debug(f"Backfilled gap from {start} to {end} for {len(rules)} rules")
+
+
+def tweet_id(tweet) -> Optional[str]:
+    """
+    :param tweet: Tweet obj, stream line data or tweet json data.
+    :return: Id for the tweet.
+    """
+    if isinstance(tweet, dict):
+        return (tweet.get("data") or tweet).get("id")
+    return getattr(tweet, "id", None)
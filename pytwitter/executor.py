@@ -0,0 +1,128 @@
+"""
+    Call an api method for many arguments in parallel, under the rate limit of the endpoint.
+
+    ``` python
+    from pytwitter import Api
+
+    api = Api(bearer_token="bearer token")
+    user_ids = ["2244994945", "783214"]
+    for result in api.map("get_timelines", ({"user_id": uid} for uid in user_ids), concurrency=8):
+        if result.ok:
+            print(result.kwargs["user_id"], result.value.meta.result_count)
+        else:
+            print(result.kwargs["user_id"], result.error)
+    ```
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Set
+
+from pytwitter.actions import _is_rate_limited
+from pytwitter.error import PyTwitterError
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MapResult:
+    """
+    Result for one call, with the value returned or the error raised.
+    """
+
+    index: int
+    kwargs: dict = field(repr=False)
+    value: Any = field(default=None, repr=False)
+    error: Optional[Exception] = None
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def map_calls(
+    api: Api,
+    method: str,
+    kwargs_list: Iterable[dict],
+    concurrency: int = 4,
+    ordered: bool = False,
+    retries: int = 2,
+) -> Iterator[MapResult]:
+    """
+    :param api: Api instance.
+    :param method: Name of the api method, like `get_timelines`.
+    :param kwargs_list: Keyword arguments for each call.
+    :param concurrency: Max calls running at the same time.
+    :param ordered: Yield results in the order of the arguments, default as completed.
+    :param retries: Retries for a call got 429.
+    :return: Iterator for the results.
+    """
+    func = getattr(api, method, None)
+    if method.startswith("_") or method == "map" or not callable(func):
+        raise PyTwitterError(f"Unknown api method: {method}")
+
+    def call(index: int, kwargs: dict) -> MapResult:
+        # requests from this thread reserve from the rate limit before sending.
+        api._local.gate_rate_limit = True
+        attempts = 0
+        try:
+            while True:
+                attempts += 1
+                try:
+                    value = func(**kwargs)
+                except Exception as exc:
+                    if (
+                        attempts <= retries
+                        and isinstance(exc, PyTwitterError)
+                        and _is_rate_limited(exc)
+                    ):
+                        logger.debug(f"Rate limited calling {method}, retrying")
+                        continue
+                    return MapResult(index, kwargs, error=exc, attempts=attempts)
+                return MapResult(index, kwargs, value=value, attempts=attempts)
+        finally:
+            api._local.gate_rate_limit = False
+
+    return _run(call, kwargs_list, max(concurrency, 1), ordered)
+
+
+def _run(call, kwargs_list, concurrency: int, ordered: bool) -> Iterator[MapResult]:
+    items = enumerate(kwargs_list)
+    # calls submitted but not yielded, bounded to keep the memory flat for large inputs.
+    limit = concurrency * 2
+    pending: Set[Future] = set()
+    buffer: Dict[int, MapResult] = {}
+    next_index = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(buffer) < limit:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(call, item[0], dict(item[1])))
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+            for result in sorted((f.result() for f in done), key=lambda r: r.index):
+                if not ordered:
+                    yield result
+                    continue
+                buffer[result.index] = result
+                while next_index in buffer:
+                    yield buffer.pop(next_index)
+                    next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
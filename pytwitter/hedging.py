@@ -0,0 +1,252 @@
+"""
+    Hedged requests for GET endpoints, to cut the tail latency.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.hedging import HedgePolicy
+
+    hedge = HedgePolicy(percentile=0.95, budget=0.05)
+    api = Api(bearer_token="bearer token", hedge_policy=hedge)
+    api.get_tweets(["1354143047324299264"])
+    print(hedge.stats())
+    ```
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+from requests.models import Response
+
+from pytwitter.metrics import RequestHook, RequestRecord
+from pytwitter.rate_limit import RateLimit
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy(RequestHook):
+    """
+    If no response for a GET request after the percentile of recent latencies for its endpoint,
+    send the same request again and use the response returned first.
+
+    Hedges are limited by a budget, a ratio to all requests, and only sent if the rate limit for
+    the endpoint has more than `min_remaining` requests. The slower response is discarded.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: Optional[float] = None,
+        window: int = 100,
+        min_samples: int = 20,
+        budget: float = 0.05,
+        burst: float = 10.0,
+        min_remaining: int = 10,
+        endpoints: Optional[Iterable[str]] = None,
+        max_workers: int = 16,
+    ) -> None:
+        """
+        :param percentile: Percentile of recent latencies to wait before hedging, between 0 and 1.
+        :param min_delay: Min seconds to wait before hedging.
+        :param max_delay: Max seconds to wait before hedging.
+        :param window: Count of recent latencies kept for each endpoint.
+        :param min_samples: Latencies needed for an endpoint before hedging it.
+        :param budget: Hedges allowed for each request, 0.05 is at most 5% more requests.
+        :param burst: Max hedges saved from the budget.
+        :param min_remaining: Requests to keep in the rate limit window, not used for hedges.
+        :param endpoints: Endpoint resources to hedge, like `/tweets`. Default all GET endpoints.
+        :param max_workers: Threads for sending the hedges.
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+        self.min_remaining = min_remaining
+        self.endpoints = set(endpoints) if endpoints is not None else None
+        self.max_workers = max_workers
+
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.fired: Dict[str, int] = defaultdict(int)
+        self.won: Dict[str, int] = defaultdict(int)
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self.requests = 0
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def on_response(self, record: RequestRecord) -> None:
+        if record.method != "GET" or record.stream or record.error is not None:
+            return
+        with self._lock:
+            latencies = self.latencies.get(record.endpoint)
+            if latencies is None:
+                latencies = self.latencies[record.endpoint] = deque(maxlen=self.window)
+            latencies.append(record.network_time)
+            self.requests += 1
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """
+        :param endpoint: Endpoint resource, like `/tweets`.
+        :return: Seconds to wait before hedging, None if the endpoint is not hedged.
+        """
+        if self.endpoints is not None and endpoint not in self.endpoints:
+            return None
+        with self._lock:
+            latencies = sorted(self.latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        value = latencies[
+            min(int(self.percentile * len(latencies)), len(latencies) - 1)
+        ]
+        value = max(value, self.min_delay)
+        if self.max_delay is not None:
+            value = min(value, self.max_delay)
+        return value
+
+    def _has_token(self) -> bool:
+        with self._lock:
+            return self._tokens >= 1
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _reserve(self, rate_limit: RateLimit, url: str) -> bool:
+        limit = rate_limit.get_limit(url=url)
+        if limit.limit and limit.remaining <= self.min_remaining:
+            return False
+        return rate_limit.acquire(url, block=False) == 0
+
+    @staticmethod
+    def _settle(rate_limit: RateLimit, url: str, future: Future) -> None:
+        # the discarded request does not pass the api, update the rate limit for it here.
+        if future.cancelled():
+            rate_limit.release(url, sent=False)
+        elif future.exception() is not None:
+            rate_limit.release(url)
+        else:
+            rate_limit.set_limit(url=url, headers=future.result().headers)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="pytwitter-hedge"
+                )
+            return self._executor
+
+    @staticmethod
+    def _start(request: Callable[[], Response]) -> Future:
+        future: Future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(request())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, name="pytwitter-primary", daemon=True).start()
+        return future
+
+    def send(
+        self, url: str, request: Callable[[], Response], rate_limit: RateLimit
+    ) -> Response:
+        """
+        :param url: Url for the request.
+        :param request: Callable to send the request.
+        :param rate_limit: Rate limit to reserve the hedge from.
+        :return: Response returned first.
+        """
+        endpoint = RateLimit.url_to_endpoint(url=url).resource
+        delay = self.delay(endpoint)
+        if delay is None:
+            return request()
+        if not self._has_token():
+            # no hedge can be sent, just send it in the caller thread.
+            start = time.perf_counter()
+            resp = request()
+            if time.perf_counter() - start > delay:
+                with self._lock:
+                    self.skipped[endpoint] += 1
+            return resp
+
+        # the primary starts now on its own thread, it never waits in the pool queue,
+        # a queued primary would pass the delay and be hedged for nothing.
+        primary = self._start(request)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        if not self._take_token():
+            with self._lock:
+                self.skipped[endpoint] += 1
+            return primary.result()
+        if not self._reserve(rate_limit, url):
+            with self._lock:
+                self._tokens += 1
+                self.skipped[endpoint] += 1
+            return primary.result()
+
+        logger.debug(f"No response for [{url}] in {delay:.3f}s, sending hedge")
+        hedge = self._get_executor().submit(request)
+        with self._lock:
+            self.fired[endpoint] += 1
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        first = primary if primary in done else hedge
+        if first.exception() is not None:
+            # use the other one if the first failed.
+            first = hedge if first is primary else primary
+        if first is hedge:
+            with self._lock:
+                self.won[endpoint] += 1
+            primary.add_done_callback(functools.partial(self._settle, rate_limit, url))
+        else:
+            # the hedge may still wait in the pool queue.
+            hedge.cancel()
+            hedge.add_done_callback(functools.partial(self._settle, rate_limit, url))
+        return first.result()
+
+    def stats(self) -> dict:
+        """
+        :return: Count of requests, hedges fired, won and skipped by budget or rate limit.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "fired": sum(self.fired.values()),
+                "won": sum(self.won.values()),
+                "skipped": sum(self.skipped.values()),
+                "endpoints": {
+                    endpoint: {
+                        "fired": self.fired[endpoint],
+                        "won": self.won[endpoint],
+                        "skipped": self.skipped[endpoint],
+                    }
+                    for endpoint in set(self.fired) | set(self.skipped)
+                },
+            }
+
+    def close(self) -> None:
+        """
+        Stop the threads after the running requests done.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,375 @@
+"""
+    Share one stream connection with many subscribers.
+
+    ``` python
+    from pytwitter.hub import QueueSubscriber, StreamHub
+
+    hub = StreamHub(bearer_token="bearer token")
+    cats = hub.subscribe(QueueSubscriber(tags=["cats"]))
+    hub.start()
+
+    for tweet in cats:
+        print(tweet.text)
+    ```
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+from typing import Iterable, Iterator, List, Optional, Set
+
+from pytwitter.streaming import StreamApi, iter_line_batches, tweet_from_data
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber(abc.ABC):
+    """
+    Base class for hub subscribers, subclasses implement `put`.
+    """
+
+    def __init__(self, tags: Optional[Iterable[str]] = None, raw: bool = False):
+        """
+        :param tags: Only receive tweets matching rules with these tags. None for all tweets.
+        :param raw: Receive the raw line bytes instead of parsed tweets.
+        """
+        self.tags: Optional[Set[str]] = set(tags) if tags else None
+        self.raw = raw
+        self.delivered = 0
+        self.dropped = 0
+
+    def accept(self, tags: Set[str]) -> bool:
+        return self.tags is None or not self.tags.isdisjoint(tags)
+
+    @abc.abstractmethod
+    def put(self, item) -> None:
+        """
+        Deliver one item. Called from the stream reader thread, so it should not block.
+        :param item: Raw line, Tweet obj or json data.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class QueueSubscriber(Subscriber):
+    """
+    Bounded thread-safe queue. When full, the oldest item is dropped, or the stream waits if `block`.
+    Iterate it to get items, the iteration ends after the hub stopped.
+    Closing a full queue drops the oldest item for the close signal.
+    """
+
+    def __init__(
+        self,
+        tags: Optional[Iterable[str]] = None,
+        raw: bool = False,
+        maxsize: int = 1000,
+        block: bool = False,
+    ) -> None:
+        super().__init__(tags=tags, raw=raw)
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.block = block
+        self._closed = object()
+
+    def _put_nowait(self, item) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def put(self, item) -> None:
+        if self.block:
+            self.queue.put(item)
+        else:
+            self._put_nowait(item)
+        self.delivered += 1
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        :param timeout: Seconds to wait, raise `queue.Empty` if no item.
+        :return: Item, None if the hub stopped.
+        """
+        item = self.queue.get(timeout=timeout)
+        return None if item is self._closed else item
+
+    def close(self) -> None:
+        self._put_nowait(self._closed)
+
+    def __iter__(self) -> Iterator:
+        while True:
+            item = self.queue.get()
+            if item is self._closed:
+                return
+            yield item
+
+
+class AsyncioSubscriber(Subscriber):
+    """
+    Bounded asyncio queue, items are put in the thread of the event loop.
+    Create it in the event loop, or provide the loop.
+    """
+
+    def __init__(
+        self,
+        tags: Optional[Iterable[str]] = None,
+        raw: bool = False,
+        maxsize: int = 1000,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        super().__init__(tags=tags, raw=raw)
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._closed = object()
+
+    def _put(self, item) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+        if item is not self._closed:
+            self.delivered += 1
+
+    def put(self, item) -> None:
+        # counted when put in the queue by the event loop.
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # the event loop is closed.
+            self.dropped += 1
+
+    async def get(self):
+        """
+        :return: Item, None if the hub stopped.
+        """
+        item = await self.queue.get()
+        return None if item is self._closed else item
+
+    def close(self) -> None:
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, self._closed)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.queue.get()
+        if item is self._closed:
+            raise StopAsyncIteration
+        return item
+
+
+class _SocketClient:
+    def __init__(self, conn: socket.socket, maxsize: int) -> None:
+        self.conn = conn
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.alive = True
+        self.thread = threading.Thread(target=self._send, daemon=True)
+        self.thread.start()
+
+    def _send(self) -> None:
+        try:
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    break
+                self.conn.sendall(line + b"\r\n")
+        except OSError:
+            pass
+        finally:
+            self.alive = False
+            self.conn.close()
+
+
+class SocketSubscriber(Subscriber):
+    """
+    Serve the raw lines on a Unix socket for consumers in other processes,
+    read them with `iter_socket_lines`. Each connected consumer has a bounded buffer,
+    when full the line is dropped for the consumer.
+    """
+
+    def __init__(
+        self, path: str, tags: Optional[Iterable[str]] = None, maxsize: int = 10000
+    ) -> None:
+        super().__init__(tags=tags, raw=True)
+        self.path = path
+        self.maxsize = maxsize
+        self.clients: List[_SocketClient] = []
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            with self._lock:
+                self.clients.append(_SocketClient(conn, self.maxsize))
+
+    def put(self, item) -> None:
+        with self._lock:
+            self.clients = [client for client in self.clients if client.alive]
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.queue.put_nowait(item)
+                self.delivered += 1
+            except queue.Full:
+                self.dropped += 1
+
+    def close(self) -> None:
+        self._server.close()
+        with self._lock:
+            for client in self.clients:
+                try:
+                    client.queue.put_nowait(None)
+                except queue.Full:
+                    client.conn.close()
+            self.clients = []
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def iter_socket_lines(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Read raw stream lines from a `SocketSubscriber`.
+    :param path: Path for the Unix socket.
+    :param chunk_size: Max chunk size for read data.
+    :return: Raw lines.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        chunks = iter(lambda: conn.recv(chunk_size), b"")
+        for lines in iter_line_batches(chunks):
+            yield from lines
+
+
+class StreamHub(StreamApi):
+    """
+    Own the stream connection and fan out the tweets to subscribers.
+    Each line is decoded once, parsed tweets are shared by subscribers.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        :param kwargs: Arguments for `StreamApi`. Batch mode is not used by the hub.
+        """
+        super().__init__(**kwargs)
+        self.subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, subscriber: Subscriber) -> Subscriber:
+        """
+        :param subscriber: Subscriber instance.
+        :return: The subscriber
+        """
+        with self._lock:
+            self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if s is not subscriber]
+        subscriber.close()
+
+    def on_lines(self, lines, return_json=False):
+        for line in lines:
+            if line:
+                self.on_data(raw_data=line, return_json=return_json)
+            else:
+                self.on_keep_alive()
+
+    def on_data(self, raw_data, return_json=False):
+        return self.deliver(
+            data=json.loads(raw_data), return_json=return_json, raw_data=raw_data
+        )
+
+    def deliver(
+        self,
+        data: dict,
+        return_json: Optional[bool] = None,
+        raw_data: Optional[bytes] = None,
+    ):
+        """
+        Fan out a decoded stream line to the subscribers, skip it if seen by `dedup`.
+        :param data: Stream line data, with `data` and `matching_rules`.
+        :param return_json: Type for returned data. Default is same as the running stream.
+        :param raw_data: Raw line for raw subscribers. Default is encoded from the data.
+        :return:
+        """
+        if not self._admit(data):
+            return None
+        if return_json is None:
+            return_json = self._return_json
+        tags = {rule.get("tag") for rule in data.get("matching_rules", ())}
+        parsed = None
+        for subscriber in self.subscribers:
+            if not subscriber.accept(tags):
+                continue
+            if subscriber.raw:
+                if raw_data is None:
+                    raw_data = json.dumps(data).encode("utf-8")
+                item = raw_data
+            else:
+                if parsed is None:
+                    parsed = data if return_json else tweet_from_data(data)
+                item = parsed
+            try:
+                subscriber.put(item)
+            except Exception as exc:
+                logger.exception(f"Exception in subscriber {subscriber}, exc: {exc}")
+
+    def start(self, sample: bool = False, **kwargs) -> threading.Thread:
+        """
+        Run the stream in a background thread.
+        :param sample: Use the sampled stream instead of filtered stream.
+        :param kwargs: Arguments for `search_stream` or `sample_stream`.
+        :return: The thread
+        """
+        target = self.sample_stream if sample else self.search_stream
+
+        def run():
+            try:
+                target(**kwargs)
+            finally:
+                self.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Disconnect the stream, and wait for the thread to exit.
+        """
+        self.disconnect()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def close(self) -> None:
+        """
+        Close all subscribers, iterations on them will end.
+        """
+        with self._lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
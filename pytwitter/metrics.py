@@ -0,0 +1,729 @@
+"""
+    Request instrumentation hooks and metrics.
+
+    Hooks get a `RequestRecord` for each call to twitter api, like:
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.metrics import LatencyHistogram, PrometheusExporter
+
+    histogram = LatencyHistogram()
+    api = Api(bearer_token="bearer token", hooks=[histogram])
+    api.get_tweet("1354143047324299264")
+    print(PrometheusExporter(histogram).render())
+    ```
+"""
+
+import bisect
+import calendar
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pytwitter.error import PyTwitterError
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+PHASES = ("network", "decode", "build", "total")
+
+# endpoints returning tweets, which count against the project usage cap.
+TWEET_ENDPOINTS = frozenset(
+    (
+        "/tweets",
+        "/tweets/:id",
+        "/tweets/:id/quote_tweets",
+        "/tweets/:id/retweets",
+        "/tweets/search/recent",
+        "/tweets/search/all",
+        "/users/:id/tweets",
+        "/users/:id/mentions",
+        "/users/:id/timelines/reverse_chronological",
+        "/users/:id/liked_tweets",
+        "/users/:id/bookmarks",
+        "/lists/:id/tweets",
+        "/spaces/:id/tweets",
+    )
+)
+
+
+@dataclass
+class RequestRecord:
+    """
+    A class representing the record for one api call.
+
+    Times are in seconds. For streams, one record covers one connection,
+    `network_time` is the time to get the response headers.
+    """
+
+    endpoint: str
+    method: str = "GET"
+    url: Optional[str] = field(default=None, repr=False)
+    params: Optional[dict] = field(default=None, repr=False)
+    status_code: Optional[int] = field(default=None)
+    bytes: int = field(default=0)
+    network_time: float = field(default=0.0)
+    decode_time: float = field(default=0.0)
+    build_time: float = field(default=0.0)
+    wait_time: float = field(default=0.0, repr=False)
+    retries: int = field(default=0, repr=False)
+    rate_limit_remaining: Optional[int] = field(default=None, repr=False)
+    result_count: Optional[int] = field(default=None, repr=False)
+    error: Optional[str] = field(default=None, repr=False)
+    stream: bool = field(default=False, repr=False)
+    lines: int = field(default=0, repr=False)
+    started_at: float = field(default_factory=time.time, repr=False)
+
+    @property
+    def latency(self) -> float:
+        return self.network_time + self.decode_time + self.build_time
+
+
+class StreamStats:
+    """
+    Health stats for a stream, for alerting.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.last_activity = self.started_at
+        self.lines = 0
+        self.bytes = 0
+        self.tweets = 0
+        self.keep_alives = 0
+        self.connections = 0
+        self.reconnects = 0
+        self.stalls = 0
+        # created time for the last tweet and the time it received, lag is parsed when read.
+        self._last_tweet: Optional[Tuple[str, float]] = None
+        self._last_snapshot = (self.started_at, 0, 0)
+        self._lock = threading.Lock()
+
+    def on_lines(self, lines: List[bytes]) -> None:
+        size = 0
+        for line in lines:
+            size += len(line)
+            if not line:
+                self.keep_alives += 1
+        with self._lock:
+            self.lines += len(lines)
+            self.bytes += size
+            self.last_activity = time.monotonic()
+
+    def on_connect(self) -> None:
+        with self._lock:
+            if self.connections:
+                self.reconnects += 1
+            self.connections += 1
+            self.last_activity = time.monotonic()
+
+    def on_tweet(self, created_at: Optional[str]) -> None:
+        """
+        :param created_at: Created time for the tweet, like `2021-02-03T04:05:06.000Z`.
+        """
+        with self._lock:
+            self.tweets += 1
+            if created_at:
+                self._last_tweet = (created_at, time.time())
+
+    @property
+    def lag(self) -> Optional[float]:
+        """
+        Seconds from the last tweet created to received.
+        """
+        last = self._last_tweet
+        if last is None:
+            return None
+        created_at, received_at = last
+        try:
+            created = datetime.strptime(created_at[:19], "%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            return None
+        return received_at - created.replace(tzinfo=timezone.utc).timestamp()
+
+    @property
+    def silence(self) -> float:
+        """
+        Seconds since the last line or keep alive signal.
+        """
+        return time.monotonic() - self.last_activity
+
+    def snapshot(self) -> dict:
+        """
+        Stats with the rates since the last snapshot.
+        :return: dict
+        """
+        now = time.monotonic()
+        with self._lock:
+            last_at, last_lines, last_bytes = self._last_snapshot
+            elapsed = max(now - last_at, 1e-9)
+            result = {
+                "lines": self.lines,
+                "bytes": self.bytes,
+                "tweets": self.tweets,
+                "keep_alives": self.keep_alives,
+                "reconnects": self.reconnects,
+                "stalls": self.stalls,
+                "lines_per_second": (self.lines - last_lines) / elapsed,
+                "bytes_per_second": (self.bytes - last_bytes) / elapsed,
+                "silence": now - self.last_activity,
+                "lag": self.lag,
+            }
+            self._last_snapshot = (now, self.lines, self.bytes)
+        return result
+
+
+class RequestHook:
+    """
+    Base class for hooks. Plain callables are also accepted as hooks, they will be
+    called like `on_response`.
+    """
+
+    def on_request(self, record: RequestRecord) -> None:
+        """
+        Called before the request is sent. Raise an error here will abort the request.
+        :param record: Record with endpoint, method, url and params.
+        """
+
+    def on_response(self, record: RequestRecord) -> None:
+        """
+        Called after the response processed.
+        :param record: Record for the request.
+        """
+
+    def on_build(self, record: RequestRecord, response) -> None:
+        """
+        Called after the response objects built, not for `return_json`.
+        :param record: Record for the request.
+        :param response: The `Response` returned to the caller.
+        """
+
+
+Hook = Union[RequestHook, Callable[[RequestRecord], None]]
+
+
+def dispatch(hooks: Iterable[Hook], event: str, record: RequestRecord, *args) -> None:
+    """
+    Call the event for all hooks.
+    Errors from `on_request` will raise, errors from other events only be logged.
+
+    :param hooks: Hooks to call.
+    :param event: on_request, on_build or on_response.
+    :param record: Record for the request.
+    :param args: Other arguments for the event.
+    """
+    for hook in hooks:
+        func = getattr(hook, event, None)
+        if func is None:
+            if event != "on_response" or not callable(hook):
+                continue
+            func = hook
+        if event == "on_request":
+            func(record)
+            continue
+        try:
+            func(record, *args)
+        except Exception as exc:
+            logger.exception(f"Exception in hook {hook}, exc: {exc}")
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last one for +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimate the percentile by linear interpolation in the bucket.
+        :param q: Percentile between 0 and 1.
+        :return: Estimated value, None if not observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                if idx >= len(self.buckets):
+                    return lower
+                upper = self.buckets[idx]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """
+        :return: Pairs of upper bound and cumulative count, the last one is +Inf.
+        """
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class LatencyHistogram(RequestHook):
+    """
+    Collect latency histograms for each endpoint, method and phase.
+    Phases are network, decode (json parse), build (model build) and total.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.retries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.rate_limit_remaining: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def on_response(self, record: RequestRecord) -> None:
+        key = (record.endpoint, record.method)
+        values = (
+            record.network_time,
+            record.decode_time,
+            record.build_time,
+            record.latency,
+        )
+        with self._lock:
+            for phase, value in zip(PHASES, values):
+                histogram = self.histograms.get(key + (phase,))
+                if histogram is None:
+                    histogram = Histogram(self.buckets)
+                    self.histograms[key + (phase,)] = histogram
+                histogram.observe(value)
+            status = str(record.status_code) if record.status_code else "error"
+            self.requests[key + (status,)] += 1
+            self.bytes[key] += record.bytes
+            self.retries[key] += record.retries
+            if record.rate_limit_remaining is not None:
+                self.rate_limit_remaining[key] = record.rate_limit_remaining
+
+    def get(
+        self, endpoint: str, method: str = "GET", phase: str = "total"
+    ) -> Optional[Histogram]:
+        """
+        :param endpoint: Endpoint resource, like `/tweets/:id`.
+        :param method: HTTP Method.
+        :param phase: One of network, decode, build and total.
+        :return: Histogram if observed.
+        """
+        return self.histograms.get((endpoint, method.upper(), phase))
+
+    def percentile(
+        self, endpoint: str, q: float, method: str = "GET", phase: str = "total"
+    ) -> Optional[float]:
+        histogram = self.get(endpoint=endpoint, method=method, phase=phase)
+        return histogram.percentile(q) if histogram is not None else None
+
+    def summary(self) -> List[dict]:
+        """
+        Latency summary for endpoints, which spent most time first.
+        :return: List of dict
+        """
+        result = []
+        with self._lock:
+            for (endpoint, method, phase), histogram in self.histograms.items():
+                if phase != "total":
+                    continue
+                phases = {
+                    p: self.histograms[(endpoint, method, p)].sum for p in PHASES[:3]
+                }
+                result.append(
+                    {
+                        "endpoint": endpoint,
+                        "method": method,
+                        "count": histogram.count,
+                        "total_time": histogram.sum,
+                        "p50": histogram.percentile(0.5),
+                        "p99": histogram.percentile(0.99),
+                        "bytes": self.bytes[(endpoint, method)],
+                        **{f"{p}_time": v for p, v in phases.items()},
+                    }
+                )
+        return sorted(result, key=lambda item: item["total_time"], reverse=True)
+
+
+def _next_reset(now: datetime, day: int) -> datetime:
+    """
+    :return: Next time for the usage cap reset at the day of month.
+    """
+    year, month = now.year, now.month
+    for _ in range(2):
+        reset_day = min(day, calendar.monthrange(year, month)[1])
+        reset = datetime(year, month, reset_day, tzinfo=timezone.utc)
+        if reset > now:
+            return reset
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return reset
+
+
+class UsageMeter(RequestHook):
+    """
+    Count tweets returned by requests against the project usage cap, and enforce budgets.
+
+    Before a request to an endpoint returning tweets, the count with the expected results
+    (`max_results`) is checked against the job budget, the daily budget (UTC day) and the project cap.
+    If over, the request is aborted by `PyTwitterError`, or with `throttle` it waits for the next day
+    when only the daily budget is over.
+
+    With an `api` which can get usage (App-only auth), the project cap and usage are fetched
+    every `reconcile_interval` seconds, tweets counted since then are added to the reconciled usage.
+    """
+
+    def __init__(
+        self,
+        job_budget: Optional[int] = None,
+        daily_budget: Optional[int] = None,
+        throttle: bool = False,
+        api: Optional["Api"] = None,
+        reconcile_interval: Optional[float] = 900.0,
+    ) -> None:
+        """
+        :param job_budget: Max tweets for the meter. None for no limit.
+        :param daily_budget: Max tweets for a UTC day. Reconciled usage for today is included.
+        :param throttle: Wait for the next day instead of abort when the daily budget is over.
+        :param api: Api instance to get usage by `get_usage_tweets`.
+        :param reconcile_interval: Seconds between fetch usage. None for only by `reconcile`.
+        """
+        self.job_budget = job_budget
+        self.daily_budget = daily_budget
+        self.throttle = throttle
+        self.api = api
+        self.reconcile_interval = reconcile_interval
+        self.tweets = 0
+        self.endpoints: Dict[str, int] = defaultdict(int)
+        self.daily: Dict[str, int] = defaultdict(int)
+        self.project_cap: Optional[int] = None
+        self.project_usage: Optional[int] = None
+        self.cap_reset_day: Optional[int] = None
+        self.reconciled_at: Optional[float] = None
+        self.started_at = time.time()
+        self._since_reconcile = 0
+        # expected tweets for requests sent but not responded, by the id of the record.
+        self._reserved: Dict[int, int] = {}
+        self._reserved_total = 0
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def add(self, count: int, endpoint: str = "other") -> None:
+        """
+        Count tweets not got by `Api`, like from streams.
+        :param count: Count of tweets.
+        :param endpoint: Endpoint for the tweets.
+        """
+        with self._lock:
+            self._count(count, endpoint)
+
+    def _count(self, count: int, endpoint: str) -> None:
+        self.tweets += count
+        self.endpoints[endpoint] += count
+        self.daily[self._today()] += count
+        self._since_reconcile += count
+
+    @property
+    def estimated_usage(self) -> Optional[int]:
+        """
+        Project usage from the last reconcile, and tweets counted since then.
+        """
+        if self.project_usage is None:
+            return None
+        return self.project_usage + self._since_reconcile
+
+    def reconcile(self) -> None:
+        """
+        Fetch the project usage by `api`.
+        """
+        if self.api is None:
+            raise PyTwitterError("UsageMeter need an api to reconcile usage")
+        resp = self.api.get_usage_tweets(
+            usage_fields=[
+                "cap_reset_day",
+                "project_cap",
+                "project_usage",
+                "daily_project_usage",
+            ],
+            return_json=True,
+        )
+        data = resp.get("data", {})
+        today = self._today()
+        daily = (data.get("daily_project_usage") or {}).get("usage") or []
+        today_usage = [
+            int(item["usage"])
+            for item in daily
+            if item.get("date", "").startswith(today)
+        ]
+        with self._lock:
+            if data.get("project_cap") is not None:
+                self.project_cap = int(data["project_cap"])
+            if data.get("project_usage") is not None:
+                self.project_usage = int(data["project_usage"])
+            self.cap_reset_day = data.get("cap_reset_day", self.cap_reset_day)
+            if today_usage:
+                self.daily[today] = max(self.daily[today], today_usage[0])
+            self._since_reconcile = 0
+            self.reconciled_at = time.time()
+
+    def _maybe_reconcile(self) -> None:
+        if self.api is None or self.reconcile_interval is None:
+            return
+        if (
+            self.reconciled_at is not None
+            and time.time() - self.reconciled_at < self.reconcile_interval
+        ):
+            return
+        if not self._reconcile_lock.acquire(blocking=False):
+            return
+        try:
+            self.reconcile()
+        except Exception as exc:
+            logger.warning(f"Failed to reconcile usage, exc: {exc}")
+            # not retry for each request.
+            self.reconciled_at = time.time()
+        finally:
+            self._reconcile_lock.release()
+
+    def on_request(self, record: RequestRecord) -> None:
+        if record.method != "GET" or record.endpoint not in TWEET_ENDPOINTS:
+            return
+        self._maybe_reconcile()
+        expected = max(int((record.params or {}).get("max_results") or 0), 1)
+        while True:
+            with self._lock:
+                # check and reserve together, so concurrent requests can not pass the budgets.
+                used = self.tweets + self._reserved_total
+                if self.job_budget is not None and used + expected > self.job_budget:
+                    raise PyTwitterError(
+                        f"Job budget exceeded, used {used} of {self.job_budget} tweets"
+                    )
+                # no cap check until the project usage is known.
+                if self.project_cap is not None and self.project_usage is not None:
+                    usage = (
+                        self.project_usage
+                        + self._since_reconcile
+                        + self._reserved_total
+                    )
+                    if usage + expected > self.project_cap:
+                        raise PyTwitterError(
+                            f"Project cap exceeded, used {usage} of {self.project_cap} tweets"
+                        )
+                daily = self.daily[self._today()] + self._reserved_total
+                if self.daily_budget is None or daily + expected <= self.daily_budget:
+                    self._reserved[id(record)] = expected
+                    self._reserved_total += expected
+                    return
+                if not self.throttle:
+                    raise PyTwitterError(
+                        f"Daily budget exceeded, used {daily} "
+                        f"of {self.daily_budget} tweets"
+                    )
+            now = datetime.now(timezone.utc)
+            tomorrow = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+            wait = (tomorrow + timedelta(days=1) - now).total_seconds() + 1.0
+            logger.debug(f"Daily budget exceeded, sleeping for [{wait}]")
+            time.sleep(wait)
+            record.wait_time += wait
+
+    def on_response(self, record: RequestRecord) -> None:
+        if record.method != "GET" or record.endpoint not in TWEET_ENDPOINTS:
+            return
+        with self._lock:
+            self._reserved_total -= self._reserved.pop(id(record), 0)
+            if record.result_count:
+                self._count(record.result_count, record.endpoint)
+
+    def projection(self) -> dict:
+        """
+        Project the cap exhaustion by the tweets rate of the meter.
+        :return: Dict with the tweets rate per hour, estimated usage, remaining tweets before the cap,
+            the time the cap will be exhausted, the time the cap resets, and whether the cap will be
+            exhausted before the reset.
+        """
+        now = time.time()
+        rate = self.tweets / max(now - self.started_at, 1e-9) * 3600
+        usage = self.estimated_usage
+        result = {
+            "tweets": self.tweets,
+            "rate_per_hour": rate,
+            "project_cap": self.project_cap,
+            "project_usage": usage,
+            "remaining": None,
+            "exhausted_at": None,
+            "reset_at": None,
+            "exhausted_before_reset": False,
+        }
+        if self.cap_reset_day:
+            result["reset_at"] = _next_reset(
+                datetime.fromtimestamp(now, timezone.utc), self.cap_reset_day
+            )
+        if self.project_cap is not None and usage is not None:
+            remaining = max(self.project_cap - usage, 0)
+            result["remaining"] = remaining
+            if rate > 0:
+                result["exhausted_at"] = datetime.fromtimestamp(
+                    now + remaining / rate * 3600, timezone.utc
+                )
+                result["exhausted_before_reset"] = (
+                    result["reset_at"] is not None
+                    and result["exhausted_at"] < result["reset_at"]
+                )
+        return result
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+class PrometheusExporter:
+    """
+    Render the metrics in LatencyHistogram with Prometheus text format.
+    """
+
+    def __init__(self, histogram: LatencyHistogram, namespace: str = "pytwitter"):
+        self.histogram = histogram
+        self.namespace = namespace
+
+    def render(self) -> str:
+        ns, source = self.namespace, self.histogram
+        lines = [
+            f"# HELP {ns}_request_duration_seconds Request latency by phase.",
+            f"# TYPE {ns}_request_duration_seconds histogram",
+        ]
+        with source._lock:
+            for (endpoint, method, phase), histogram in sorted(
+                source.histograms.items()
+            ):
+                labels = _labels(endpoint=endpoint, method=method, phase=phase)
+                for bound, count in histogram.cumulative_counts():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'{ns}_request_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+                    )
+                lines.append(
+                    f"{ns}_request_duration_seconds_sum{{{labels}}} {histogram.sum}"
+                )
+                lines.append(
+                    f"{ns}_request_duration_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines += [
+                f"# HELP {ns}_requests_total Requests by status code.",
+                f"# TYPE {ns}_requests_total counter",
+            ]
+            for (endpoint, method, status), count in sorted(source.requests.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=status)
+                lines.append(f"{ns}_requests_total{{{labels}}} {count}")
+
+            lines += [
+                f"# HELP {ns}_response_bytes_total Response body size.",
+                f"# TYPE {ns}_response_bytes_total counter",
+            ]
+            for (endpoint, method), count in sorted(source.bytes.items()):
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f"{ns}_response_bytes_total{{{labels}}} {count}")
+
+            lines += [
+                f"# HELP {ns}_retries_total Retries for requests.",
+                f"# TYPE {ns}_retries_total counter",
+            ]
+            for (endpoint, method), count in sorted(source.retries.items()):
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f"{ns}_retries_total{{{labels}}} {count}")
+
+            lines += [
+                f"# HELP {ns}_rate_limit_remaining Remaining requests in the rate limit window.",
+                f"# TYPE {ns}_rate_limit_remaining gauge",
+            ]
+            for (endpoint, method), value in sorted(
+                source.rate_limit_remaining.items()
+            ):
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f"{ns}_rate_limit_remaining{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook(RequestHook):
+    """
+    Report records to OpenTelemetry metrics.
+    Need package `opentelemetry-api`, or provide your meter.
+    """
+
+    def __init__(self, meter=None) -> None:
+        """
+        :param meter: OpenTelemetry meter. If not provide, use meter named `pytwitter`.
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics as otel_metrics
+            except ImportError:
+                raise PyTwitterError(
+                    "OpenTelemetryHook need package opentelemetry-api, "
+                    "install with `pip install python-twitter-v2[opentelemetry]`"
+                )
+            meter = otel_metrics.get_meter("pytwitter")
+
+        self.duration = meter.create_histogram(
+            name="pytwitter.request.duration",
+            unit="s",
+            description="Request latency by phase.",
+        )
+        self.size = meter.create_counter(
+            name="pytwitter.response.size",
+            unit="By",
+            description="Response body size.",
+        )
+
+    def on_response(self, record: RequestRecord) -> None:
+        attributes = {
+            "endpoint": record.endpoint,
+            "method": record.method,
+            "status_code": record.status_code or 0,
+        }
+        values = (
+            record.network_time,
+            record.decode_time,
+            record.build_time,
+            record.latency,
+        )
+        for phase, value in zip(PHASES, values):
+            self.duration.record(value, attributes={**attributes, "phase": phase})
+        self.size.add(record.bytes, attributes=attributes)
@@ -1,14 +1,96 @@
-from .user import *  # noqa
-from .tweet import *  # noqa
-from .media import *  # noqa
-from .media_upload import *  # noqa
-from .poll import *  # noqa
-from .place import *  # noqa
-from .compliance import *  # noqa
-from .space import *  # noqa
-from .list import *  # noqa
-from .stream import *  # noqa
-from .trend import *  # noqa
-from .dm_event import *  # noqa
-from .usage import *  # noqa
-from .ext import *  # noqa
+"""
+    Data models. Submodules are imported at the first access of their names,
+    so only the models you use are loaded.
+"""
+
+import importlib
+
+# model name -> submodule
+_MODELS = {
+    "BaseModel": "base",
+    "ComplianceJob": "compliance",
+    "DMEAttachments": "dm_event",
+    "DMEReferencedTweet": "dm_event",
+    "DirectMessageCreateResponse": "dm_event",
+    "DirectMessageEvent": "dm_event",
+    "Error": "ext",
+    "Includes": "ext",
+    "Meta": "ext",
+    "MetaSummary": "ext",
+    "Response": "ext",
+    "TweetCount": "ext",
+    "TwitterList": "list",
+    "Media": "media",
+    "MediaNonPublicMetrics": "media",
+    "MediaOrganicMetrics": "media",
+    "MediaPromotedMetrics": "media",
+    "MediaPublicMetrics": "media",
+    "MediaVariant": "media",
+    "MediaUpload": "media_upload",
+    "MediaUploadImage": "media_upload",
+    "MediaUploadResponse": "media_upload",
+    "MediaUploadResponseImage": "media_upload",
+    "MediaUploadResponseProcessingInfo": "media_upload",
+    "MediaUploadResponseProcessingInfoError": "media_upload",
+    "MediaUploadResponseVideo": "media_upload",
+    "MediaUploadVideo": "media_upload",
+    "Place": "place",
+    "PlaceGeo": "place",
+    "PlaceGeoProperties": "place",
+    "Poll": "poll",
+    "PollOption": "poll",
+    "Space": "space",
+    "Topic": "space",
+    "StreamRule": "stream",
+    "Trend": "trend",
+    "Tweet": "tweet",
+    "TweetAttachments": "tweet",
+    "TweetContextAnnotation": "tweet",
+    "TweetContextAnnotationDomain": "tweet",
+    "TweetContextAnnotationEntity": "tweet",
+    "TweetEditControls": "tweet",
+    "TweetEntities": "tweet",
+    "TweetEntitiesAnnotation": "tweet",
+    "TweetEntitiesCashtag": "tweet",
+    "TweetEntitiesHashtag": "tweet",
+    "TweetEntitiesMention": "tweet",
+    "TweetEntitiesUrl": "tweet",
+    "TweetGeo": "tweet",
+    "TweetGeoCoordinates": "tweet",
+    "TweetNonPublicMetrics": "tweet",
+    "TweetNoteTweet": "tweet",
+    "TweetOrganicMetrics": "tweet",
+    "TweetPromotedMetrics": "tweet",
+    "TweetPublicMetrics": "tweet",
+    "TweetReferencedTweet": "tweet",
+    "TweetWithheld": "tweet",
+    "DailyClientAppUsage": "usage",
+    "DailyProjectUsage": "usage",
+    "Usage": "usage",
+    "UsageUsage": "usage",
+    "PublicMetrics": "user",
+    "User": "user",
+    "UserAffiliation": "user",
+    "UserEntities": "user",
+    "UserEntitiesDescription": "user",
+    "UserEntitiesHashtag": "user",
+    "UserEntitiesMention": "user",
+    "UserEntitiesUrl": "user",
+    "UserEntitiesUrlObj": "user",
+    "UserWithheld": "user",
+}
+
+__all__ = list(_MODELS)
+
+
+def __getattr__(name):
+    module = _MODELS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODELS))
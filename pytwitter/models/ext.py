@@ -5,7 +5,7 @@
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from . import (
     BaseModel,
@@ -84,6 +84,49 @@ class Includes(BaseModel):
     users: Optional[List[User]] = field(default=None, compare=False)
     topics: Optional[List[Topic]] = field(default=None, compare=False)
 
+    # key field for each expansion list, used to build lookup indexes.
+    _index_keys = {
+        "media": "media_key",
+        "places": "id",
+        "polls": "id",
+        "tweets": "id",
+        "users": "id",
+        "topics": "id",
+    }
+
+    def _get_index(self, name: str) -> Dict[str, BaseModel]:
+        """
+        Get the lookup dict for an expansion list, built at the first access.
+        Note: index will not refresh if you change the list after first lookup.
+        :param name: Name for the expansion list, like users, tweets.
+        :return: Dict mapping key to the object.
+        """
+        indexes = self.__dict__.setdefault("_indexes", {})
+        index = indexes.get(name)
+        if index is None:
+            key = self._index_keys[name]
+            index = {getattr(item, key): item for item in getattr(self, name) or []}
+            indexes[name] = index
+        return index
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._get_index("users").get(user_id)
+
+    def get_tweet(self, tweet_id: str) -> Optional[Tweet]:
+        return self._get_index("tweets").get(tweet_id)
+
+    def get_media(self, media_key: str) -> Optional[Media]:
+        return self._get_index("media").get(media_key)
+
+    def get_place(self, place_id: str) -> Optional[Place]:
+        return self._get_index("places").get(place_id)
+
+    def get_poll(self, poll_id: str) -> Optional[Poll]:
+        return self._get_index("polls").get(poll_id)
+
+    def get_topic(self, topic_id: str) -> Optional[Topic]:
+        return self._get_index("topics").get(topic_id)
+
 
 @dataclass
 class TweetCount(BaseModel):
@@ -136,3 +179,39 @@ class Response:
     errors: Optional[List[Error]] = field(default=None, repr=False)
     # inline field to keep origin response json data
     _json: Optional[dict] = field(default=None, repr=False)
+
+    def author_of(self, tweet: Tweet) -> Optional[User]:
+        """
+        Get the author for tweet from includes. Need expansion `author_id`.
+        :param tweet: Tweet object.
+        :return: User object or None if not expanded.
+        """
+        if self.includes is None or tweet.author_id is None:
+            return None
+        return self.includes.get_user(tweet.author_id)
+
+    def media_of(self, tweet: Tweet) -> List[Media]:
+        """
+        Get the media attached to tweet from includes. Need expansion `attachments.media_keys`.
+        :param tweet: Tweet object.
+        :return: List of Media objects, keys not expanded are skipped.
+        """
+        if (
+            self.includes is None
+            or tweet.attachments is None
+            or not tweet.attachments.media_keys
+        ):
+            return []
+        media = (self.includes.get_media(key) for key in tweet.attachments.media_keys)
+        return [item for item in media if item is not None]
+
+    def referenced(self, tweet: Tweet) -> List[Tweet]:
+        """
+        Get the tweets referenced by tweet from includes. Need expansion `referenced_tweets.id`.
+        :param tweet: Tweet object.
+        :return: List of Tweet objects, tweets not expanded are skipped.
+        """
+        if self.includes is None or not tweet.referenced_tweets:
+            return []
+        tweets = (self.includes.get_tweet(ref.id) for ref in tweet.referenced_tweets)
+        return [item for item in tweets if item is not None]
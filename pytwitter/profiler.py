@@ -0,0 +1,406 @@
+"""
+    Profile the fields code reads on returned objects, to request only the needed fields.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.profiler import FieldProfiler
+
+    profiler = FieldProfiler()
+    api = Api(bearer_token="bearer token", hooks=[profiler])
+    resp = api.get_tweets(
+        ["1354143047324299264"],
+        tweet_fields=["created_at", "lang", "public_metrics"],
+        expansions="author_id",
+        user_fields=["created_at", "description"],
+    )
+    print(resp.data[0].lang, resp.includes.users[0].description)
+
+    for usage in profiler.report():
+        print(usage.endpoint, usage.call_site, usage.kwargs())
+    ```
+"""
+
+import copy
+import dataclasses
+import os
+import pickle
+import reprlib
+import sys
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import dataclasses_json
+
+import pytwitter.models as md
+from pytwitter.metrics import RequestHook, RequestRecord
+
+# fields always returned by twitter, no need to request.
+DEFAULT_FIELDS = {
+    "tweet.fields": {"id", "text", "edit_history_tweet_ids"},
+    "user.fields": {"id", "name", "username"},
+    "media.fields": {"media_key", "type"},
+    "place.fields": {"id", "full_name"},
+    "poll.fields": {"id", "options"},
+    "space.fields": {"id", "state"},
+    "list.fields": {"id", "name"},
+}
+
+MODEL_PARAMS = {
+    md.Tweet: "tweet.fields",
+    md.User: "user.fields",
+    md.Media: "media.fields",
+    md.Place: "place.fields",
+    md.Poll: "poll.fields",
+    md.Space: "space.fields",
+    md.TwitterList: "list.fields",
+}
+
+INCLUDES_PARAMS = {
+    "tweets": "tweet.fields",
+    "users": "user.fields",
+    "media": "media.fields",
+    "places": "place.fields",
+    "polls": "poll.fields",
+}
+
+# expansion: (includes name, source of the references, path for references, key on the object)
+EXPANSIONS = {
+    "author_id": ("users", "data", "author_id", "id"),
+    "in_reply_to_user_id": ("users", "data", "in_reply_to_user_id", "id"),
+    "entities.mentions.username": (
+        "users",
+        "data",
+        "entities.mentions.username",
+        "username",
+    ),
+    "referenced_tweets.id": ("tweets", "data", "referenced_tweets.id", "id"),
+    "referenced_tweets.id.author_id": ("users", "tweets", "author_id", "id"),
+    "edit_history_tweet_ids": ("tweets", "data", "edit_history_tweet_ids", "id"),
+    "attachments.media_keys": (
+        "media",
+        "data",
+        "attachments.media_keys",
+        "media_key",
+    ),
+    "attachments.poll_ids": ("polls", "data", "attachments.poll_ids", "id"),
+    "geo.place_id": ("places", "data", "geo.place_id", "id"),
+    "pinned_tweet_id": ("tweets", "data", "pinned_tweet_id", "id"),
+    "creator_id": ("users", "data", "creator_id", "id"),
+    "host_ids": ("users", "data", "host_ids", "id"),
+    "invited_user_ids": ("users", "data", "invited_user_ids", "id"),
+    "speaker_ids": ("users", "data", "speaker_ids", "id"),
+    "owner_id": ("users", "data", "owner_id", "id"),
+    "sender_id": ("users", "data", "sender_id", "id"),
+    "participant_ids": ("users", "data", "participant_ids", "id"),
+}
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _call_site() -> str:
+    """
+    :return: The first frame outside the package, like `app.py:12 in main`.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame = frame.f_back
+    if frame is None:
+        return "<unknown>"
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def _values(obj, keys: List[str]) -> Iterable[str]:
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _values(item, keys)
+    elif not keys:
+        if obj is not None:
+            yield str(obj)
+    elif isinstance(obj, dict):
+        yield from _values(obj.get(keys[0]), keys[1:])
+
+
+def _split(value) -> Set[str]:
+    if not value:
+        return set()
+    return {v.strip() for v in str(value).split(",") if v.strip()}
+
+
+class _Usage:
+    """
+    Collect the attributes read on one object for a call.
+    """
+
+    __slots__ = ("fields", "expansions", "via")
+
+    def __init__(
+        self, fields: Set[str], expansions: Set[str], via: Tuple[str, ...] = ()
+    ) -> None:
+        self.fields = fields
+        self.expansions = expansions
+        self.via = via
+
+    def read(self, name: str) -> None:
+        self.fields.add(name)
+        if self.via:
+            self.expansions.update(self.via)
+
+
+# usages for the tracked objects by id, removed when the object is collected.
+_usages: Dict[int, List[_Usage]] = {}
+_installed = 0
+_install_lock = threading.Lock()
+
+# reads from these files are not from the user code, like the generated `__eq__` and `__repr__`
+# (file names start with "<"), `to_dict`, copy, pickle and helpers in this package.
+_IGNORED_FILES = frozenset(
+    os.path.abspath(m.__file__) for m in (dataclasses, copy, pickle, reprlib)
+)
+_IGNORED_DIRS = (
+    _PACKAGE_DIR,
+    os.path.dirname(os.path.abspath(dataclasses_json.__file__)),
+)
+
+
+def _from_user_code(filename: str) -> bool:
+    return not (
+        filename.startswith("<")
+        or filename.startswith(_IGNORED_DIRS)
+        or filename in _IGNORED_FILES
+    )
+
+
+def _profiled_getattribute(self, name: str):
+    if name[0] != "_" and _usages:
+        usages = _usages.get(id(self))
+        if usages is not None and _from_user_code(sys._getframe(1).f_code.co_filename):
+            for usage in usages:
+                usage.read(name)
+    return object.__getattribute__(self, name)
+
+
+def _install() -> None:
+    """
+    Hook attribute reads on all models, objects keep their classes.
+    """
+    global _installed
+    with _install_lock:
+        if not _installed:
+            md.BaseModel.__getattribute__ = _profiled_getattribute
+        _installed += 1
+
+
+def _uninstall() -> None:
+    global _installed
+    with _install_lock:
+        _installed -= 1
+        if not _installed:
+            del md.BaseModel.__getattribute__
+            _usages.clear()
+
+
+def _track(obj, usage: _Usage) -> None:
+    key = id(obj)
+    usages = _usages.get(key)
+    if usages is None:
+        usages = _usages[key] = []
+        weakref.finalize(obj, _usages.pop, key, None)
+    # objects shared between responses, like by `EntityStore`, count for all the calls.
+    if not any(u.fields is usage.fields and u.via == usage.via for u in usages):
+        usages.append(usage)
+
+
+@dataclass
+class FieldUsage:
+    """
+    Requested and read fields for an endpoint from a call site.
+    """
+
+    endpoint: str
+    call_site: str
+    calls: int = 0
+    bytes: int = 0
+    requested: Dict[str, Set[str]] = field(default_factory=dict, repr=False)
+    used: Dict[str, Set[str]] = field(default_factory=dict, repr=False)
+
+    def _used(self, param: str) -> Set[str]:
+        return self.used.setdefault(param, set())
+
+    def recommended(self) -> Dict[str, List[str]]:
+        """
+        :return: The requested fields and expansions which have been read, by parameter.
+        """
+        result = {}
+        for param, values in self.requested.items():
+            used = self._used(param).copy()
+            if param == "expansions":
+                # keep the expansions can't be profiled.
+                keep = {v for v in values if v in used or v not in EXPANSIONS}
+            else:
+                keep = (values & used) - DEFAULT_FIELDS.get(param, set())
+            result[param] = sorted(keep)
+        return result
+
+    def unused(self) -> Dict[str, List[str]]:
+        """
+        :return: The requested fields and expansions never read, by parameter.
+        """
+        recommended = self.recommended()
+        return {
+            param: sorted(values - set(recommended[param]))
+            for param, values in self.requested.items()
+        }
+
+    def kwargs(self) -> Dict[str, Optional[str]]:
+        """
+        :return: Recommended arguments for the api method, like `{"tweet_fields": "lang"}`.
+        """
+        return {
+            param.replace(".", "_"): ",".join(values) or None
+            for param, values in self.recommended().items()
+        }
+
+    @property
+    def avg_bytes(self) -> float:
+        return self.bytes / self.calls if self.calls else 0.0
+
+
+class FieldProfiler(RequestHook):
+    """
+    Hook to record which attributes code reads on the returned `Tweet`, `User`, `Media`,
+    `Place`, `Poll`, `Space` and `TwitterList` objects, for each endpoint and call site.
+
+    While a profiler is open, attribute reads on the models are hooked, the objects and their
+    classes are not changed. Only reads from the user code count, not from `repr`, `==`,
+    `to_dict`, pickle or this package. Calls with `return_json` are not profiled.
+    Call `close` to remove the hook.
+
+    With `apply`, after `min_calls` profiled calls from a call site, requests from it only ask
+    the recommended fields and expansions. A field read later is asked again from the next call.
+    """
+
+    def __init__(self, apply: bool = False, min_calls: int = 20) -> None:
+        """
+        :param apply: Replace the requested fields and expansions by the recommended.
+        :param min_calls: Profiled calls before applying the recommendation.
+        """
+        self.apply = apply
+        self.min_calls = min_calls
+        self.usages: Dict[Tuple[str, str], FieldUsage] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        _install()
+
+    def close(self) -> None:
+        """
+        Stop profiling, remove the hook for attribute reads if no other profiler open.
+        """
+        if not self._closed:
+            self._closed = True
+            _uninstall()
+
+    def on_request(self, record: RequestRecord) -> None:
+        params = record.params
+        if not params:
+            return
+        requested = {
+            param: _split(params.get(param))
+            for param in ("expansions", *DEFAULT_FIELDS)
+            if params.get(param)
+        }
+        if not requested:
+            return
+        key = (record.endpoint, _call_site())
+        with self._lock:
+            usage = self.usages.get(key)
+            if usage is None:
+                usage = self.usages[key] = FieldUsage(*key)
+            for param, values in requested.items():
+                usage.requested.setdefault(param, set()).update(values)
+        self._local.pending = (record, usage)
+        if self.apply and usage.calls >= self.min_calls:
+            params.update(
+                {
+                    param: ",".join(values) or None
+                    for param, values in usage.recommended().items()
+                }
+            )
+
+    def on_build(self, record: RequestRecord, response: md.Response) -> None:
+        pending = getattr(self._local, "pending", None)
+        if self._closed or pending is None or pending[0] is not record:
+            return
+        self._local.pending = None
+        usage = pending[1]
+        with self._lock:
+            usage.calls += 1
+            usage.bytes += record.bytes
+        expansions = usage._used("expansions")
+
+        data = response.data if isinstance(response.data, list) else [response.data]
+        for obj in data:
+            param = self._param_for(obj)
+            if param is not None:
+                _track(obj, _Usage(usage._used(param), expansions))
+
+        includes = response.includes
+        if includes is None:
+            return
+        resp_json = response._json or {}
+        refs = {}
+        for expansion in usage.requested.get("expansions", ()):
+            spec = EXPANSIONS.get(expansion)
+            if spec is None:
+                continue
+            name, source, path, key = spec
+            if source == "data":
+                root = resp_json.get("data")
+            else:
+                root = (resp_json.get("includes") or {}).get(source)
+            refs[expansion] = (name, key, set(_values(root, path.split("."))))
+
+        for name, param in INCLUDES_PARAMS.items():
+            for obj in getattr(includes, name) or ():
+                via = tuple(
+                    expansion
+                    for expansion, (ref_name, key, values) in refs.items()
+                    if ref_name == name and str(obj.__dict__.get(key)) in values
+                )
+                _track(obj, _Usage(usage._used(param), expansions, via))
+
+    @staticmethod
+    def _param_for(obj) -> Optional[str]:
+        for cls in type(obj).__mro__:
+            param = MODEL_PARAMS.get(cls)
+            if param is not None:
+                return param
+        return None
+
+    def report(self) -> List[FieldUsage]:
+        """
+        :return: Usages for all endpoints and call sites, the largest responses first.
+        """
+        with self._lock:
+            usages = [usage for usage in self.usages.values() if usage.calls]
+        return sorted(usages, key=lambda usage: usage.bytes, reverse=True)
+
+    def recommend(
+        self, endpoint: str, call_site: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        """
+        :param endpoint: Endpoint resource, like `/tweets`.
+        :param call_site: Only for the call site, default for all call sites of the endpoint.
+        :return: Recommended fields and expansions by parameter.
+        """
+        result: Dict[str, Set[str]] = {}
+        for usage in self.report():
+            if usage.endpoint != endpoint:
+                continue
+            if call_site is not None and usage.call_site != call_site:
+                continue
+            for param, values in usage.recommended().items():
+                result.setdefault(param, set()).update(values)
+        return {param: sorted(values) for param, values in result.items()}
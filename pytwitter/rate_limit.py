@@ -6,6 +6,8 @@
 
 import logging
 import re
+import threading
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 from typing import Optional, Pattern
@@ -114,7 +116,7 @@ USER_TWEET_RETWEET = Endpoint(
 USER_TWEET_RETWEET_REMOVE = Endpoint(
     resource="/users/:id/retweets/:tweet_id",
     regex=re.compile(r"/users/\d+/retweets/\d+"),
-    LIMIT_USER_POST=50,
+    LIMIT_USER_DELETE=50,
 )
 TWEET_LIKING_USER = Endpoint(
     resource="/tweets/:id/liking_users",
@@ -136,7 +138,7 @@ USER_TWEET_LIKE = Endpoint(
 USER_TWEET_LIKE_REMOVE = Endpoint(
     resource="/users/:id/likes/:tweet_id",
     regex=re.compile(r"/users/\d+/likes/\d+"),
-    LIMIT_USER_POST=50,
+    LIMIT_USER_DELETE=50,
 )
 USER_BOOKMARK_TWEET = Endpoint(
     resource="/users/:id/bookmarks",
@@ -222,7 +224,7 @@ USER_MUTING = Endpoint(
 USER_REMOVE_MUTING = Endpoint(
     resource="/users/:id/muting/:target_user_id",
     regex=re.compile(r"/users/\d+/muting/\d+"),
-    LIMIT_USER_POST=50,
+    LIMIT_USER_DELETE=50,
 )
 
 SPACE_BY_ID = Endpoint(
@@ -230,6 +232,12 @@ SPACE_BY_ID = Endpoint(
     regex=re.compile(r"/spaces/\w+"),
     LIMIT_APP_GET=300,
 )
+SPACE_TWEETS = Endpoint(
+    resource="/spaces/:id/tweets",
+    regex=re.compile(r"/spaces/\w+/tweets"),
+    LIMIT_APP_GET=300,
+    LIMIT_USER_GET=300,
+)
 SPACES_BY_IDS = Endpoint(
     resource="/spaces",
     regex=re.compile(r"/spaces"),
@@ -280,6 +288,7 @@ LIST_MEMBERS = Endpoint(
     regex=re.compile(r"/lists/\d+/members"),
     LIMIT_APP_GET=900,
     LIMIT_USER_GET=900,
+    LIMIT_USER_POST=300,
 )
 LISTS_MEMBERSHIPS_BY_USER = Endpoint(
     resource="/users/:id/list_memberships",
@@ -399,12 +408,15 @@ PATH_VAR_ENDPOINTS = [
     TWEET_COUNTS,
     TWEET_RETWEET_USER,
     TWEET_QUOTE_TWEETS,
+    TWEET_RETWEET_TWEETS,
     USER_TWEET_RETWEET,
     USER_TWEET_RETWEET_REMOVE,
     TWEET_LIKING_USER,
     USER_LIKED_TWEET,
     USER_TWEET_LIKE,
     USER_TWEET_LIKE_REMOVE,
+    USER_BOOKMARK_TWEET,
+    USER_BOOKMARK_TWEET_REMOVE,
     TWEET_HIDDEN,
     USER_BY_ID,
     USERS_BY_ID,
@@ -419,6 +431,7 @@ PATH_VAR_ENDPOINTS = [
     USER_MUTING,
     USER_REMOVE_MUTING,
     SPACE_BY_ID,
+    SPACE_TWEETS,
     SPACES_BY_IDS,
     SPACES_BY_CREATORS,
     SPACES_SEARCH,
@@ -456,6 +469,9 @@ class RateLimit:
     Refer: https://developer.twitter.com/en/docs/twitter-api/rate-limits
     """
 
+    # seconds for one rate limit window.
+    WINDOW = 15 * 60
+
     def __init__(self, auth_type="app"):
         """
         Stored rate limit data. like:
@@ -471,6 +487,9 @@ class RateLimit:
             raise PyTwitterError(f"Not support for auth type {auth_type}")
         self.auth_type = auth_type
         self.mapping = defaultdict(dict)
+        # requests reserved by `acquire` and not responded yet.
+        self._inflight = defaultdict(int)
+        self._lock = threading.Lock()
 
     @staticmethod
     def url_to_endpoint(url) -> Endpoint:
@@ -507,7 +526,22 @@ class RateLimit:
             ),
             "reset": conv_type("reset", int, headers.get("x-rate-limit-reset", 0)),
         }
-        self.mapping[endpoint.resource][method.upper()] = RateLimitData(**data)
+        with self._lock:
+            key = (endpoint.resource, method.upper())
+            inflight = self._inflight[key] = max(self._inflight[key] - 1, 0)
+            current = self.mapping[endpoint.resource].get(method.upper())
+            if current is not None and current.reset >= data["reset"]:
+                # responses may arrive out of order, or after more requests reserved by
+                # `acquire`, the remaining only decreases in a window.
+                data["remaining"] = min(data["remaining"], current.remaining)
+                if data["reset"] <= time.time() < current.reset:
+                    # response for an expired window.
+                    data = None
+            elif current is not None:
+                # a new window, requests reserved before will be counted in it.
+                data["remaining"] = max(data["remaining"] - inflight, 0)
+            if data is not None:
+                self.mapping[endpoint.resource][method.upper()] = RateLimitData(**data)
 
         return self.get_limit(url=url, method=method)
 
@@ -517,3 +551,64 @@ class RateLimit:
             limit = endpoint.get_limit(auth_type=self.auth_type, method=method)
             return RateLimitData(limit=limit, remaining=limit)
         return self.mapping[endpoint.resource][method.upper()]
+
+    def acquire(self, url, method="GET", block=True) -> float:
+        """
+        Reserve one request in the rate limit window, safe to call from many threads.
+        Reserved requests are counted before the responses update the limit data.
+
+        :param url: api query url.
+        :param method: request method
+        :param block: Sleep until the window reset if no request left.
+        :return: 0 if a request reserved. If not block and no request left,
+            seconds to wait for the window reset.
+        """
+        method = method.upper()
+        endpoint = self.url_to_endpoint(url=url)
+        while True:
+            with self._lock:
+                now = time.time()
+                data = self.mapping[endpoint.resource].get(method)
+                # one second after the reset, requests sent just before the reset may land in
+                # the new window, their responses update the data in this second.
+                if data is None or data.reset + 1 <= now:
+                    limit = (
+                        data.limit
+                        if data is not None
+                        else endpoint.get_limit(auth_type=self.auth_type, method=method)
+                    )
+                    data = RateLimitData(limit=limit, remaining=limit, reset=0)
+                    self.mapping[endpoint.resource][method] = data
+                    # forget requests never responded with the limit, like network errors.
+                    self._inflight[(endpoint.resource, method)] = 0
+                if not data.limit:
+                    # no known limit for the endpoint.
+                    return 0.0
+                if data.remaining > 0:
+                    data.remaining -= 1
+                    self._inflight[(endpoint.resource, method)] += 1
+                    if not data.reset:
+                        data.reset = int(now + self.WINDOW)
+                    return 0.0
+                wait = data.reset + 1.0 - now
+            if not block:
+                return wait
+            logger.debug(f"Rate limited requesting [{url}], sleeping for [{wait}]")
+            time.sleep(wait)
+
+    def release(self, url, method="GET", sent=True) -> None:
+        """
+        Release one request reserved by `acquire` which will not update the limit data by a response.
+
+        :param url: api query url.
+        :param method: request method
+        :param sent: Whether the request was sent. A request not sent is given back to the window.
+        """
+        method = method.upper()
+        endpoint = self.url_to_endpoint(url=url)
+        with self._lock:
+            key = (endpoint.resource, method)
+            self._inflight[key] = max(self._inflight[key] - 1, 0)
+            data = self.mapping[endpoint.resource].get(method)
+            if not sent and data is not None and data.limit:
+                data.remaining = min(data.remaining + 1, data.limit)
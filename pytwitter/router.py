@@ -0,0 +1,202 @@
+"""
+    Route streamed tweets to handlers by the tags or ids of matching rules.
+
+    ``` python
+    from pytwitter import StreamApi
+    from pytwitter.router import TweetRouter
+
+    router = TweetRouter()
+
+    @router.on(tag="cats")
+    def handle_cats(tweet):
+        print(tweet.text)
+
+    stream_api = StreamApi(bearer_token="bearer token", router=router)
+    stream_api.search_stream()
+    ```
+"""
+
+import logging
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pytwitter.error import PyTwitterError
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[object], None]
+
+_STOP = object()
+
+
+class _Route:
+    """
+    A registered handler, with optional worker threads and queue.
+    """
+
+    def __init__(self, handler: Handler, workers: int = 0, maxsize: int = 1000):
+        self.handler = handler
+        self.queue: Optional[queue.Queue] = None
+        self.threads: List[threading.Thread] = []
+        if workers:
+            self.queue = queue.Queue(maxsize=maxsize)
+            for _ in range(workers):
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def _call(self, tweet) -> None:
+        try:
+            self.handler(tweet)
+        except Exception as exc:
+            logger.exception(f"Exception in handler {self.handler}, exc: {exc}")
+
+    def _work(self) -> None:
+        while True:
+            tweet = self.queue.get()
+            try:
+                if tweet is _STOP:
+                    return
+                self._call(tweet)
+            finally:
+                self.queue.task_done()
+
+    def send(self, tweet) -> None:
+        if self.queue is None:
+            self._call(tweet)
+        else:
+            self.queue.put(tweet)
+
+    def join(self) -> None:
+        if self.queue is not None:
+            self.queue.join()
+
+    def close(self) -> None:
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+def _matching_rules(tweet) -> Iterable[Tuple[Optional[str], Optional[str]]]:
+    if isinstance(tweet, dict):
+        return [(r.get("id"), r.get("tag")) for r in tweet.get("matching_rules") or ()]
+    return [(r.id, r.tag) for r in getattr(tweet, "matching_rules", None) or ()]
+
+
+class TweetRouter:
+    """
+    Dispatch tweets to handlers registered by rule tag or rule id.
+
+    Handlers are looked up from dict indexes built when registering, so the routing cost for a tweet
+    depends on its matching rules, not the number of handlers. Wildcard handlers receive all tweets,
+    default handlers receive tweets no tag or id handler matched.
+    A handler matched by many rules of a tweet is called once.
+    """
+
+    WILDCARD = "*"
+
+    def __init__(self) -> None:
+        self._tags: Dict[str, Tuple[_Route, ...]] = {}
+        self._ids: Dict[str, Tuple[_Route, ...]] = {}
+        self._wildcard: Tuple[_Route, ...] = ()
+        self._default: Tuple[_Route, ...] = ()
+        self._routes: List[_Route] = []
+        self._lock = threading.Lock()
+
+    def add_handler(
+        self,
+        handler: Handler,
+        tag: Optional[str] = None,
+        rule_id: Optional[str] = None,
+        default: bool = False,
+        workers: int = 0,
+        maxsize: int = 1000,
+    ) -> Handler:
+        """
+        :param handler: Callable receiving the Tweet obj or json data.
+        :param tag: Rule tag to route, `*` for all tweets.
+        :param rule_id: Rule id to route.
+        :param default: Receive tweets no other handler matched.
+        :param workers: Threads to run the handler with its own queue. 0 for run in the stream thread.
+        :param maxsize: Max size for the queue of the handler, the stream waits when full.
+        :return: The handler
+        """
+        if sum((tag is not None, rule_id is not None, default)) != 1:
+            raise PyTwitterError("Need one of tag, rule_id or default for the handler")
+        route = _Route(handler, workers=workers, maxsize=maxsize)
+        with self._lock:
+            self._routes.append(route)
+            # replace the indexes, so routing reads them without lock.
+            if default:
+                self._default = self._default + (route,)
+            elif tag == self.WILDCARD:
+                self._wildcard = self._wildcard + (route,)
+            elif tag is not None:
+                self._tags = {**self._tags, tag: self._tags.get(tag, ()) + (route,)}
+            else:
+                self._ids = {
+                    **self._ids,
+                    rule_id: self._ids.get(rule_id, ()) + (route,),
+                }
+        return handler
+
+    def on(
+        self,
+        tag: Optional[str] = None,
+        rule_id: Optional[str] = None,
+        default: bool = False,
+        workers: int = 0,
+        maxsize: int = 1000,
+    ) -> Callable[[Handler], Handler]:
+        """
+        Decorator to register a handler, see `add_handler`.
+        """
+
+        def decorator(handler: Handler) -> Handler:
+            return self.add_handler(
+                handler,
+                tag=tag,
+                rule_id=rule_id,
+                default=default,
+                workers=workers,
+                maxsize=maxsize,
+            )
+
+        return decorator
+
+    def route(self, tweet) -> int:
+        """
+        :param tweet: Tweet obj or json data with matching rules.
+        :return: Count of handlers the tweet sent to.
+        """
+        tags, ids = self._tags, self._ids
+        routes: Dict[int, _Route] = {}
+        for rule_id, tag in _matching_rules(tweet):
+            for route in ids.get(rule_id, ()):
+                routes.setdefault(id(route.handler), route)
+            for route in tags.get(tag, ()):
+                routes.setdefault(id(route.handler), route)
+        matched = list(routes.values()) or list(self._default)
+        for route in self._wildcard:
+            if id(route.handler) not in routes:
+                matched.append(route)
+        for route in matched:
+            route.send(tweet)
+        return len(matched)
+
+    def join(self) -> None:
+        """
+        Wait for the queued tweets handled.
+        """
+        for route in list(self._routes):
+            route.join()
+
+    def close(self) -> None:
+        """
+        Stop the worker threads after the queued tweets handled.
+        """
+        for route in list(self._routes):
+            route.close()
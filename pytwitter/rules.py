@@ -0,0 +1,177 @@
+"""
+    Declarative rules for the filtered stream.
+
+    ``` python
+    from pytwitter import StreamApi
+    from pytwitter.rules import RuleSet
+
+    stream_api = StreamApi(bearer_token="bearer token")
+    rules = RuleSet([{"value": "cat has:media", "tag": "cats"}, "dog"])
+    diff = rules.reconcile(stream_api)
+    ```
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pytwitter.models as md
+from pytwitter.error import PyTwitterError
+
+if TYPE_CHECKING:
+    from pytwitter.streaming import StreamApi
+
+RuleKey = Tuple[str, Optional[str]]
+
+# max rules to add or delete in one request.
+MAX_BATCH_SIZE = 1000
+
+
+@dataclass
+class RuleDiff:
+    """
+    Changes to make the current rules same as desired rules.
+    """
+
+    add: List[dict] = field(default_factory=list)
+    delete: List[md.StreamRule] = field(default_factory=list)
+    keep: List[md.StreamRule] = field(default_factory=list)
+    requests: int = field(default=0, repr=False)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.add or self.delete)
+
+
+def _batches(items: list, size: int) -> Iterator[list]:
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+class RuleSet:
+    """
+    Desired rules for the filtered stream, rules are compared by value and tag.
+    """
+
+    def __init__(
+        self, rules: Optional[Iterable[Union[str, dict, md.StreamRule]]] = None
+    ) -> None:
+        """
+        :param rules: Rules by value, dict with value and tag, or StreamRule.
+        """
+        self.rules: Dict[RuleKey, None] = {}
+        for rule in rules or ():
+            self.add(rule)
+
+    @staticmethod
+    def _key(rule: Union[str, dict, md.StreamRule], tag=None) -> RuleKey:
+        if isinstance(rule, str):
+            return rule, tag
+        if isinstance(rule, dict):
+            return rule["value"], rule.get("tag")
+        return rule.value, rule.tag
+
+    def add(self, rule: Union[str, dict, md.StreamRule], tag: Optional[str] = None):
+        """
+        :param rule: Rule value, dict with value and tag, or StreamRule.
+        :param tag: Tag for the rule value.
+        """
+        self.rules[self._key(rule, tag)] = None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __contains__(self, rule) -> bool:
+        return self._key(rule) in self.rules
+
+    def __iter__(self) -> Iterator[dict]:
+        for value, tag in self.rules:
+            yield {"value": value, "tag": tag} if tag is not None else {"value": value}
+
+    def diff(self, current: Iterable[md.StreamRule]) -> RuleDiff:
+        """
+        :param current: Rules currently active.
+        :return: RuleDiff
+        """
+        result = RuleDiff()
+        seen = set()
+        for rule in current:
+            key = self._key(rule)
+            if key in self.rules and key not in seen:
+                seen.add(key)
+                result.keep.append(rule)
+            else:
+                result.delete.append(rule)
+        result.add = [
+            rule for rule in self if (rule["value"], rule.get("tag")) not in seen
+        ]
+        return result
+
+    @staticmethod
+    def _manage(api: StreamApi, body: dict, dry_run: bool, diff: RuleDiff) -> list:
+        resp = api.manage_rules(rules=body, dry_run=dry_run, return_json=True)
+        diff.requests += 1
+        return resp.get("errors", [])
+
+    def reconcile(
+        self,
+        api: StreamApi,
+        dry_run: bool = False,
+        validate: bool = True,
+        batch_size: int = MAX_BATCH_SIZE,
+        page_size: int = 1000,
+    ) -> RuleDiff:
+        """
+        Fetch the current rules and apply the changes with as few requests as possible.
+
+        Rules to add are validated with `dry_run` before any change. New rules are added before the
+        old rules deleted, so the stream keeps matching during the change, except rules only change the
+        tag, which need to be deleted first.
+
+        :param api: StreamApi instance.
+        :param dry_run: Only validate and return the changes.
+        :param validate: Validate the rules to add before apply.
+        :param batch_size: Max rules in one request.
+        :param page_size: Max rules for one page when fetching the current rules.
+        :return: RuleDiff
+        """
+        current, next_token, pages = [], None, 0
+        while True:
+            resp = api.get_rules(
+                max_results=page_size, pagination_token=next_token, return_json=True
+            )
+            pages += 1
+            current += resp.get("data", [])
+            next_token = resp.get("meta", {}).get("next_token")
+            if not next_token:
+                break
+        diff = self.diff(md.StreamRule.new_from_json_dict(rule) for rule in current)
+        diff.requests += pages
+        if not diff.changed:
+            return diff
+
+        adding = {rule["value"] for rule in diff.add}
+        first = [rule.id for rule in diff.delete if rule.value in adding]
+        last = [rule.id for rule in diff.delete if rule.value not in adding]
+
+        errors = []
+        if validate or dry_run:
+            for batch in _batches(diff.add, batch_size):
+                errors += self._manage(api, {"add": batch}, True, diff)
+            # values only change the tag are duplicate until the old rules deleted.
+            errors = [err for err in errors if err.get("id") not in first]
+            if errors:
+                raise PyTwitterError({"errors": errors})
+        if dry_run:
+            return diff
+
+        for batch in _batches(first, batch_size):
+            errors += self._manage(api, {"delete": {"ids": batch}}, False, diff)
+        for batch in _batches(diff.add, batch_size):
+            errors += self._manage(api, {"add": batch}, False, diff)
+        for batch in _batches(last, batch_size):
+            errors += self._manage(api, {"delete": {"ids": batch}}, False, diff)
+        if errors:
+            raise PyTwitterError({"errors": errors})
+        return diff
@@ -0,0 +1,271 @@
+"""
+    Monitor Spaces by creators or ids, and emit events when they change.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.spaces import SpaceMonitor
+
+    class MyMonitor(SpaceMonitor):
+        def on_event(self, event):
+            print(event.type, event.space_id, event.delta)
+
+    monitor = MyMonitor(Api(bearer_token="bearer token"), creator_ids=["2244994945"])
+    monitor.run()
+    ```
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import pytwitter.models as md
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+
+logger = logging.getLogger(__name__)
+
+# max ids for one request of spaces lookup.
+MAX_IDS = 100
+DEFAULT_SPACE_FIELDS = (
+    "state",
+    "participant_count",
+    "scheduled_start",
+    "started_at",
+    "ended_at",
+    "host_ids",
+    "title",
+)
+
+SCHEDULED = "scheduled"
+STARTED = "started"
+ENDED = "ended"
+PARTICIPANTS = "participants"
+
+
+@dataclass
+class SpaceEvent:
+    """
+    A change of a space. Type is scheduled, started, ended or participants.
+    """
+
+    type: str
+    space_id: str
+    data: dict = field(repr=False)
+    previous: Optional[dict] = field(default=None, repr=False)
+    delta: int = 0
+
+    @property
+    def space(self) -> md.Space:
+        return md.Space.new_from_json_dict(self.data)
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    created = datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    return created.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _batches(items: list, size: int = MAX_IDS) -> Iterable[list]:
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+class SpaceMonitor:
+    """
+    Poll spaces in batches, and emit events only for the changes since the previous poll.
+
+    Creators are polled by `get_spaces_by_creator` every `discover_interval` seconds to find new
+    spaces. Known spaces are polled by `get_spaces` at the interval for their state, a scheduled
+    space is polled at its scheduled start, ended spaces are not polled anymore.
+    Due ids are sent together, up to 100 ids for one request.
+    """
+
+    def __init__(
+        self,
+        api: Api,
+        creator_ids: Optional[Iterable[str]] = None,
+        space_ids: Optional[Iterable[str]] = None,
+        discover_interval: float = 60.0,
+        live_interval: float = 30.0,
+        scheduled_interval: float = 300.0,
+        space_fields: Iterable[str] = DEFAULT_SPACE_FIELDS,
+    ) -> None:
+        """
+        :param api: Api instance.
+        :param creator_ids: User ids to find their live or scheduled spaces.
+        :param space_ids: Space ids to track.
+        :param discover_interval: Seconds between polls for creators.
+        :param live_interval: Seconds between polls for a live space.
+        :param scheduled_interval: Seconds between polls for a scheduled space.
+        :param space_fields: Fields for the space object, need state and participant_count.
+        """
+        self.api = api
+        self.creator_ids: List[str] = [str(i) for i in creator_ids or ()]
+        self.discover_interval = discover_interval
+        self.live_interval = live_interval
+        self.scheduled_interval = scheduled_interval
+        self.space_fields = list(space_fields)
+        self.spaces: Dict[str, dict] = {}
+        self.requests = 0
+        self.running = False
+
+        self._next_discover = 0.0
+        # heap of (due time, space id), a space may have stale entries after rescheduled.
+        self._due: List[Tuple[float, str]] = []
+        self._next_poll: Dict[str, float] = {}
+        self._stopped = threading.Event()
+        for space_id in space_ids or ():
+            self._schedule(str(space_id), 0.0)
+
+    def _schedule(self, space_id: str, at: float) -> None:
+        self._next_poll[space_id] = at
+        heapq.heappush(self._due, (at, space_id))
+
+    def _interval(self, data: dict, now: float) -> Optional[float]:
+        state = data.get("state")
+        if state == "live":
+            return now + self.live_interval
+        if state == SCHEDULED:
+            at = now + self.scheduled_interval
+            start = _parse_time(data.get("scheduled_start"))
+            if start is not None and now < start < at:
+                # check soon after the scheduled start.
+                at = max(start, now + self.live_interval)
+            return at
+        return None
+
+    def _diff(self, space_id: str, data: Optional[dict]) -> List[SpaceEvent]:
+        previous = self.spaces.get(space_id)
+        if data is None:
+            # not found anymore, like a canceled scheduled space.
+            if previous is None or previous.get("state") == ENDED:
+                return []
+            data = {**previous, "state": ENDED}
+        old_state = previous.get("state") if previous else None
+        state = data.get("state")
+        events = []
+        if state != old_state:
+            if state == "live":
+                events.append(SpaceEvent(STARTED, space_id, data, previous))
+            elif state == ENDED and previous is not None:
+                events.append(SpaceEvent(ENDED, space_id, data, previous))
+            elif state == SCHEDULED:
+                events.append(SpaceEvent(SCHEDULED, space_id, data, previous))
+        count = data.get("participant_count")
+        old_count = previous.get("participant_count") if previous else None
+        if state == "live" and count is not None and count != (old_count or 0):
+            events.append(
+                SpaceEvent(
+                    PARTICIPANTS,
+                    space_id,
+                    data,
+                    previous,
+                    delta=count - (old_count or 0),
+                )
+            )
+        self.spaces[space_id] = data
+        return events
+
+    def _update(self, space_id: str, data: Optional[dict], now: float):
+        events = self._diff(space_id, data)
+        at = self._interval(self.spaces.get(space_id, {}), now)
+        if at is None:
+            self._next_poll.pop(space_id, None)
+        else:
+            self._schedule(space_id, at)
+        return events
+
+    def _discover(self, now: float, events: List[SpaceEvent]) -> None:
+        for batch in _batches(self.creator_ids):
+            resp = self.api.get_spaces_by_creator(
+                creator_ids=batch, space_fields=self.space_fields, return_json=True
+            )
+            self.requests += 1
+            for data in resp.get("data", []):
+                space_id = data["id"]
+                if space_id in self._next_poll and self.spaces.get(space_id) == data:
+                    continue
+                events += self._update(space_id, data, now)
+        self._next_discover = now + self.discover_interval
+
+    def poll(self, now: Optional[float] = None) -> List[SpaceEvent]:
+        """
+        Poll the due creators and spaces once.
+        :param now: Current timestamp, default is time.time().
+        :return: Events for the changes.
+        """
+        now = time.time() if now is None else now
+        events: List[SpaceEvent] = []
+        try:
+            if self.creator_ids and now >= self._next_discover:
+                self._discover(now, events)
+
+            due = []
+            while self._due and self._due[0][0] <= now:
+                at, space_id = heapq.heappop(self._due)
+                if self._next_poll.get(space_id) == at and space_id not in due:
+                    due.append(space_id)
+            for idx, batch in enumerate(_batches(due)):
+                try:
+                    resp = self.api.get_spaces(
+                        space_ids=batch,
+                        space_fields=self.space_fields,
+                        return_json=True,
+                    )
+                except Exception:
+                    # retry the not polled spaces later.
+                    for space_id in due[idx * MAX_IDS :]:
+                        self._schedule(space_id, now + self.live_interval)
+                    raise
+                self.requests += 1
+                found = {data["id"]: data for data in resp.get("data", [])}
+                for space_id in batch:
+                    events += self._update(space_id, found.get(space_id), now)
+        finally:
+            # changes already applied to the state must be dispatched, even if a batch failed.
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def next_poll_at(self) -> float:
+        """
+        :return: Timestamp for the next due poll.
+        """
+        at = [self._due[0][0]] if self._due else []
+        if self.creator_ids:
+            at.append(self._next_discover)
+        return min(at) if at else time.time() + self.discover_interval
+
+    def on_event(self, event: SpaceEvent) -> None:
+        """
+        Called for each change, override it to handle the events.
+        :param event: SpaceEvent
+        """
+
+    def run(self) -> None:
+        """
+        Poll until `stop` called. Errors for a poll are logged and retried at the next poll.
+        """
+        self.running = True
+        self._stopped.clear()
+        while self.running:
+            try:
+                self.poll()
+            except Exception as exc:
+                logger.exception(f"Exception in poll spaces, exc: {exc}")
+                self._next_discover = time.time() + self.discover_interval
+            wait = max(self.next_poll_at() - time.time(), 0)
+            if self._stopped.wait(wait):
+                break
+
+    def stop(self) -> None:
+        self.running = False
+        self._stopped.set()
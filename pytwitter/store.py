@@ -0,0 +1,133 @@
+"""
+    Entity store to share expanded objects across responses.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple, Type
+
+import pytwitter.models as md
+
+
+class EntityStore:
+    """
+    Identity map for objects returned in many responses, like the authors in `includes.users`
+    when paginating with expansions.
+
+    Each object is decoded once and interned by its id, the same instance is returned for the
+    following responses. If a response carries new or changed fields, the stored instance
+    will be updated in place.
+    """
+
+    # key field for the entities to intern.
+    KEY_FIELDS = {
+        "User": "id",
+        "Tweet": "id",
+        "Media": "media_key",
+        "Place": "id",
+    }
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        """
+        :param max_size: Max number of objects to keep, least recently used objects
+            will be dropped first. If not provide, the store is unbounded.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entities: "OrderedDict[Tuple[str, Hashable], md.BaseModel]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def supports(self, cls: Type) -> bool:
+        return cls.__name__ in self.KEY_FIELDS
+
+    def get(self, cls: Type, key: Hashable) -> Optional[md.BaseModel]:
+        """
+        :param cls: Class for the entity.
+        :param key: ID (or media key) for the entity.
+        :return: The interned object if exists.
+        """
+        return self._entities.get((cls.__name__, key))
+
+    def intern(self, cls: Type, data: Optional[Dict]) -> Optional[md.BaseModel]:
+        """
+        Convert json dict to data class, reuse the stored object for the same id.
+
+        :param cls: Class for the entity, one of User, Tweet, Media and Place.
+        :param data: Json dict for the entity.
+        :return: The data class
+        """
+        if not data:
+            return None
+        if not self.supports(cls):
+            return cls.new_from_json_dict(data)
+        key = data.get(self.KEY_FIELDS[cls.__name__])
+        if key is None:
+            return cls.new_from_json_dict(data)
+
+        key = (cls.__name__, key)
+        with self._lock:
+            obj = self._entities.get(key)
+            if obj is not None:
+                self._entities.move_to_end(key)
+                old = obj._json
+                # Nothing new for the object, skip the decode.
+                if data.items() <= old.items():
+                    self.hits += 1
+                    return obj
+                new = cls.new_from_json_dict({**old, **data})
+                obj.__dict__.update(new.__dict__)
+                self.hits += 1
+                return obj
+
+            self.misses += 1
+            obj = cls.new_from_json_dict(data)
+            self._entities[key] = obj
+            if self.max_size is not None and len(self._entities) > self.max_size:
+                self._entities.popitem(last=False)
+            return obj
+
+    def build_includes(self, data: Optional[Dict]) -> Optional[md.Includes]:
+        """
+        Convert includes json dict to Includes, with the entities interned.
+
+        :param data: Json dict for includes.
+        :return: Includes object
+        """
+        if not data:
+            return None
+        includes = md.Includes(
+            media=self._intern_list(md.Media, data.get("media")),
+            places=self._intern_list(md.Place, data.get("places")),
+            polls=(
+                [md.Poll.new_from_json_dict(item) for item in data["polls"]]
+                if data.get("polls") is not None
+                else None
+            ),
+            tweets=self._intern_list(md.Tweet, data.get("tweets")),
+            users=self._intern_list(md.User, data.get("users")),
+            topics=(
+                [md.Topic.new_from_json_dict(item) for item in data["topics"]]
+                if data.get("topics") is not None
+                else None
+            ),
+        )
+        includes._json = data
+        return includes
+
+    def _intern_list(self, cls, items):
+        if items is None:
+            return None
+        return [self.intern(cls, item) for item in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entities.clear()
+            self.hits = self.misses = 0
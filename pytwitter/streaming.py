@@ -2,22 +2,101 @@
     Api for streaming.
 """
 
+from __future__ import annotations
+
 import base64
+import functools
 import json
 import logging
+import socket
+import threading
 import time
-from typing import Dict, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import requests
 import pytwitter.models as md
+from pytwitter.continuity import tweet_id
 from pytwitter.error import PyTwitterError
+from pytwitter.metrics import Hook, RequestRecord, StreamStats, dispatch
+from pytwitter.rate_limit import RateLimit
+from pytwitter.router import TweetRouter
+from pytwitter.tokens import TokenCache
 from pytwitter.utils.validators import enf_comma_separated
 from requests.models import Response
-from authlib.integrations.requests_client import OAuth2Auth
 
 logger = logging.getLogger(__name__)
 
 
+def iter_line_batches(
+    chunks: Iterable[bytes], delimiter: bytes = b"\r\n"
+) -> Iterator[List[bytes]]:
+    """
+    Frame stream chunks into lines.
+
+    Chunks are appended to a reusable buffer, all complete lines in it are sliced out with a memoryview
+    and split at once, so only the partial line at the end is kept between reads.
+
+    :param chunks: Raw chunks from the response.
+    :param delimiter: Line delimiter, twitter streams use `\r\n`.
+    :return: Batches of complete lines without the delimiter. Keep alive signals are empty lines.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        end = buffer.rfind(delimiter)
+        if end < 0:
+            continue
+        with memoryview(buffer) as view:
+            lines = bytes(view[:end]).split(delimiter)
+        del buffer[: end + len(delimiter)]
+        yield lines
+    if buffer.strip():
+        yield [bytes(buffer)]
+
+
+def tweet_from_data(data: dict) -> Optional[md.Tweet]:
+    """
+    Build the Tweet from a stream line, the top level `matching_rules` is kept on the tweet.
+    :param data: Decoded stream line.
+    :return: Tweet obj
+    """
+    tweet = data.get("data")
+    if tweet is not None and "matching_rules" in data:
+        tweet = {**tweet, "matching_rules": data["matching_rules"]}
+    return md.Tweet.new_from_json_dict(data=tweet)
+
+
+def decode_lines(lines: List[bytes], return_json: bool = False) -> list:
+    """
+    Decode stream lines into tweets. Module level so it can run in a process pool.
+
+    :param lines: Non empty lines from the stream.
+    :param return_json: Type for returned data. If you set True JSON data will be returned.
+    :return: List of Tweet obj or json data.
+    """
+    result = []
+    for line in lines:
+        data = json.loads(line)
+        if not return_json:
+            data = tweet_from_data(data)
+        result.append(data)
+    return result
+
+
 class StreamApi:
     BASE_URL = "https://api.twitter.com/2"
 
@@ -29,7 +108,17 @@ class StreamApi:
         proxies: Optional[dict] = None,
         max_retries: int = 3,
         timeout: Optional[int] = None,
-        chunk_size: int = 1024,
+        chunk_size: int = 64 * 1024,
+        hooks: Optional[List[Hook]] = None,
+        batch_size: Optional[int] = None,
+        batch_interval: float = 1.0,
+        decode_processes: Optional[int] = None,
+        router: Optional[TweetRouter] = None,
+        line_sinks: Optional[List] = None,
+        dedup=None,
+        gap_handler: Optional[Callable[[float, float, bool], None]] = None,
+        stall_timeout: Optional[float] = None,
+        token_cache: Optional[TokenCache] = None,
     ) -> None:
         """
         :param bearer_token: Access token for app or user.
@@ -38,7 +127,23 @@ class StreamApi:
         :param proxies: Proxies for request.
         :param max_retries: Request max retry times.
         :param timeout: Timeout for request.
-        :param chunk_size: Chunk size for read data.
+        :param chunk_size: Max chunk size for read data from the connection.
+        :param hooks: Hooks to receive a record for each stream connection. See `pytwitter.metrics`.
+        :param batch_size: If set, group lines into batches of this size and deliver them by `on_batch`.
+        :param batch_interval: Seconds to deliver a batch not full yet, checked when new data arrives.
+        :param decode_processes: Processes to decode batches, None for decode in the reader thread.
+        :param router: Route tweets to handlers by matching rules in the default `on_tweet`.
+        :param line_sinks: Objects with `write_lines(lines)` to receive the raw lines before decode,
+            like `pytwitter.archive.SegmentWriter`.
+        :param dedup: Object with `seen(tweet_id)` to skip the tweets delivered before,
+            like `pytwitter.continuity.WindowedIdSet` or `pytwitter.continuity.BloomFilter`.
+        :param gap_handler: Called with start, end timestamps for the disconnection and whether
+            it covered by `backfill_minutes`, like `pytwitter.continuity.Backfiller`. It runs on a
+            worker thread while the stream keeps reading, tweets it delivers may reach `on_tweet`
+            from that thread.
+        :param stall_timeout: Seconds without any line or keep alive signal to close the connection
+            and reconnect. Twitter sends keep alive every 20 seconds. None for not watch.
+        :param token_cache: Cache for the app bearer token by consumer key, see `pytwitter.tokens`.
         """
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
@@ -46,19 +151,48 @@ class StreamApi:
         self.max_retries = max_retries
         self.timeout = timeout
         self.chunk_size = chunk_size
+        self.hooks = list(hooks) if hooks else []
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.decode_processes = decode_processes
+        self.router = router
+        self.line_sinks = list(line_sinks) if line_sinks else []
+        self.dedup = dedup
+        self.gap_handler = gap_handler
+        self.duplicates = 0
+        self.gaps: Deque[Tuple[float, float, bool]] = deque(maxlen=100)
+        self._last_data_at: Optional[float] = None
+        self._gap_executor: Optional[ThreadPoolExecutor] = None
+        self._return_json = False
+        self.stall_timeout = stall_timeout
+        self.stats = StreamStats()
+        self._response: Optional[Response] = None
+        self._stalled = False
+        self._batch: List[bytes] = []
+        self._batch_started = 0.0
+        self._pending: Deque[Future] = deque()
+        self._executor: Optional[ProcessPoolExecutor] = None
 
         self.session = requests.Session()
         self._auth = None
         self.running = False
 
+        from authlib.integrations.requests_client import OAuth2Auth
+
         if bearer_token:
             self._auth = OAuth2Auth(
                 token={"access_token": bearer_token, "token_type": "Bearer"}
             )
         elif all([self.consumer_key, self.consumer_secret]):
-            resp = self.generate_bearer_token(
-                consumer_key=consumer_key, consumer_secret=consumer_secret
+            fetch = functools.partial(
+                self.generate_bearer_token,
+                consumer_key=consumer_key,
+                consumer_secret=consumer_secret,
             )
+            if token_cache is not None:
+                resp = token_cache.get_or_fetch(consumer_key, fetch)
+            else:
+                resp = fetch()
             self._auth = OAuth2Auth(
                 token={"access_token": resp["access_token"], "token_type": "Bearer"}
             )
@@ -98,68 +232,322 @@ class StreamApi:
         # make sure only one running connect
         self.running = True
         retries, retry_interval, retry_wait = 1, 2, 2
+        self._last_data_at = None
+        self._return_json = return_json
+        backfill_minutes = (params or {}).get("backfill_minutes")
+        if self.batch_size and self.decode_processes:
+            self._executor = ProcessPoolExecutor(max_workers=self.decode_processes)
+        watchdog_stop = threading.Event()
+        if self.stall_timeout:
+            threading.Thread(
+                target=self._watch, args=(watchdog_stop,), daemon=True
+            ).start()
 
         try:
             while self.running and retries <= self.max_retries:
-                with self.session.get(
-                    url=url,
-                    params=params,
-                    auth=self._auth,
-                    proxies=self.proxies,
-                    timeout=self.timeout,
-                    stream=True,
-                ) as resp:
-                    logger.debug(resp.headers)
-                    if resp.status_code == 200:
-                        for line in resp.iter_lines(chunk_size=self.chunk_size):
-                            if line:
-                                self.on_data(raw_data=line, return_json=return_json)
-                            else:
-                                self.on_keep_alive()
-                            if not self.running:
-                                break
-
-                        if resp.raw.closed:
-                            self.on_closed(resp)
-                    else:
-                        self.on_request_error(resp)
-                        logger.debug(
-                            f"Request connection failed. "
-                            f"Trying again in {retry_wait} seconds... ({retries}/{self.max_retries})"
-                        )
-                        time.sleep(retry_wait)
-
-                        retries += 1
-                        retry_wait = retry_interval * retries
+                self._stalled = False
+                record = None
+                if self.hooks:
+                    record = RequestRecord(
+                        endpoint=RateLimit.url_to_endpoint(url).resource,
+                        url=url,
+                        params=params,
+                        retries=retries - 1,
+                        stream=True,
+                    )
+                    dispatch(self.hooks, "on_request", record)
+                start = time.perf_counter()
+                try:
+                    with self.session.get(
+                        url=url,
+                        params=params,
+                        auth=self._auth,
+                        proxies=self.proxies,
+                        timeout=self.timeout,
+                        stream=True,
+                    ) as resp:
+                        logger.debug(resp.headers)
+                        self._response = resp
+                        if record is not None:
+                            record.network_time = time.perf_counter() - start
+                            record.status_code = resp.status_code
+                        if resp.status_code == 200:
+                            self.stats.on_connect()
+                            if self._last_data_at is not None:
+                                gap_end = time.time()
+                                covered = bool(backfill_minutes) and (
+                                    gap_end - self._last_data_at
+                                    <= backfill_minutes * 60
+                                )
+                                self.on_gap(
+                                    start=self._last_data_at,
+                                    end=gap_end,
+                                    covered=covered,
+                                )
+                            for lines in iter_line_batches(
+                                resp.iter_content(chunk_size=self.chunk_size)
+                            ):
+                                if record is not None:
+                                    record.lines += len(lines)
+                                    record.bytes += sum(map(len, lines))
+                                self.stats.on_lines(lines)
+                                for sink in self.line_sinks:
+                                    sink.write_lines(lines)
+                                self._last_data_at = time.time()
+                                self.on_lines(lines=lines, return_json=return_json)
+                                if not self.running:
+                                    break
+
+                            if resp.raw.closed:
+                                self.on_closed(resp)
+                        else:
+                            self.on_request_error(resp)
+                            logger.debug(
+                                f"Request connection failed. "
+                                f"Trying again in {retry_wait} seconds... ({retries}/{self.max_retries})"
+                            )
+                            time.sleep(retry_wait)
+
+                            retries += 1
+                            retry_wait = retry_interval * retries
+                except Exception as exc:
+                    if record is not None:
+                        record.error = repr(exc)
+                    if not self._stalled:
+                        raise
+                    logger.debug(f"Stream stalled, reconnecting, exc: {exc}")
+                finally:
+                    self._response = None
+                    if record is not None:
+                        dispatch(self.hooks, "on_response", record)
         except Exception as exc:
             logger.exception(f"Exception in request, exc: {exc}")
         finally:
             logger.debug("Request connection exited")
+            watchdog_stop.set()
+            self._close_gaps()
+            self._close_batches(return_json=return_json)
             self.session.close()
             self.disconnect()
 
+    def _watch(self, stop: threading.Event) -> None:
+        """
+        Close the connection when it is silent for `stall_timeout`, the stream will reconnect.
+        """
+        interval = min(1.0, self.stall_timeout / 4)
+        while not stop.wait(interval):
+            resp = self._response
+            if resp is None or self._stalled:
+                continue
+            silence = self.stats.silence
+            if silence >= self.stall_timeout:
+                logger.warning(f"Stream silent for {silence:.1f} seconds, reconnecting")
+                self.stats.stalls += 1
+                self._stalled = True
+                self.on_stall(resp)
+
+    def on_stall(self, resp):
+        """
+        Called from the watchdog thread when the connection stalled, close the socket to unblock the reader.
+        :param resp: Response for the stalled connection.
+        :return:
+        """
+        sock = getattr(getattr(resp.raw, "connection", None), "sock", None)
+        try:
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+            else:
+                resp.close()
+        except OSError as exc:
+            logger.debug(f"Close stalled connection failed, exc: {exc}")
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+        :param hook: RequestHook instance or callable receiving the RequestRecord.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        self.hooks.remove(hook)
+
     def disconnect(self):
         self.running = False
 
+    def _batch_lines(self, lines: List[bytes], return_json: bool) -> None:
+        now = time.monotonic()
+        for line in lines:
+            if not line:
+                self.on_keep_alive()
+                continue
+            if not self._batch:
+                self._batch_started = now
+            self._batch.append(line)
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch(return_json=return_json)
+                if not self.running:
+                    return
+        if self._batch and now - self._batch_started >= self.batch_interval:
+            self._flush_batch(return_json=return_json)
+        elif self._pending:
+            # deliver the decoded batches in quiet periods, like only keep alive signals read.
+            self._deliver_pending()
+
+    def _flush_batch(self, return_json: bool, drain: bool = False) -> None:
+        """
+        Send the current batch to decode, and deliver the decoded batches in order.
+        :param return_json:
+        :param drain: Wait for all pending batches.
+        """
+        if self._batch:
+            lines, self._batch = self._batch, []
+            if self._executor is None:
+                self._deliver_batch(decode_lines(lines, return_json))
+            else:
+                self._pending.append(
+                    self._executor.submit(decode_lines, lines, return_json)
+                )
+        self._deliver_pending(drain=drain)
+
+    def _deliver_pending(self, drain: bool = False) -> None:
+        # keep limited batches in flight, so the memory is bounded when decode falls behind.
+        max_pending = 2 * (self.decode_processes or 1)
+        while self._pending and (
+            drain or self._pending[0].done() or len(self._pending) > max_pending
+        ):
+            self._deliver_batch(self._pending.popleft().result())
+
+    def _deliver_batch(self, tweets: list) -> None:
+        if self.dedup is not None:
+            tweets = [tweet for tweet in tweets if not self._is_duplicate(tweet)]
+        for tweet in tweets:
+            if isinstance(tweet, dict):
+                created_at = (tweet.get("data") or {}).get("created_at")
+            else:
+                created_at = getattr(tweet, "created_at", None)
+            self.stats.on_tweet(created_at)
+        if tweets:
+            self.on_batch(tweets=tweets)
+
+    def _admit(self, data: dict) -> bool:
+        if self.dedup is not None and self._is_duplicate(data):
+            return False
+        self.stats.on_tweet((data.get("data") or {}).get("created_at"))
+        return True
+
+    def _is_duplicate(self, tweet) -> bool:
+        item_id = tweet_id(tweet)
+        if item_id is not None and self.dedup.seen(item_id):
+            self.duplicates += 1
+            return True
+        return False
+
+    def _close_batches(self, return_json: bool) -> None:
+        try:
+            self._flush_batch(return_json=return_json, drain=True)
+        except Exception as exc:
+            logger.exception(f"Exception in deliver batches, exc: {exc}")
+        finally:
+            # `shutdown(cancel_futures=True)` is only on python 3.9+.
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def on_lines(self, lines, return_json=False):
+        """
+        :param lines: Batch of complete lines read from the connection.
+        :param return_json:
+        :return:
+        """
+        if self.batch_size:
+            return self._batch_lines(lines=lines, return_json=return_json)
+        for line in lines:
+            if line:
+                self.on_data(raw_data=line, return_json=return_json)
+            else:
+                self.on_keep_alive()
+            if not self.running:
+                break
+
     def on_data(self, raw_data, return_json=False):
         """
         :param raw_data: Response data by twitter api.
         :param return_json:
         :return:
         """
-        data = json.loads(raw_data)
-        if not return_json:
-            data = data.get("data")
-            data = md.Tweet.new_from_json_dict(data=data)
+        return self.deliver(data=json.loads(raw_data), return_json=return_json)
 
+    def deliver(self, data: dict, return_json: Optional[bool] = None):
+        """
+        Deliver a decoded stream line to `on_tweet`, skip it if seen by `dedup`.
+        :param data: Stream line data, with `data` and `matching_rules`.
+        :param return_json: Type for returned data. Default is same as the running stream.
+        :return:
+        """
+        if not self._admit(data):
+            return None
+        if return_json is None:
+            return_json = self._return_json
+        if not return_json:
+            data = tweet_from_data(data)
         return self.on_tweet(tweet=data)
 
+    def on_gap(self, start: float, end: float, covered: bool):
+        """
+        Called when the stream reconnected after data stopped.
+        :param start: Timestamp for the last data received.
+        :param end: Timestamp for reconnected.
+        :param covered: Whether the gap covered by `backfill_minutes`.
+        :return:
+        """
+        logger.debug(f"Stream gap from {start} to {end}, covered: {covered}")
+        self.gaps.append((start, end, covered))
+        if self.gap_handler is not None:
+            # a long backfill in the reader thread would stall the new connection.
+            if self._gap_executor is None:
+                self._gap_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="pytwitter-gap"
+                )
+            self._gap_executor.submit(self._handle_gap, start, end, covered)
+
+    def _handle_gap(self, start: float, end: float, covered: bool) -> None:
+        try:
+            self.gap_handler(start, end, covered)
+        except Exception as exc:
+            logger.exception(f"Exception in gap handler, exc: {exc}")
+            return
+        # the gap is filled, a reconnect before new data should not handle it again.
+        last = self._last_data_at
+        if last is None or last < end:
+            self._last_data_at = end
+
+    def _close_gaps(self) -> None:
+        """
+        Wait for the running gap handlers.
+        """
+        if self._gap_executor is not None:
+            self._gap_executor.shutdown(wait=True)
+            self._gap_executor = None
+
+    def on_batch(self, tweets):
+        """
+        Receive decoded batches in the stream order when `batch_size` is set.
+        :param tweets: List of Tweet obj or json data.
+        :return:
+        """
+        for tweet in tweets:
+            self.on_tweet(tweet=tweet)
+
     def on_tweet(self, tweet):
         """
         :param tweet: Tweet obj or json data.
         :return:
         """
         logger.debug(f"Received tweet: {tweet}")
+        if self.router is not None:
+            self.router.route(tweet)
 
     def on_keep_alive(self):
         """
@@ -318,17 +706,27 @@ class StreamApi:
         return data
 
     def get_rules(
-        self, ids: Optional[Union[str, List, Tuple]] = None, return_json=False
+        self,
+        ids: Optional[Union[str, List, Tuple]] = None,
+        max_results: Optional[int] = None,
+        pagination_token: Optional[str] = None,
+        return_json=False,
     ):
         """
         Return a list of rules currently active on the streaming endpoint, either as a list or individually.
 
         :param ids: IDs for rule. If omitted, all rules are returned.
+        :param max_results: The maximum number of results to be returned per page. Number between 1 and the 1000.
+        :param pagination_token: Token for the pagination.
         :param return_json: Type for returned data. If you set True JSON data will be returned.
         :return: Response object or json data
         """
 
-        args = {"ids": enf_comma_separated(name="ids", value=ids)}
+        args = {
+            "ids": enf_comma_separated(name="ids", value=ids),
+            "max_results": max_results,
+            "pagination_token": pagination_token,
+        }
 
         resp = self._request(
             url=f"{self.BASE_URL}/tweets/search/stream/rules",
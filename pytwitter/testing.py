@@ -0,0 +1,583 @@
+"""
+    Local fake twitter api server for offline load and throughput testing.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.testing import FakeTwitterServer
+
+    with FakeTwitterServer(latency=0.01, error_rate=0.01) as server:
+        api = server.configure(Api(bearer_token="fake"))
+        api.get_tweet("1354143047324299264")
+    ```
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from pytwitter.rate_limit import RateLimit
+
+# response kind and whether data is a list for each GET endpoint.
+ROUTES = {
+    "/tweets": ("tweet", True),
+    "/tweets/:id": ("tweet", False),
+    "/users/:id/tweets": ("tweet", True),
+    "/users/:id/timelines/reverse_chronological": ("tweet", True),
+    "/users/:id/mentions": ("tweet", True),
+    "/tweets/search/recent": ("tweet", True),
+    "/tweets/search/all": ("tweet", True),
+    "/tweets/:id/quote_tweets": ("tweet", True),
+    "/tweets/:id/retweets": ("tweet", True),
+    "/users/:id/liked_tweets": ("tweet", True),
+    "/users/:id/bookmarks": ("tweet", True),
+    "/lists/:id/tweets": ("tweet", True),
+    "/spaces/:id/tweets": ("tweet", True),
+    "/tweets/:id/retweeted_by": ("user", True),
+    "/tweets/:id/liking_users": ("user", True),
+    "/users": ("user", True),
+    "/users/by": ("user", True),
+    "/users/:id": ("user", False),
+    "/users/by/username/:username": ("user", False),
+    "/users/me": ("user", False),
+    "/users/search": ("user", True),
+    "/users/:id/following": ("user", True),
+    "/users/:id/followers": ("user", True),
+    "/users/:id/blocking": ("user", True),
+    "/users/:id/muting": ("user", True),
+    "/lists/:id/members": ("user", True),
+    "/lists/:id/followers": ("user", True),
+    "/spaces/:id": ("space", False),
+    "/spaces": ("space", True),
+    "/spaces/by/creator_ids": ("space", True),
+    "/spaces/search": ("space", True),
+    "/lists/:id": ("list", False),
+    "/users/:id/owned_lists": ("list", True),
+    "/users/:id/list_memberships": ("list", True),
+    "/users/:id/followed_lists": ("list", True),
+    "/users/:id/pinned_lists": ("list", True),
+    "/trends/by/woeid/:woeid": ("trend", True),
+    "/usage/tweets": ("usage", False),
+}
+
+# testdata file for endpoint, used when provide `templates_dir`.
+TEMPLATES = {
+    "/tweets": "apis/tweet/tweets_resp.json",
+    "/tweets/:id": "apis/tweet/tweet_resp.json",
+    "/users/:id/tweets": "apis/timeline/timeline_tweets.json",
+    "/users/:id/timelines/reverse_chronological": "apis/timeline/timeline_reverse_chronological.json",
+    "/users/:id/mentions": "apis/timeline/timeline_mentions.json",
+    "/tweets/search/recent": "apis/searches/search_tweets_for_nyc.json",
+    "/tweets/search/all": "apis/searches/search_tweets_query.json",
+    "/tweets/:id/quote_tweets": "apis/tweet/tweet_quote_tweets_resp.json",
+    "/tweets/:id/retweets": "apis/tweet/tweet_retweet_tweets_resp.json",
+    "/tweets/:id/retweeted_by": "apis/tweet/tweet_retweed_users_resp.json",
+    "/tweets/:id/liking_users": "apis/tweet/tweet_liking_users_resp.json",
+    "/users/:id/liked_tweets": "apis/user/user_liked_tweets_resp.json",
+    "/users/:id/bookmarks": "apis/tweet/tweets_by_user_bookmark.json",
+    "/users": "apis/user/users_resp.json",
+    "/users/:id": "apis/user/user_resp.json",
+    "/users/me": "apis/user/me_resp.json",
+    "/users/search": "apis/user/search_users_resp.json",
+    "/users/:id/following": "apis/user/following_resp.json",
+    "/users/:id/followers": "apis/user/followers_resp.json",
+    "/users/:id/blocking": "apis/user/blocking_users_list_resp.json",
+    "/users/:id/muting": "apis/user/muting_resp.json",
+    "/spaces/:id": "apis/space/space_resp.json",
+    "/spaces": "apis/space/spaces_resp.json",
+    "/spaces/by/creator_ids": "apis/space/spaces_by_creators.json",
+    "/spaces/search": "apis/space/spaces_search_resp.json",
+    "/lists/:id": "apis/lists/list_resp.json",
+    "/lists/:id/tweets": "apis/lists/list_tweets_resp.json",
+    "/lists/:id/members": "apis/lists/list_members_resp.json",
+    "/trends/by/woeid/:woeid": "apis/trends/trends_resp.json",
+    "/usage/tweets": "apis/usage/usage_tweets_resp.json",
+}
+
+# key in the response for manage endpoints, by the last static path segment.
+ACTION_KEYS = {
+    "likes": "liked",
+    "retweets": "retweeted",
+    "following": "following",
+    "blocking": "blocking",
+    "muting": "muting",
+    "bookmarks": "bookmarked",
+    "members": "is_member",
+    "followed_lists": "following",
+    "pinned_lists": "pinned",
+    "hidden": "hidden",
+}
+
+STREAM_PATHS = ("/tweets/search/stream", "/tweets/sample/stream")
+RULES_PATH = "/tweets/search/stream/rules"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def fake_object(kind: str, obj_id: str) -> dict:
+    """
+    Generate an object for the kind.
+    :param kind: tweet, user, space, list, trend or usage.
+    :param obj_id: ID for the object.
+    :return: json dict
+    """
+    if kind == "tweet":
+        return {
+            "id": obj_id,
+            "text": f"Fake tweet {obj_id}",
+            "author_id": str(int(obj_id) % 1000 + 1),
+            "created_at": _now(),
+            "edit_history_tweet_ids": [obj_id],
+        }
+    elif kind == "user":
+        return {"id": obj_id, "name": f"User {obj_id}", "username": f"user{obj_id}"}
+    elif kind == "space":
+        return {"id": obj_id, "state": "live", "participant_count": 10}
+    elif kind == "list":
+        return {"id": obj_id, "name": f"List {obj_id}"}
+    elif kind == "trend":
+        return {"trend_name": f"#trend{obj_id}", "tweet_count": int(obj_id) * 100}
+    return {
+        "cap_reset_day": 1,
+        "project_id": "1",
+        "project_cap": "10000000",
+        "project_usage": "0",
+    }
+
+
+class _Window:
+    __slots__ = ("limit", "remaining", "reset")
+
+    def __init__(self, limit: int, reset: int):
+        self.limit = limit
+        self.remaining = limit
+        self.reset = reset
+
+
+class FakeTwitterServer:
+    """
+    A local stand-in for twitter api v2, run in background threads.
+
+    Serves the endpoints `Api` and `StreamApi` use with generated objects (or the testdata
+    templates), emits `x-rate-limit-*` headers and 429 responses, supports latency and error
+    injection, and an endless `tweets/search/stream` and `tweets/sample/stream` feed.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rate_limit: bool = True,
+        rate_limit_window: int = 15 * 60,
+        auth_type: str = "app",
+        page_size: int = 10,
+        pages: int = 1,
+        templates_dir: Optional[str] = None,
+        stream_rate: float = 0.0,
+        stream_limit: Optional[int] = None,
+        keep_alive_interval: float = 20.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        :param host: Host to bind.
+        :param port: Port to bind, 0 will pick a free port.
+        :param latency: Seconds to wait before response, or a callable return the seconds.
+        :param error_rate: Probability for a request to get the error response.
+        :param error_status: Status code for the injected errors.
+        :param rate_limit: Whether enforce the endpoint rate limits in `pytwitter.rate_limit`.
+        :param rate_limit_window: Seconds for the rate limit window.
+        :param auth_type: Limits for app or user auth.
+        :param page_size: Count of objects for list endpoints, if no max_results provided.
+        :param pages: Pages for list endpoints, pages before the last one have next_token.
+        :param templates_dir: Directory for the repo testdata, serve the files as response.
+        :param stream_rate: Tweets per second for streams, 0 for as fast as possible.
+        :param stream_limit: Tweets to send before close the stream connection. None for endless.
+        :param keep_alive_interval: Seconds between keep alive signals for streams.
+        :param seed: Seed for the random generator.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.auth_type = auth_type
+        self.page_size = page_size
+        self.pages = pages
+        self.templates_dir = templates_dir
+        self.stream_rate = stream_rate
+        self.stream_limit = stream_limit
+        self.keep_alive_interval = keep_alive_interval
+
+        self.requests: Counter = Counter()
+        self.rules: Dict[str, dict] = {}
+        self._rule_seq = 0
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self._cache: Dict[tuple, bytes] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/2"
+
+    def configure(self, api):
+        """
+        Point an Api or StreamApi instance to this server.
+        :param api: Api or StreamApi instance.
+        :return: The api instance.
+        """
+        if hasattr(api, "BASE_URL_V2"):
+            api.BASE_URL_V2 = self.api_url
+            api.BASE_UPLOAD_URL = f"{self.base_url}/1.1"
+        else:
+            api.BASE_URL = self.api_url
+        return api
+
+    def start(self) -> "FakeTwitterServer":
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="FakeTwitterServer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeTwitterServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def reset_rate_limits(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def _check_rate_limit(self, resource, method, endpoint) -> Optional[dict]:
+        """
+        :return: Rate limit headers, None if endpoint not limited.
+        """
+        if not self.rate_limit:
+            return None
+        limit = endpoint.get_limit(auth_type=self.auth_type, method=method)
+        if not limit:
+            return None
+        now = int(time.time())
+        with self._lock:
+            window = self._windows.get((resource, method))
+            if window is None or window.reset <= now:
+                window = _Window(limit, now + self.rate_limit_window)
+                self._windows[(resource, method)] = window
+            if window.remaining > 0:
+                window.remaining -= 1
+                exceeded = False
+            else:
+                exceeded = True
+            headers = {
+                "x-rate-limit-limit": str(window.limit),
+                "x-rate-limit-remaining": str(window.remaining),
+                "x-rate-limit-reset": str(window.reset),
+            }
+        if exceeded:
+            headers["x-exceeded"] = "1"
+        return headers
+
+    def _template(self, resource) -> Optional[dict]:
+        if not self.templates_dir or resource not in TEMPLATES:
+            return None
+        path = os.path.join(self.templates_dir, TEMPLATES[resource])
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return json.loads(f.read().decode("utf-8"))
+
+    def _page(self, resource, path_id, page, size) -> bytes:
+        """Build the response body, cached for list endpoints."""
+        kind, multi = ROUTES[resource]
+        key = (resource, page, size) if multi else None
+        if key is not None and key in self._cache:
+            return self._cache[key]
+
+        body = self._template(resource)
+        if body is None:
+            if multi:
+                start = 1000 + page * size
+                data = [fake_object(kind, str(start + idx)) for idx in range(size)]
+                body = {"data": data, "meta": {"result_count": size}}
+            else:
+                body = {"data": fake_object(kind, path_id or "1000")}
+        if multi:
+            meta = body.setdefault("meta", {})
+            meta.pop("next_token", None)
+            if page + 1 < self.pages:
+                meta["next_token"] = str(page + 1)
+            if page > 0:
+                meta["previous_token"] = str(page - 1)
+
+        payload = json.dumps(body).encode("utf-8")
+        if key is not None:
+            self._cache[key] = payload
+        return payload
+
+    def _manage_rules(self, params, body) -> dict:
+        dry_run = params.get("dry_run", ["false"])[0].lower() == "true"
+        created, deleted, data, errors = 0, 0, [], []
+        with self._lock:
+            values = {rule["value"]: rule["id"] for rule in self.rules.values()}
+            for rule in body.get("add", []):
+                if rule["value"] in values:
+                    errors.append(
+                        {
+                            "value": rule["value"],
+                            "id": values[rule["value"]],
+                            "title": "DuplicateRule",
+                            "type": "https://api.twitter.com/2/problems/duplicate-rules",
+                        }
+                    )
+                    continue
+                self._rule_seq += 1
+                rule = {"id": str(1000 + self._rule_seq), **rule}
+                data.append(rule)
+                values[rule["value"]] = rule["id"]
+                created += 1
+                if not dry_run:
+                    self.rules[rule["id"]] = rule
+            for rule_id in body.get("delete", {}).get("ids", []):
+                if rule_id in self.rules:
+                    deleted += 1
+                    if not dry_run:
+                        del self.rules[rule_id]
+        meta = {"sent": _now(), "summary": {}}
+        if "add" in body:
+            meta["summary"].update(
+                created=created,
+                not_created=len(errors),
+                valid=created,
+                invalid=len(errors),
+            )
+        if "delete" in body:
+            meta["summary"].update(deleted=deleted, not_deleted=0)
+        result = {"meta": meta}
+        if data:
+            result["data"] = data
+        if errors:
+            result["errors"] = errors
+        return result
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json; charset=utf-8")
+                self.send_header("content-length", str(len(payload)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self) -> dict:
+                length = int(self.headers.get("content-length") or 0)
+                if not length:
+                    return {}
+                raw = self.rfile.read(length)
+                try:
+                    return json.loads(raw)
+                except ValueError:
+                    return {}
+
+            def _handle(self):
+                method = self.command
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                body = self._body() if method in ("POST", "PUT") else {}
+                endpoint = RateLimit.url_to_endpoint(self.path)
+                resource = endpoint.resource
+                with server._lock:
+                    server.requests[(method, resource)] += 1
+
+                latency = (
+                    server.latency() if callable(server.latency) else server.latency
+                )
+                if latency:
+                    time.sleep(latency)
+
+                if not self.headers.get("authorization"):
+                    return self._send_json(
+                        401, {"title": "Unauthorized", "status": 401}
+                    )
+                if server.error_rate and server._random.random() < server.error_rate:
+                    return self._send_json(
+                        server.error_status,
+                        {"title": "Injected Error", "status": server.error_status},
+                    )
+
+                headers = server._check_rate_limit(resource, method, endpoint)
+                if headers is not None and headers.pop("x-exceeded", None):
+                    return self._send_json(
+                        429,
+                        {
+                            "title": "Too Many Requests",
+                            "detail": "Too Many Requests",
+                            "type": "about:blank",
+                            "status": 429,
+                        },
+                        headers,
+                    )
+
+                if resource == RULES_PATH:
+                    if method == "GET":
+                        page = int(params.get("pagination_token", ["0"])[0] or 0)
+                        size = int(params.get("max_results", ["1000"])[0])
+                        rules = list(server.rules.values())
+                        data = rules[page * size : (page + 1) * size]
+                        resp = {"meta": {"sent": _now(), "result_count": len(data)}}
+                        if data:
+                            resp["data"] = data
+                        if (page + 1) * size < len(rules):
+                            resp["meta"]["next_token"] = str(page + 1)
+                        return self._send_json(200, resp, headers)
+                    return self._send_json(
+                        200, server._manage_rules(params, body), headers
+                    )
+                if resource in STREAM_PATHS:
+                    return self._stream(resource, params)
+
+                if method == "GET" and resource in ROUTES:
+                    page = int(params.get("pagination_token", ["0"])[0] or 0)
+                    size = int(params.get("max_results", [server.page_size])[0])
+                    path_ids = re.findall(r"/(\d+)", url.path.split("/", 2)[-1])
+                    path_id = path_ids[0] if path_ids else None
+                    payload = server._page(resource, path_id, page, size)
+                    return self._send_json(200, payload, headers)
+                if method in ("POST", "PUT", "DELETE"):
+                    segments = [s for s in url.path.split("/") if not s.isdigit()]
+                    key = ACTION_KEYS.get(segments[-1], "result")
+                    data = {key: method != "DELETE"}
+                    if method == "POST" and "text" in body:
+                        data = {
+                            "id": str(int(time.time() * 1000)),
+                            "text": body["text"],
+                        }
+                    return self._send_json(200, {"data": data}, headers)
+                return self._send_json(404, {"title": "Not Found Error", "status": 404})
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+            def _stream(self, resource, params):
+                self.send_response(200)
+                self.send_header("content-type", "application/json; charset=utf-8")
+                self.send_header("transfer-encoding", "chunked")
+                self.end_headers()
+
+                interval = 1.0 / server.stream_rate if server.stream_rate else 0
+                with_rules = resource == STREAM_PATHS[0]
+                last_keep_alive, sent = time.time(), 0
+                try:
+                    while not server._stopped.is_set():
+                        if (
+                            server.stream_limit is not None
+                            and sent >= server.stream_limit
+                        ):
+                            break
+                        tweet_id = str(10**18 + sent)
+                        line = {"data": fake_object("tweet", tweet_id)}
+                        rules = list(server.rules.values()) if with_rules else []
+                        if rules:
+                            rule = rules[sent % len(rules)]
+                            line["matching_rules"] = [
+                                {"id": rule["id"], "tag": rule.get("tag")}
+                            ]
+                        self._write_chunk(json.dumps(line).encode() + b"\r\n")
+                        sent += 1
+                        now = time.time()
+                        if now - last_keep_alive >= server.keep_alive_interval:
+                            self._write_chunk(b"\r\n")
+                            last_keep_alive = now
+                        if interval:
+                            time.sleep(interval)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                self.close_connection = True
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        return Handler
+
+
+def main(argv=None):
+    """
+    Run the server in a separate process, like:
+    `python -m pytwitter.testing --port 8000 --latency 0.01`
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake twitter api server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-rate-limit", action="store_true")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--templates-dir", default=None)
+    parser.add_argument("--stream-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = FakeTwitterServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=not args.no_rate_limit,
+        pages=args.pages,
+        templates_dir=args.templates_dir,
+        stream_rate=args.stream_rate,
+    )
+    print(f"Serving fake twitter api at {server.api_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+    Token caches shared by `Api` and `StreamApi` instances, and auth for refreshing OAuth2 user tokens.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.tokens import FileTokenCache
+
+    cache = FileTokenCache("~/.cache/pytwitter")
+    api = Api(consumer_key="", consumer_secret="", application_only_auth=True, token_cache=cache)
+    ```
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from requests import PreparedRequest
+from requests.auth import AuthBase
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover, not available on windows.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache(abc.ABC):
+    """
+    Base class for token caches. Subclass it for other backends, like redis.
+
+    `get_or_fetch` holds the `lock` for the key while fetching, so concurrent callers for the same key
+    make one token request.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """
+        :param key: Cache key for the token.
+        :return: The token, or None if not cached.
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, token: dict) -> None:
+        """
+        :param key: Cache key for the token.
+        :param token: Token data.
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Remove the token for the key, like after the token invalidated.
+        """
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """
+        Lock for fetching the token for the key, in this process.
+        """
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], dict]) -> dict:
+        """
+        :param key: Key for the token, like the consumer key.
+        :param fetch: Callable to request the token if not cached.
+        :return: Token data
+        """
+        token = self.get(key)
+        if token is not None:
+            return token
+        with self.lock(key):
+            token = self.get(key)
+            if token is None:
+                token = fetch()
+                self.set(key, token)
+        return token
+
+
+class MemoryTokenCache(TokenCache):
+    """
+    Tokens in memory, shared by the instances in this process.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.tokens: Dict[str, dict] = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.tokens.get(key)
+
+    def set(self, key: str, token: dict) -> None:
+        self.tokens[key] = token
+
+    def delete(self, key: str) -> None:
+        self.tokens.pop(key, None)
+
+
+class FileTokenCache(TokenCache):
+    """
+    Tokens in a directory, shared by processes. Files are only readable by the owner (0600),
+    and named by the hash of the key. Fetching is locked by `flock` across processes.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        :param directory: Directory for the token files, created with 0700 if not exists.
+        """
+        super().__init__()
+        self.directory = os.path.expanduser(directory)
+        self._cache: Dict[str, Tuple[tuple, dict]] = {}
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = ".json") -> str:
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # parse the file only if changed, files are replaced on set.
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+        try:
+            with open(path, encoding="utf-8") as f:
+                token = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        self._cache[path] = (version, token)
+        return dict(token)
+
+    def set(self, key: str, token: dict) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(token, f)
+        os.replace(tmp, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with super().lock(key):
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(self._path(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+def _bearer(request: PreparedRequest) -> Optional[str]:
+    value = request.headers.get("Authorization", "")
+    return value[7:] if value.startswith("Bearer ") else None
+
+
+class OAuth2UserAuth(AuthBase):
+    """
+    Bearer auth with an OAuth2 user token, refreshed by the refresh token before it expires.
+
+    The token is kept in a `TokenCache` as the store, refresh holds the lock of the store for the
+    key, so threads (and processes with `FileTokenCache`) waiting for a refresh use the token one of
+    them refreshed, instead of each refreshing with the same refresh token.
+    """
+
+    def __init__(
+        self,
+        token: dict,
+        refresh: Callable[[str], dict],
+        store: Optional[TokenCache] = None,
+        key: str = "oauth2",
+        refresh_before: float = 60.0,
+    ) -> None:
+        """
+        :param token: Token with access_token, refresh_token and expires_at.
+        :param refresh: Callable to request a new token by the refresh token.
+        :param store: Store for the token to share with other instances. Default in memory.
+        :param key: Key for the token in the store, like the client id with the user id.
+        :param refresh_before: Seconds before the expiry to refresh the token.
+        """
+        self.refresh = refresh
+        self.store = store if store is not None else MemoryTokenCache()
+        self.key = key
+        self.refresh_before = refresh_before
+        self.refreshes = 0
+        with self.store.lock(key):
+            stored = self.store.get(key)
+            if stored is None or stored.get("expires_at", 0) < token.get(
+                "expires_at", 0
+            ):
+                self.store.set(key, token)
+                stored = token
+        self.token = stored
+
+    def _expiring(self, token: dict) -> bool:
+        expires_at = token.get("expires_at")
+        return (
+            expires_at is not None and expires_at - time.time() <= self.refresh_before
+        )
+
+    def refresh_token(self, failed: Optional[str] = None) -> dict:
+        """
+        Refresh the token if it is expiring or the `failed` access token is still current.
+        :param failed: Access token got 401.
+        :return: Current token
+        """
+        with self.store.lock(self.key):
+            token = self.store.get(self.key) or self.token
+            if self._expiring(token) or token.get("access_token") == failed:
+                logger.debug(f"Refreshing OAuth2 token for {self.key}")
+                new = self.refresh(token["refresh_token"])
+                if "expires_at" not in new and "expires_in" in new:
+                    new["expires_at"] = int(time.time()) + int(new["expires_in"])
+                # refresh token is not always rotated.
+                new.setdefault("refresh_token", token["refresh_token"])
+                self.store.set(self.key, new)
+                self.refreshes += 1
+                token = new
+            self.token = token
+        return token
+
+    def on_unauthorized(self, request: PreparedRequest) -> bool:
+        """
+        :param request: Request got 401.
+        :return: Whether a new token can retry the request.
+        """
+        failed = _bearer(request)
+        return self.refresh_token(failed=failed).get("access_token") != failed
+
+    def __call__(self, request: PreparedRequest) -> PreparedRequest:
+        # read the store each time, the token may be refreshed by other instances.
+        token = self.token = self.store.get(self.key) or self.token
+        if self._expiring(token):
+            token = self.refresh_token()
+        request.headers["Authorization"] = f"Bearer {token['access_token']}"
+        return request
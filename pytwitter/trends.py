@@ -0,0 +1,285 @@
+"""
+    Trends for many locations, with a shared cache and rank changes between polls.
+
+    ``` python
+    from pytwitter import Api
+    from pytwitter.trends import TrendsService
+
+    service = TrendsService(Api(bearer_token="bearer token"), woeids=[1, 23424977])
+    service.start()
+
+    snapshot = service.get(1)
+    print(snapshot.age, snapshot.trends[:3])
+    print(service.changes(1))
+    ```
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import pytwitter.models as md
+from pytwitter.rate_limit import RateLimit
+
+if TYPE_CHECKING:
+    from pytwitter.api import Api
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrendsSnapshot:
+    """
+    Trends for a location at a time, ranked by the order returned.
+    """
+
+    woeid: int
+    trends: List[md.Trend] = field(repr=False)
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def ranks(self) -> Dict[str, int]:
+        return {trend.trend_name: idx for idx, trend in enumerate(self.trends, 1)}
+
+
+@dataclass
+class RankChange:
+    """
+    Rank change for a trend between two polls. Rank is None if not in the trends.
+    """
+
+    trend_name: str
+    rank: Optional[int]
+    previous_rank: Optional[int]
+    tweet_count: Optional[int] = None
+
+    @property
+    def delta(self) -> int:
+        """
+        Positions moved up, 0 for new or dropped trends.
+        """
+        if self.rank is None or self.previous_rank is None:
+            return 0
+        return self.previous_rank - self.rank
+
+
+def diff_trends(
+    previous: Optional[TrendsSnapshot], current: TrendsSnapshot
+) -> List[RankChange]:
+    """
+    :param previous: Snapshot for the previous poll.
+    :param current: Snapshot for the current poll.
+    :return: Rank changes for new, dropped and moved trends.
+    """
+    old = previous.ranks if previous is not None else {}
+    new = current.ranks
+    changes = []
+    for trend in current.trends:
+        rank, previous_rank = new[trend.trend_name], old.get(trend.trend_name)
+        if rank != previous_rank:
+            changes.append(
+                RankChange(trend.trend_name, rank, previous_rank, trend.tweet_count)
+            )
+    for name, previous_rank in old.items():
+        if name not in new:
+            changes.append(RankChange(name, None, previous_rank))
+    return changes
+
+
+class TrendsService:
+    """
+    Cache trends for each woeid, shared by all consumers.
+
+    Concurrent `get` for the same woeid make one request. With `start`, watched woeids are
+    refreshed in the background, the stalest first, with requests spread evenly in the rate limit
+    window of the trends endpoint.
+    """
+
+    def __init__(
+        self,
+        api: Api,
+        woeids: Optional[Iterable[int]] = None,
+        max_age: float = 900.0,
+        requests_per_window: Optional[int] = None,
+    ) -> None:
+        """
+        :param api: Api instance.
+        :param woeids: Locations to refresh in the background.
+        :param max_age: Seconds for cached trends to be fresh.
+        :param requests_per_window: Max requests for background refresh in a rate limit window.
+            Default is the limit of the trends endpoint.
+        """
+        self.api = api
+        self.woeids: List[int] = [int(woeid) for woeid in woeids or ()]
+        self.max_age = max_age
+        if requests_per_window is None:
+            requests_per_window = api.rate_limit.get_limit(
+                f"{api.BASE_URL_V2}/trends/by/woeid/1"
+            ).limit
+        self.requests_per_window = requests_per_window
+        self.requests = 0
+        self.snapshots: Dict[int, TrendsSnapshot] = {}
+        self.previous: Dict[int, TrendsSnapshot] = {}
+        self._inflight: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _url(self, woeid: int) -> str:
+        return f"{self.api.BASE_URL_V2}/trends/by/woeid/{woeid}"
+
+    def _fetch(self, woeid: int) -> TrendsSnapshot:
+        resp = self.api.get_trends_by_woeid(woeid=woeid, return_json=True)
+        self.requests += 1
+        snapshot = TrendsSnapshot(
+            woeid=woeid,
+            trends=[md.Trend.new_from_json_dict(t) for t in resp.get("data", [])],
+        )
+        with self._lock:
+            previous = self.snapshots.get(woeid)
+            if previous is not None:
+                self.previous[woeid] = previous
+            self.snapshots[woeid] = snapshot
+        self.on_update(snapshot, diff_trends(previous, snapshot))
+        return snapshot
+
+    def _claim(
+        self, woeid: int, block: bool = True
+    ) -> Tuple[Optional[Future], bool, float]:
+        """
+        Join the fetch running for the woeid, or own a new fetch.
+        :param woeid: The where-on-earth ID for a location.
+        :param block: If False, reserve a request from the rate limit before owning the fetch.
+        :return: The fetch future, None if no request left. Whether the caller owns the fetch.
+            Seconds to wait for the rate limit.
+        """
+        with self._lock:
+            future = self._inflight.get(woeid)
+            if future is not None:
+                return future, False, 0.0
+            if not block:
+                # reserve and own under the lock, only the owner sends the reserved request.
+                wait = self.api.rate_limit.acquire(self._url(woeid), block=False)
+                if wait:
+                    return None, False, wait
+            future = self._inflight[woeid] = Future()
+        return future, True, 0.0
+
+    def _complete(self, woeid: int, future: Future, acquire: bool) -> TrendsSnapshot:
+        try:
+            if acquire:
+                self.api.rate_limit.acquire(self._url(woeid))
+            future.set_result(self._fetch(woeid))
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._inflight[woeid]
+        return future.result()
+
+    def refresh(self, woeid: int) -> TrendsSnapshot:
+        """
+        Fetch the trends, or wait for the fetch already running for the woeid.
+        Wait for the rate limit if no request left.
+        :param woeid: The where-on-earth ID for a location.
+        :return: TrendsSnapshot
+        """
+        woeid = int(woeid)
+        future, owner, _ = self._claim(woeid)
+        if not owner:
+            return future.result()
+        return self._complete(woeid, future, acquire=True)
+
+    def get(
+        self, woeid: int, max_age: Optional[float] = None, allow_stale: bool = True
+    ) -> TrendsSnapshot:
+        """
+        :param woeid: The where-on-earth ID for a location.
+        :param max_age: Seconds for cached trends to be fresh, default is the service max age.
+        :param allow_stale: Return the stale cached trends instead of waiting for the rate limit.
+        :return: TrendsSnapshot, check `age` for the freshness.
+        """
+        woeid = int(woeid)
+        max_age = self.max_age if max_age is None else max_age
+        snapshot = self.snapshots.get(woeid)
+        if snapshot is not None and snapshot.age <= max_age:
+            return snapshot
+        if snapshot is not None and allow_stale:
+            future, owner, _ = self._claim(woeid, block=False)
+            if future is None:
+                return snapshot
+            if not owner:
+                return future.result()
+            return self._complete(woeid, future, acquire=False)
+        return self.refresh(woeid)
+
+    def changes(self, woeid: int) -> List[RankChange]:
+        """
+        :param woeid: The where-on-earth ID for a location.
+        :return: Rank changes between the last two polls.
+        """
+        snapshot = self.snapshots.get(int(woeid))
+        if snapshot is None:
+            return []
+        return diff_trends(self.previous.get(int(woeid)), snapshot)
+
+    def on_update(self, snapshot: TrendsSnapshot, changes: List[RankChange]) -> None:
+        """
+        Called after the trends for a location fetched, override it to handle the changes.
+        :param snapshot: New snapshot.
+        :param changes: Rank changes since the previous snapshot.
+        """
+
+    def _stalest(self) -> Optional[int]:
+        if not self.woeids:
+            return None
+        return min(
+            self.woeids,
+            key=lambda w: self.snapshots[w].fetched_at if w in self.snapshots else 0,
+        )
+
+    def _run(self) -> None:
+        interval = RateLimit.WINDOW / max(self.requests_per_window, 1)
+        while not self._stopped.is_set():
+            woeid = self._stalest()
+            wait = interval
+            if woeid is not None:
+                snapshot = self.snapshots.get(woeid)
+                if snapshot is not None and snapshot.age < self.max_age:
+                    wait = self.max_age - snapshot.age
+                else:
+                    future, owner, wait = self._claim(woeid, block=False)
+                    if future is not None:
+                        try:
+                            if owner:
+                                self._complete(woeid, future, acquire=False)
+                            else:
+                                future.result()
+                        except Exception as exc:
+                            logger.exception(f"Failed to refresh trends, exc: {exc}")
+                        wait = interval
+            self._stopped.wait(wait)
+
+    def start(self) -> threading.Thread:
+        """
+        Refresh the watched woeids in a background thread.
+        :return: The thread
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
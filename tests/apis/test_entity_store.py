@@ -0,0 +1,75 @@
+"""
+    tests for entity store
+"""
+
+import responses
+
+import pytwitter.models as md
+from pytwitter import Api, EntityStore
+
+
+@responses.activate
+def test_entity_store_across_pages(helpers):
+    tweets_data = helpers.load_json_data(
+        "testdata/apis/searches/search_tweets_query.json"
+    )
+    responses.add(
+        responses.GET,
+        url="https://api.twitter.com/2/tweets/search/recent",
+        json=tweets_data,
+    )
+
+    store = EntityStore()
+    api = Api(bearer_token="access token", entity_store=store)
+
+    resp1 = api.search_tweets(query="query", expansions="author_id")
+    resp2 = api.search_tweets(query="query", expansions="author_id")
+
+    user_id = resp1.includes.users[0].id
+    assert resp1.includes.users[0] is resp2.includes.users[0]
+    assert resp1.data[0] is resp2.data[0]
+    assert store.get(md.User, user_id) is not None
+    assert store.hits > 0
+
+    # return json not affect
+    resp_json = api.search_tweets(query="query", return_json=True)
+    assert resp_json["includes"]["users"][0]["id"] == user_id
+
+
+def test_entity_store_update_fields():
+    store = EntityStore()
+    api = Api(bearer_token="access token", entity_store=store)
+
+    resp = api._format_response(
+        {"data": {"id": "1", "text": "hello", "author_id": "2"}},
+        cls=md.Tweet,
+    )
+    tweet = resp.data
+    assert tweet.author_id == "2"
+
+    resp = api._format_response(
+        {"data": {"id": "1", "text": "hello", "lang": "en"}},
+        cls=md.Tweet,
+    )
+    assert resp.data is tweet
+    assert tweet.lang == "en"
+    assert tweet.author_id == "2"
+    assert len(store) == 1
+
+    store.clear()
+    assert len(store) == 0
+
+
+def test_entity_store_max_size():
+    store = EntityStore(max_size=2)
+    u1 = store.intern(md.User, {"id": "1", "name": "a"})
+    store.intern(md.User, {"id": "2", "name": "b"})
+    store.intern(md.User, {"id": "3", "name": "c"})
+    assert len(store) == 2
+    assert store.get(md.User, "1") is None
+    assert store.intern(md.User, {"id": "1", "name": "a"}) is not u1
+
+    # not interned object types
+    poll = store.intern(md.Poll, {"id": "1"})
+    assert poll.id == "1"
+    assert len(store) == 2
@@ -4,6 +4,8 @@
 
 import responses
 
+from pytwitter.testing import FakeTwitterServer
+
 
 @responses.activate
 def test_get_list(api, helpers):
@@ -285,3 +287,24 @@ def test_unpin_list(api_with_user, helpers):
 
     following = api_with_user.unpin_list(user_id=user_id, list_id=list_id)
     assert not following["data"]["pinned"]
+
+
+def test_sync_list_members(api_with_user, tmp_path):
+    path = str(tmp_path / "sync.db")
+    with FakeTwitterServer(auth_type="user", page_size=100, pages=2) as server:
+        api = server.configure(api_with_user)
+        # members on the fake server are 1000 to 1199.
+        desired = [str(user_id) for user_id in range(1050, 1250)]
+        resp = api.sync_list_members("1441162269824405510", desired, dry_run=True)
+        assert resp == {"add": 50, "remove": 50, "keep": 150}
+        assert not server.requests[("POST", "/lists/:id/members")]
+
+        resp = api.sync_list_members("1441162269824405510", desired, path=path)
+        assert resp == {"add": 50, "remove": 50, "keep": 150, "done": 100}
+        assert server.requests[("POST", "/lists/:id/members")] == 50
+        assert server.requests[("DELETE", "/lists/:id/members/:user_id")] == 50
+        assert server.requests[("GET", "/lists/:id/members")] == 4
+
+        # the fake members are not changed, the second sync counts its own actions only.
+        resp = api.sync_list_members("1441162269824405510", desired, path=path)
+        assert resp == {"add": 50, "remove": 50, "keep": 150, "done": 100}
@@ -70,6 +70,45 @@ def test_get_tweets(api, helpers):
     assert resp_json["includes"]["users"][0]["id"] == "2244994945"
 
 
+@responses.activate
+def test_response_includes_lookup(api, helpers):
+    tweet_data = helpers.load_json_data("testdata/apis/tweet/tweet_resp.json")
+    tweet_id = "1067094924124872705"
+    responses.add(
+        responses.GET,
+        url=f"https://api.twitter.com/2/tweets/{tweet_id}",
+        json=tweet_data,
+    )
+
+    resp = api.get_tweet(tweet_id=tweet_id, expansions="attachments.media_keys")
+    media = resp.media_of(resp.data)
+    assert len(media) == 1
+    assert media[0].media_key == "13_1064638969197977600"
+    assert resp.author_of(resp.data) is None
+    assert resp.referenced(resp.data) == []
+
+    tweets_data = helpers.load_json_data(
+        "testdata/apis/searches/search_tweets_query.json"
+    )
+    responses.add(
+        responses.GET,
+        url="https://api.twitter.com/2/tweets/search/recent",
+        json=tweets_data,
+    )
+
+    resp = api.search_tweets(
+        query="conversation_id:1273733248749690880",
+        expansions="author_id,referenced_tweets.id",
+    )
+    tweet = resp.data[0]
+    assert resp.author_of(tweet).id == tweet.author_id
+    assert resp.referenced(tweet)[0].id == "1275653067283759104"
+    # media key not expanded
+    assert resp.media_of(tweet) == []
+    assert resp.includes.get_user("not exists") is None
+    assert resp.includes.get_media("not exists") is None
+
+
 @responses.activate
 def test_like_and_unlike_tweet(api_with_user):
     user_id, tweet_id = "123456", "10987654321"
@@ -12,6 +12,32 @@ class Helpers:
             return json.loads(f.read().decode("utf-8"))
 
 
+class CollectingStreamApi(StreamApi):
+    """
+    Stream api collecting the tweets.
+
+    Disconnects when the server closes the stream. With `max_gaps`, reconnects on close and
+    disconnects after that many gaps.
+    """
+
+    def __init__(self, max_gaps=None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_gaps = max_gaps
+        self.tweets = []
+
+    def on_tweet(self, tweet):
+        self.tweets.append(tweet)
+
+    def on_gap(self, start, end, covered):
+        super().on_gap(start, end, covered)
+        if self.max_gaps is not None and len(self.gaps) >= self.max_gaps:
+            self.disconnect()
+
+    def on_closed(self, resp):
+        if self.max_gaps is None:
+            self.disconnect()
+
+
 @pytest.fixture
 def helpers():
     return Helpers
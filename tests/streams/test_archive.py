@@ -0,0 +1,65 @@
+"""
+    tests for the stream archive
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from pytwitter import PyTwitterError
+from pytwitter.archive import SegmentReader, SegmentWriter
+from pytwitter.testing import FakeTwitterServer
+from tests.conftest import CollectingStreamApi
+
+
+def test_archive_stream(tmp_path):
+    directory = str(tmp_path / "archive")
+    writer = SegmentWriter(directory, max_bytes=4096)
+    with FakeTwitterServer(stream_limit=50) as server:
+        api = server.configure(
+            CollectingStreamApi(bearer_token="bearer token", line_sinks=[writer])
+        )
+        api.sample_stream(return_json=True)
+    writer.close()
+
+    assert writer.lines == 50
+    assert len(writer.segments) > 1
+    assert not [name for name in os.listdir(directory) if name.endswith(".part")]
+    with gzip.open(writer.segments[0], "rb") as f:
+        assert json.loads(f.readline()) == api.tweets[0]
+
+    reader = SegmentReader(directory)
+    assert reader.segments() == writer.segments
+    assert [json.loads(line) for line in reader] == api.tweets
+
+    replay_api = CollectingStreamApi(bearer_token="bearer token", batch_size=20)
+    assert reader.replay(replay_api) == 50
+    assert [tweet.id for tweet in replay_api.tweets] == [
+        tweet["data"]["id"] for tweet in api.tweets
+    ]
+
+
+def test_archive_plain(tmp_path):
+    with SegmentWriter(str(tmp_path), compression="none", fsync_interval=0.01) as w:
+        w.write_lines([b'{"data": {"id": "1"}}', b"", b'{"data": {"id": "2"}}'])
+        w.write(b'{"data": {"id": "3"}}')
+
+    lines = list(SegmentReader(w.segments[0], chunk_size=8))
+    assert [json.loads(line)["data"]["id"] for line in lines] == ["1", "2", "3"]
+
+    with pytest.raises(PyTwitterError):
+        SegmentWriter(str(tmp_path), compression="lz4")
+
+
+def test_segment_names(tmp_path):
+    # writers restarted in the same second do not overwrite the segments.
+    segments = []
+    for idx in range(3):
+        with SegmentWriter(str(tmp_path), compression="none") as writer:
+            writer.write(b'{"data": {"id": "%d"}}' % idx)
+        segments += writer.segments
+    assert len(set(segments)) == 3
+    lines = [line for path in segments for line in SegmentReader(path)]
+    assert len(lines) == 3
@@ -0,0 +1,128 @@
+"""
+    tests for stream de-duplication and gap backfill
+"""
+
+import time
+
+from pytwitter import Api
+from pytwitter.continuity import (
+    Backfiller,
+    BloomFilter,
+    WindowedIdSet,
+    _format_time,
+)
+from pytwitter.testing import FakeTwitterServer
+from tests.conftest import CollectingStreamApi
+
+
+def test_dedup_sets():
+    ids = WindowedIdSet(max_size=2)
+    assert not ids.seen("1")
+    assert ids.seen("1")
+    assert not ids.seen("2")
+    assert not ids.seen("3")
+    assert len(ids) == 2
+    assert not ids.seen("1")
+
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    assert bloom.hashes == 7
+    assert sum(bloom.seen(str(idx)) for idx in range(150)) < 5
+    # ids in the previous generation are still remembered.
+    assert all(bloom.seen(str(idx)) for idx in range(150))
+    false_positives = sum(bloom.seen(f"new {idx}") for idx in range(1000))
+    assert false_positives < 50
+
+
+def test_stream_dedup_and_backfill():
+    # the fake stream restarts the tweet ids for each connection, like redelivered by backfill.
+    with FakeTwitterServer(stream_limit=10) as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        stream_api = server.configure(
+            CollectingStreamApi(
+                max_gaps=2,
+                bearer_token="bearer token",
+                dedup=BloomFilter(capacity=1000),
+            )
+        )
+        stream_api.manage_rules({"add": [{"value": "cat", "tag": "cats"}]})
+        # the fake server accepts recent end times.
+        backfiller = Backfiller(
+            api, stream_api, max_results=10, max_pages=1, end_time_delay=0
+        )
+        stream_api.gap_handler = backfiller
+
+        stream_api.search_stream(backfill_minutes=1, return_json=True)
+        assert [covered for _, _, covered in stream_api.gaps] == [True, True]
+        assert backfiller.backfilled == 0
+        assert len(stream_api.tweets) == 10
+        assert stream_api.duplicates >= 10
+
+        stream_api.tweets = []
+        stream_api.gaps.clear()
+        stream_api.dedup = WindowedIdSet()
+        stream_api.search_stream()
+        assert [covered for _, _, covered in stream_api.gaps] == [False, False]
+        assert backfiller.backfilled == 20
+        backfilled = [t for t in stream_api.tweets if len(t.id) < 19]
+        assert len(backfilled) == 10
+        assert backfilled[0].matching_rules[0].tag == "cats"
+
+
+def test_backfill_end_time():
+    with FakeTwitterServer() as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        stream_api = server.configure(
+            CollectingStreamApi(max_gaps=2, bearer_token="bearer token")
+        )
+        stream_api.manage_rules({"add": [{"value": "cat", "tag": "cats"}]})
+        backfiller = Backfiller(api, stream_api, max_pages=1)
+        search = ("GET", "/tweets/search/recent")
+
+        now = time.time()
+        backfiller(now - 5, now, covered=False)
+        assert server.requests[search] == 0
+
+        end_times = []
+        search_tweets = api.search_tweets
+
+        def record(**kwargs):
+            end_times.append(kwargs["end_time"])
+            return search_tweets(**kwargs)
+
+        api.search_tweets = record
+        backfiller(now - 60, now, covered=False)
+        assert server.requests[search] == 1
+        assert end_times[0] <= _format_time(now - 10)
+
+
+def test_gap_handler_thread():
+    with FakeTwitterServer(stream_limit=10) as server:
+        stream_api = server.configure(
+            CollectingStreamApi(max_gaps=2, bearer_token="bearer token")
+        )
+        read = []
+
+        def handler(start, end, covered):
+            count = len(stream_api.tweets)
+            time.sleep(0.3)
+            read.append(len(stream_api.tweets) - count)
+
+        stream_api.gap_handler = handler
+        stream_api.search_stream(return_json=True)
+    # the stream keeps reading while the gap handled.
+    assert len(read) == 2
+    assert read[0] > 0
+
+    # the gap marker moves to the end of a handled gap only.
+    stream_api._last_data_at = 100.0
+    stream_api.on_gap(100.0, 200.0, covered=False)
+    stream_api._close_gaps()
+    assert stream_api._last_data_at == 200.0
+
+    def failed(start, end, covered):
+        raise ValueError("search failed")
+
+    stream_api.gap_handler = failed
+    stream_api.on_gap(200.0, 300.0, covered=False)
+    stream_api._close_gaps()
+    assert stream_api._last_data_at == 200.0
@@ -0,0 +1,111 @@
+"""
+    tests for the stream hub
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from pytwitter.continuity import WindowedIdSet
+from pytwitter.hub import (
+    AsyncioSubscriber,
+    QueueSubscriber,
+    SocketSubscriber,
+    StreamHub,
+    Subscriber,
+    iter_socket_lines,
+)
+from pytwitter.testing import FakeTwitterServer
+
+
+class MyStreamHub(StreamHub):
+    def on_closed(self, resp):
+        self.disconnect()
+
+
+def test_stream_hub(tmp_path):
+    with FakeTwitterServer(stream_limit=20) as server:
+        hub = server.configure(MyStreamHub(bearer_token="bearer token"))
+        hub.manage_rules(
+            {"add": [{"value": "cat", "tag": "cats"}, {"value": "dog", "tag": "dogs"}]}
+        )
+        cats = hub.subscribe(QueueSubscriber(tags=["cats"]))
+        small = hub.subscribe(QueueSubscriber(maxsize=5, raw=True))
+        sock = hub.subscribe(SocketSubscriber(path=str(tmp_path / "hub.sock")))
+
+        lines = []
+
+        def read_socket():
+            for line in iter_socket_lines(sock.path):
+                lines.append(json.loads(line))
+
+        async def main():
+            everything = hub.subscribe(AsyncioSubscriber())
+            reader = threading.Thread(target=read_socket)
+            reader.start()
+            while not sock.clients:
+                await asyncio.sleep(0.01)
+            hub.start()
+            items = [item async for item in everything]
+            reader.join(timeout=5)
+            return items
+
+        items = asyncio.run(main())
+
+    assert len(items) == 20
+    assert items[0].matching_rules[0].tag in ("cats", "dogs")
+
+    tweets = list(cats)
+    assert len(tweets) == 10
+    assert all(tweet.matching_rules[0].tag == "cats" for tweet in tweets)
+    assert tweets[0] is next(item for item in items if item.id == tweets[0].id)
+
+    # the oldest item dropped for the close signal when full.
+    assert small.dropped == 16
+    assert len(list(small)) == 4
+    assert len(lines) == 20
+    assert lines[-1]["data"]["id"] == items[-1].id
+
+
+def test_stream_hub_dedup():
+    hub = StreamHub(bearer_token="bearer token", dedup=WindowedIdSet())
+    tweets = hub.subscribe(QueueSubscriber())
+    raw = hub.subscribe(QueueSubscriber(raw=True))
+    line = {"data": {"id": "1", "text": "cat"}, "matching_rules": [{"tag": "cats"}]}
+
+    hub.on_data(json.dumps(line).encode("utf-8"))
+    # backfilled tweets are delivered to the hub without raw line.
+    hub.deliver({"data": {"id": "2", "text": "dog"}, "matching_rules": []})
+    hub.deliver(line)
+    hub.close()
+
+    assert [tweet.id for tweet in tweets] == ["1", "2"]
+    assert [json.loads(item)["data"]["id"] for item in raw] == ["1", "2"]
+    assert hub.duplicates == 1
+    assert hub.stats.tweets == 2
+
+
+def test_asyncio_subscriber_counts():
+    with pytest.raises(TypeError):
+        Subscriber()
+
+    async def main():
+        subscriber = AsyncioSubscriber(maxsize=2)
+        for idx in range(3):
+            subscriber.put(idx)
+        # items are counted when the event loop put them in the queue.
+        assert subscriber.delivered == 0
+        await asyncio.sleep(0)
+        return subscriber
+
+    loop = asyncio.new_event_loop()
+    subscriber = loop.run_until_complete(main())
+    assert subscriber.delivered == 3
+    assert subscriber.dropped == 1
+    loop.close()
+
+    subscriber.put(3)
+    assert subscriber.delivered == 3
+    assert subscriber.dropped == 2
@@ -0,0 +1,70 @@
+"""
+    tests for the tweet router
+"""
+
+import pytest
+
+from pytwitter import PyTwitterError, StreamApi
+from pytwitter.models import StreamRule, Tweet
+from pytwitter.router import TweetRouter
+from pytwitter.testing import FakeTwitterServer
+
+
+def make_tweet(*rules):
+    return Tweet(
+        id="1",
+        text="text",
+        matching_rules=[StreamRule(id=rule_id, tag=tag) for rule_id, tag in rules],
+    )
+
+
+def test_router_route():
+    router = TweetRouter()
+    received = []
+
+    for idx in range(500):
+        router.add_handler(
+            lambda t, idx=idx: received.append(f"tag{idx}"), tag=f"t{idx}"
+        )
+    router.add_handler(lambda t: received.append("id"), rule_id="100")
+    router.add_handler(lambda t: received.append("*"), tag="*")
+    router.add_handler(lambda t: received.append("default"), default=True)
+
+    @router.on(tag="cats")
+    @router.on(tag="kittens")
+    def cats(tweet):
+        received.append("cats")
+
+    assert router.route(make_tweet(("1", "t3"))) == 2
+    assert received == ["tag3", "*"]
+
+    received.clear()
+    assert router.route(make_tweet(("100", "cats"), ("101", "kittens"))) == 3
+    assert sorted(received) == ["*", "cats", "id"]
+
+    received.clear()
+    assert router.route({"data": {}, "matching_rules": [{"id": "9", "tag": "x"}]}) == 2
+    assert received == ["default", "*"]
+
+    with pytest.raises(PyTwitterError):
+        router.add_handler(print, tag="a", rule_id="1")
+
+
+def test_router_workers():
+    router = TweetRouter()
+    received = []
+    router.add_handler(received.append, tag="cats", workers=2, maxsize=5)
+
+    with FakeTwitterServer(stream_limit=20) as server:
+
+        class MyStreamApi(StreamApi):
+            def on_closed(self, resp):
+                self.disconnect()
+
+        api = server.configure(MyStreamApi(bearer_token="bearer token", router=router))
+        api.manage_rules({"add": [{"value": "cat", "tag": "cats"}, {"value": "dog"}]})
+        api.search_stream()
+
+    router.join()
+    assert len(received) == 10
+    router.close()
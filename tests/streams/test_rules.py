@@ -5,7 +5,10 @@
 import pytest
 import responses
 
-from pytwitter import PyTwitterError
+from pytwitter import PyTwitterError, StreamApi
+from pytwitter.models import StreamRule
+from pytwitter.rules import RuleSet
+from pytwitter.testing import FakeTwitterServer, RULES_PATH
 
 
 @responses.activate
@@ -88,3 +91,91 @@ def test_manage_rules(stream_api, helpers):
         stream_api.manage_rules(
             rules={"delete": {"ids": ["1165037377523306499"]}},
         )
+
+
+def test_rule_set_diff():
+    rules = RuleSet(["cat", {"value": "dog", "tag": "dogs"}])
+    rules.add("bird", tag="birds")
+    assert len(rules) == 3
+    assert "cat" in rules
+    assert {"value": "dog", "tag": "dogs"} in rules
+
+    diff = rules.diff(
+        [
+            StreamRule(id="1", value="cat"),
+            StreamRule(id="2", value="cat"),
+            StreamRule(id="3", value="dog", tag="old"),
+        ]
+    )
+    assert [rule.id for rule in diff.keep] == ["1"]
+    assert [rule.id for rule in diff.delete] == ["2", "3"]
+    assert diff.add == [
+        {"value": "dog", "tag": "dogs"},
+        {"value": "bird", "tag": "birds"},
+    ]
+    assert diff.changed
+
+
+def test_rule_set_reconcile():
+    with FakeTwitterServer() as server:
+        api = server.configure(StreamApi(bearer_token="bearer token"))
+        api.manage_rules(
+            {
+                "add": [
+                    {"value": "cat", "tag": "cats"},
+                    {"value": "dog", "tag": "old"},
+                    {"value": "fish"},
+                ]
+            }
+        )
+
+        desired = [{"value": "cat", "tag": "cats"}, {"value": "dog", "tag": "dogs"}]
+        desired += [{"value": f"rule {idx}"} for idx in range(25)]
+        rules = RuleSet(desired)
+
+        diff = rules.reconcile(api, dry_run=True, batch_size=10)
+        assert len(diff.add) == 26
+        assert len(diff.delete) == 2
+        assert len(server.rules) == 3
+
+        server.requests.clear()
+        diff = rules.reconcile(api, batch_size=10)
+        # get rules, 3 validate, 1 delete the tag changed rule, 3 add, 1 delete
+        assert diff.requests == 9
+        assert server.requests[("POST", RULES_PATH)] == 8
+        assert sorted((r["value"], r.get("tag")) for r in server.rules.values()) == (
+            sorted((r["value"], r.get("tag")) for r in desired)
+        )
+
+        diff = rules.reconcile(api)
+        assert not diff.changed
+        assert diff.requests == 1
+
+        with pytest.raises(PyTwitterError) as exc:
+            RuleSet(desired + [{"value": "cat", "tag": "kitten"}]).reconcile(api)
+        assert exc.value.message["errors"][0]["title"] == "DuplicateRule"
+
+
+def test_rule_set_reconcile_pages():
+    with FakeTwitterServer() as server:
+        api = server.configure(StreamApi(bearer_token="bearer token"))
+        api.manage_rules({"add": [{"value": f"rule {idx}"} for idx in range(5)]})
+
+        resp = api.get_rules(max_results=3)
+        assert len(resp.data) == 3
+        assert resp.meta.next_token == "1"
+        resp = api.get_rules(max_results=3, pagination_token=resp.meta.next_token)
+        assert len(resp.data) == 2
+        assert resp.meta.next_token is None
+
+        # the rules on the second page are kept, not added again.
+        rules = RuleSet([f"rule {idx}" for idx in range(1, 6)])
+        diff = rules.reconcile(api, page_size=3)
+        assert [rule.value for rule in diff.delete] == ["rule 0"]
+        assert diff.add == [{"value": "rule 5"}]
+        assert len(diff.keep) == 4
+        assert diff.requests == 2 + 2 + 1
+
+        diff = rules.reconcile(api, page_size=3)
+        assert not diff.changed
+        assert diff.requests == 2
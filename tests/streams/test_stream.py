@@ -4,6 +4,7 @@
 
 import json
 import random
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import patch
 
 import pytest
@@ -11,6 +12,8 @@ import responses
 from responses import matchers
 
 from pytwitter import StreamApi, PyTwitterError
+from pytwitter.streaming import iter_line_batches
+from pytwitter.testing import FakeTwitterServer
 
 
 class MyStreamApi(StreamApi):
@@ -84,11 +87,17 @@ def test_stream_connect():
     )
 
     stream_api = MyStreamApi(bearer_token="bearer token")
+    records = []
+    stream_api.add_hook(records.append)
 
     stream_api.sample_stream(backfill_minutes=1)
 
     assert not stream_api.running
     assert stream_api.tweet_max_count == 10
+    assert records[0].stream
+    assert records[0].endpoint == "/tweets/sample/stream"
+    assert records[0].status_code == 200
+    assert sum(record.lines for record in records) >= 10
 
 
 @responses.activate
@@ -107,3 +116,92 @@ def test_stream_error(patched_time_sleep):
 
     api = StreamApi(bearer_token="bearer token", max_retries=10)
     api.search_stream(backfill_minutes=1)
+
+
+def test_iter_line_batches():
+    chunks = [
+        b'{"id": 1}\r\n{"id"',
+        b": 2}\r",
+        b"\n\r\n\r\n",
+        b'{"id": 3}\r\n{"id": 4}',
+    ]
+    batches = list(iter_line_batches(chunks))
+    assert batches == [
+        [b'{"id": 1}'],
+        [b'{"id": 2}', b"", b""],
+        [b'{"id": 3}'],
+        [b'{"id": 4}'],
+    ]
+    assert list(iter_line_batches([b"\r\n"])) == [[b""]]
+
+
+@pytest.mark.parametrize("decode_processes", [None, 2])
+def test_stream_batches(decode_processes):
+    class BatchStreamApi(StreamApi):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.batches = []
+
+        def on_batch(self, tweets):
+            self.batches.append(tweets)
+
+        def on_closed(self, resp):
+            self.disconnect()
+
+    with FakeTwitterServer(stream_limit=25) as server:
+        api = server.configure(
+            BatchStreamApi(
+                bearer_token="bearer token",
+                batch_size=10,
+                decode_processes=decode_processes,
+            )
+        )
+        api.sample_stream()
+
+    assert [len(batch) for batch in api.batches] == [10, 10, 5]
+    ids = [tweet.id for batch in api.batches for tweet in batch]
+    assert ids == sorted(ids)
+
+
+def test_stream_batches_keep_alive():
+    class BatchStreamApi(StreamApi):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.batches = []
+
+        def on_batch(self, tweets):
+            self.batches.append(tweets)
+
+    api = BatchStreamApi(bearer_token="bearer token", batch_size=2, decode_processes=1)
+    api.running = True
+    api._executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        api.on_lines([b'{"data": {"id": "1"}}', b'{"data": {"id": "2"}}'])
+        api._pending[0].result()
+        # decoded batch is delivered with the next keep alive, not wait for more tweets.
+        api.on_lines([b""])
+        assert [[tweet.id for tweet in batch] for batch in api.batches] == [["1", "2"]]
+        assert not api._pending
+    finally:
+        api._executor.shutdown(wait=True)
+
+
+def test_stream_watchdog():
+    class SlowStreamApi(StreamApi):
+        def on_tweet(self, tweet):
+            if self.stats.tweets >= 3:
+                self.disconnect()
+
+    # one tweet per second, the connection will be closed after 0.2 second silence.
+    with FakeTwitterServer(stream_rate=1) as server:
+        api = server.configure(
+            SlowStreamApi(bearer_token="bearer token", stall_timeout=0.2)
+        )
+        api.sample_stream(return_json=True)
+
+    stats = api.stats.snapshot()
+    assert stats["tweets"] == 3
+    assert stats["stalls"] == 2
+    assert stats["reconnects"] == 2
+    assert stats["lines_per_second"] > 0
+    assert 0 <= stats["lag"] < 5
@@ -0,0 +1,110 @@
+"""
+    tests for the write action queue
+"""
+
+import time
+
+import pytest
+
+from pytwitter import Api, PyTwitterError, RateLimit
+from pytwitter.actions import ACTIONS, ActionQueue
+from pytwitter.testing import FakeTwitterServer
+
+
+@pytest.fixture
+def server():
+    with FakeTwitterServer(auth_type="user", rate_limit_window=1) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server):
+    return server.configure(
+        Api(
+            consumer_key="consumer key",
+            consumer_secret="consumer secret",
+            access_token="1-access token",
+            access_secret="access secret",
+        )
+    )
+
+
+@pytest.mark.parametrize("name", sorted(ACTIONS))
+def test_action_rate_limits(name):
+    spec = ACTIONS[name]
+    rate_limit = RateLimit(auth_type="user")
+    url = Api.BASE_URL_V2 + spec.path.format(owner="1", target="2")
+    endpoint = rate_limit.url_to_endpoint(url)
+    assert endpoint.regex is not None
+    limit = endpoint.get_limit(auth_type="user", method=spec.verb)
+    assert limit > 0
+    # the queue paces the action by the window.
+    for _ in range(limit):
+        assert rate_limit.acquire(url, method=spec.verb, block=False) == 0
+    assert rate_limit.acquire(url, method=spec.verb, block=False) > 0
+
+
+def test_action_queue_dedup(api):
+    with ActionQueue(api) as actions:
+        assert actions.add("follow", owner="1", target="2")
+        assert actions.add("follow", owner="1", target="2") is None
+        assert actions.add("unfollow", owner="1", target="2") is None
+        assert actions.add("like", owner="1", target="3")
+        assert actions.add_many([("mute", "1", "4"), ("unlike", "1", "3")]) == 1
+        assert actions.counts() == {"cancelled": 2, "pending": 1}
+
+        actions.add("add_list_member", owner="9", target="2")
+        assert actions.cancel("9", ["add_list_member"]) == 1
+        assert actions.counts("9") == {"cancelled": 1}
+
+        with pytest.raises(PyTwitterError):
+            actions.add("poke", owner="1", target="2")
+
+
+def test_action_queue_rate_limit(server, api):
+    with ActionQueue(api) as actions:
+        actions.add_many(("follow", "1", str(target)) for target in range(100, 120))
+        actions.add_many(
+            ("add_list_member", "9", str(target)) for target in range(100, 105)
+        )
+        # the fake server windows end at whole seconds, start one at the beginning of a second.
+        time.sleep(1 - time.time() % 1)
+        start = time.monotonic()
+        assert actions.run(workers=4) == {"done": 25}
+        # 15 follows for a window, the others wait for the next window without 429.
+        assert time.monotonic() - start >= 0.5
+        assert server.requests[("POST", "/users/:id/following")] == 20
+        assert server.requests[("POST", "/lists/:id/members")] == 5
+
+
+def test_action_queue_resume(tmp_path, server, api):
+    path = str(tmp_path / "actions.db")
+    with ActionQueue(api, path=path) as actions:
+        actions.add_many(("like", "1", str(target)) for target in range(10))
+        assert actions.run(timeout=0) == {"pending": 10}
+        assert actions.run() == {"done": 10}
+
+    with ActionQueue(api, path=path) as actions:
+        actions.add("like", owner="1", target="10")
+        assert actions.run() == {"done": 11}
+    assert server.requests[("POST", "/users/:id/likes")] == 11
+
+    # run the same adds again after a restart, done actions are not sent again.
+    with ActionQueue(api, path=path) as actions:
+        assert actions.add_many(("like", "1", str(target)) for target in range(11)) == 0
+        assert actions.add("unlike", owner="1", target="3")
+        assert actions.run() == {"done": 12}
+        # liked again after the unlike.
+        assert actions.add("like", owner="1", target="3")
+        assert actions.add("like", owner="1", target="4", skip_done=False)
+        assert actions.run() == {"done": 14}
+    assert server.requests[("POST", "/users/:id/likes")] == 13
+
+
+def test_action_queue_failed(api):
+    with FakeTwitterServer(error_rate=1) as server:
+        server.configure(api)
+        with ActionQueue(api, max_attempts=2) as actions:
+            actions.add("block", owner="1", target="2")
+            assert actions.run() == {"failed": 1}
+        assert server.requests[("POST", "/users/:id/blocking")] == 2
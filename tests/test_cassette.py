@@ -0,0 +1,110 @@
+"""
+    tests for the record and replay cassette
+"""
+
+import base64
+import time
+
+import pytest
+import responses
+
+from pytwitter import Api, PyTwitterError
+from pytwitter.cassette import Cassette, _RecordingRaw, _ReplayRaw
+from pytwitter.testing import FakeTwitterServer
+from tests.conftest import CollectingStreamApi
+
+
+def test_cassette_api(tmp_path):
+    path = str(tmp_path / "api.jsonl.gz")
+    with FakeTwitterServer(latency=0.05) as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        with Cassette(path, mode="record").install(api):
+            recorded = api.get_tweet(tweet_id="123", return_json=True)
+            api.get_timelines(user_id="12", max_results=5)
+
+    # server stopped, replay from the cassette.
+    api = server.configure(Api(bearer_token="bearer token"))
+    with Cassette(path).install(api):
+        start = time.perf_counter()
+        assert api.get_tweet(tweet_id="123", return_json=True) == recorded
+        assert len(api.get_timelines(user_id="12", max_results=5).data) == 5
+        assert time.perf_counter() - start < 0.05
+        assert api.rate_limit.get_limit(url=f"{api.BASE_URL_V2}/tweets/123")
+
+        with pytest.raises(PyTwitterError):
+            api.get_tweet(tweet_id="123")
+
+    with Cassette(path, speed=1, repeat=True).install(api):
+        for _ in range(2):
+            start = time.perf_counter()
+            api.get_tweet(tweet_id="123")
+            assert time.perf_counter() - start >= 0.05
+
+
+def test_cassette_uninstall(tmp_path):
+    path = str(tmp_path / "api.jsonl.gz")
+    with FakeTwitterServer() as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        adapters = dict(api.session.adapters)
+        with Cassette(path, mode="record").install(api):
+            api.get_user(user_id="5")
+        assert dict(api.session.adapters) == adapters
+
+    with Cassette(path).install(api):
+        assert api.get_user(user_id="5").data.id == "5"
+
+    # live calls after the cassette closed.
+    assert dict(api.session.adapters) == adapters
+    with responses.RequestsMock() as mock:
+        mock.add(
+            responses.GET,
+            url=f"{api.BASE_URL_V2}/users/5",
+            json={"data": {"id": "5", "name": "five", "username": "five"}},
+        )
+        assert api.get_user(user_id="5").data.name == "five"
+
+
+def test_cassette_stream(tmp_path):
+    path = str(tmp_path / "stream.jsonl.gz")
+    with FakeTwitterServer(stream_limit=20, stream_rate=200) as server:
+        stream_api = server.configure(CollectingStreamApi(bearer_token="bearer token"))
+        with Cassette(path, mode="record").install(stream_api):
+            stream_api.sample_stream(return_json=True)
+    assert len(stream_api.tweets) == 20
+
+    replay_api = server.configure(CollectingStreamApi(bearer_token="bearer token"))
+    with Cassette(path, speed=2).install(replay_api):
+        start = time.perf_counter()
+        replay_api.sample_stream(return_json=True)
+        elapsed = time.perf_counter() - start
+    assert replay_api.tweets == stream_api.tweets
+    # 20 tweets at 200 per second, replay 2x faster.
+    assert 0.03 <= elapsed < 0.5
+
+
+def test_cassette_mode(tmp_path):
+    with pytest.raises(PyTwitterError):
+        Cassette(str(tmp_path / "c.jsonl.gz"), mode="edit")
+
+
+def test_cassette_split_chunks():
+    class Raw:
+        def stream(self, amt, decode_content=None):
+            # "é" split between chunks.
+            yield from (b'{"text": "caf\xc3', b'\xa9"}\r\n')
+
+    class Recorder:
+        entries = []
+
+        def _write(self, entry):
+            self.entries.append(entry)
+
+    entry = {"chunks_b64": []}
+    raw = _RecordingRaw(Raw(), entry, Recorder())
+    recorded = b"".join(raw.stream())
+
+    replayed = _ReplayRaw(
+        [(o, base64.b64decode(c)) for o, c in entry["chunks_b64"]], None
+    )
+    assert b"".join(replayed.stream()) == recorded
+    assert recorded.decode("utf-8") == '{"text": "café"}\r\n'
@@ -0,0 +1,39 @@
+"""
+    tests for the parallel map executor
+"""
+
+import pytest
+
+from pytwitter import Api, PyTwitterError
+from pytwitter.testing import FakeTwitterServer
+
+
+def test_map():
+    with FakeTwitterServer(auth_type="user", rate_limit_window=1) as server:
+        api = server.configure(
+            Api(
+                consumer_key="consumer key",
+                consumer_secret="consumer secret",
+                access_token="1-access token",
+                access_secret="access secret",
+            )
+        )
+        kwargs_list = [{"user_id": str(i), "max_results": 10} for i in range(20)]
+        # unknown argument fails the call only.
+        kwargs_list.insert(3, {"user_id": "1", "unknown": 1})
+
+        results = list(
+            api.map("get_following", kwargs_list, concurrency=4, ordered=True)
+        )
+        assert [result.index for result in results] == list(range(21))
+        assert isinstance(results[3].error, TypeError)
+        assert all(r.ok and r.attempts == 1 for r in results if r.index != 3)
+        assert results[0].value.data[0].id
+        # 15 requests for a window, the others wait for the next window without 429.
+        assert server.requests[("GET", "/users/:id/following")] == 20
+
+        results = api.map("get_user", ({"user_id": str(i)} for i in range(5)))
+        assert sorted(result.index for result in results) == list(range(5))
+
+    with pytest.raises(PyTwitterError):
+        api.map("_request", [{}])
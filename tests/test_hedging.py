@@ -0,0 +1,96 @@
+"""
+    tests for hedged requests
+"""
+
+import itertools
+import time
+
+import pytest
+from requests.models import Response
+
+from pytwitter import Api, RateLimit
+from pytwitter.hedging import HedgePolicy
+from pytwitter.metrics import RequestRecord
+from pytwitter.testing import FakeTwitterServer
+
+
+def test_hedge_policy():
+    slow = {20: 1.0, 22: 0.6, 23: 1.2, 24: 1.0}
+    counter = itertools.count()
+    # the 21st request is slow and its hedge wins, the hedge for the 23rd is slower and loses.
+    latency = lambda: slow.get(next(counter), 0.01)  # noqa: E731
+
+    with FakeTwitterServer(latency=latency) as server:
+        hedge = HedgePolicy(min_samples=20, max_delay=0.5)
+        api = server.configure(Api(bearer_token="bearer token", hedge_policy=hedge))
+        assert hedge in api.hooks
+        for _ in range(20):
+            api.get_tweet("1")
+        assert hedge.delay("/tweets/:id") < 0.5
+        assert hedge.delay("/users/:id") is None
+
+        start = time.perf_counter()
+        resp = api.get_tweet("1")
+        assert time.perf_counter() - start < 0.9
+        assert resp.data.id == "1"
+        assert server.requests[("GET", "/tweets/:id")] == 22
+
+        stats = hedge.stats()
+        assert stats["fired"] == stats["won"] == 1
+        assert stats["endpoints"]["/tweets/:id"]["won"] == 1
+
+        start = time.perf_counter()
+        api.get_tweet("1")
+        assert time.perf_counter() - start < 1.0
+        stats = hedge.stats()
+        assert stats["fired"] == 2
+        assert stats["won"] == 1
+
+        # no budget left for hedges.
+        hedge._tokens = 0
+        api.get_tweet("1")
+        stats = hedge.stats()
+        assert stats["fired"] == 2
+        assert stats["skipped"] == 1
+        assert server.requests[("GET", "/tweets/:id")] == 25
+        hedge.close()
+
+
+def test_hedge_reservation():
+    url = "https://api.twitter.com/2/tweets/1"
+    hedge = HedgePolicy(min_samples=1, min_delay=0.01, min_remaining=0)
+    hedge.on_response(RequestRecord(endpoint="/tweets/:id", network_time=0.01))
+    rate_limit = RateLimit()
+    limit = rate_limit.get_limit(url=url).limit
+
+    def failed():
+        time.sleep(0.2)
+        raise ConnectionError("timeout")
+
+    sent = []
+
+    def slow():
+        sent.append(time.time())
+        time.sleep(0.1)
+        resp = Response()
+        resp.status_code = 200
+        return resp
+
+    # both failed, the hedge reservation is released.
+    with pytest.raises(ConnectionError):
+        hedge.send(url, failed, rate_limit)
+    hedge.close()
+    assert rate_limit._inflight[("/tweets/:id", "GET")] == 0
+    assert rate_limit.get_limit(url=url).remaining == limit - 1
+
+    # the hedge waiting in the pool is cancelled, and given back to the rate limit window.
+    hedge = HedgePolicy(min_samples=1, min_delay=0.01, min_remaining=0, max_workers=1)
+    hedge.on_response(RequestRecord(endpoint="/tweets/:id", network_time=0.01))
+    blocker = hedge._get_executor().submit(time.sleep, 0.5)
+    assert hedge.send(url, slow, rate_limit).status_code == 200
+    blocker.result()
+    hedge.close()
+    assert len(sent) == 1
+    assert hedge.stats()["fired"] == 1
+    assert rate_limit._inflight[("/tweets/:id", "GET")] == 0
+    assert rate_limit.get_limit(url=url).remaining == limit - 1
@@ -0,0 +1,50 @@
+"""
+    tests for lazy imports
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import pytwitter
+import pytwitter.models as md
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_import_not_load_heavy_modules():
+    code = (
+        "import sys, pytwitter;"
+        "print(sorted(m for m in ('pytwitter.api', 'pytwitter.streaming', 'pytwitter.models.tweet', "
+        "'requests', 'authlib', 'dataclasses_json') if m in sys.modules))"
+    )
+    assert run_python(code) == "[]"
+
+    code = (
+        "import sys; from pytwitter import Api;"
+        "print('authlib' in sys.modules, 'pytwitter.models.tweet' in sys.modules)"
+    )
+    assert run_python(code) == "False False"
+
+
+def test_lazy_attributes():
+    assert pytwitter.Api.__name__ == "Api"
+    assert pytwitter.StreamApi.__name__ == "StreamApi"
+    assert "Api" in dir(pytwitter)
+    with pytest.raises(AttributeError):
+        pytwitter.NotExists
+
+    assert md.Tweet.__module__ == "pytwitter.models.tweet"
+    assert md.Response.__module__ == "pytwitter.models.ext"
+    assert "User" in dir(md)
+    with pytest.raises(AttributeError):
+        md.NotExists
+
+    namespace = {}
+    exec("from pytwitter.models import *", namespace)
+    assert namespace["Includes"] is md.Includes
@@ -0,0 +1,253 @@
+"""
+    tests for request hooks and metrics
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from pytwitter import Api, PyTwitterError, RateLimit
+from pytwitter.metrics import (
+    TWEET_ENDPOINTS,
+    Histogram,
+    LatencyHistogram,
+    OpenTelemetryHook,
+    PrometheusExporter,
+    RequestHook,
+    RequestRecord,
+    StreamStats,
+    UsageMeter,
+)
+from pytwitter.testing import FakeTwitterServer
+
+
+@responses.activate
+def test_request_hooks(helpers):
+    tweet_data = helpers.load_json_data("testdata/apis/tweet/tweets_resp.json")
+    responses.add(
+        responses.GET,
+        url="https://api.twitter.com/2/tweets",
+        json=tweet_data,
+        headers={
+            "x-rate-limit-limit": "300",
+            "x-rate-limit-remaining": "299",
+            "x-rate-limit-reset": "1612519043",
+        },
+    )
+    responses.add(
+        responses.GET,
+        url="https://api.twitter.com/2/tweets/123",
+        json={"errors": [{"title": "Not Found Error"}]},
+        status=404,
+    )
+
+    records = []
+    histogram = LatencyHistogram()
+    api = Api(bearer_token="access token", hooks=[histogram])
+    api.add_hook(records.append)
+
+    resp = api.get_tweets(tweet_ids=["1261326399320715264", "1278347468690915330"])
+    assert len(resp.data) == 2
+    assert len(records) == 1
+    record = records[0]
+    assert record.endpoint == "/tweets"
+    assert record.method == "GET"
+    assert record.status_code == 200
+    assert record.bytes > 0
+    assert record.rate_limit_remaining == 299
+    assert record.result_count == 2
+    assert record.build_time > 0
+    assert record.latency >= record.network_time
+
+    api.get_tweets(tweet_ids="1261326399320715264", return_json=True)
+    assert len(records) == 2
+    assert records[1].build_time == 0
+
+    with pytest.raises(PyTwitterError):
+        api.get_tweet(tweet_id="123")
+    assert len(records) == 3
+    assert records[2].status_code == 404
+    assert records[2].error is not None
+
+    assert histogram.get("/tweets").count == 2
+    assert histogram.percentile("/tweets", 0.5) is not None
+    assert histogram.summary()[0]["endpoint"] in ("/tweets", "/tweets/:id")
+
+    text = PrometheusExporter(histogram).render()
+    assert (
+        'pytwitter_request_duration_seconds_count{endpoint="/tweets",method="GET",phase="total"} 2'
+        in text
+    )
+    assert (
+        'pytwitter_requests_total{endpoint="/tweets/:id",method="GET",status="404"} 1'
+        in text
+    )
+    assert 'pytwitter_rate_limit_remaining{endpoint="/tweets",method="GET"} 299' in text
+
+    api.remove_hook(records.append)
+    api.get_tweets(tweet_ids="1261326399320715264", return_json=True)
+    assert len(records) == 3
+
+
+@responses.activate
+def test_request_hook_abort():
+    class Abort(RequestHook):
+        def on_request(self, record):
+            raise PyTwitterError("Budget exceeded")
+
+    api = Api(bearer_token="access token", hooks=[Abort()])
+    with pytest.raises(PyTwitterError):
+        api.get_tweet(tweet_id="123")
+    assert len(responses.calls) == 0
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.5))
+    assert histogram.percentile(0.5) is None
+    for value in (0.05, 0.15, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+    assert histogram.count == 5
+    assert 0.1 <= histogram.percentile(0.5) <= 0.2
+    assert histogram.percentile(1) == 0.5
+    assert histogram.cumulative_counts()[-1] == (float("inf"), 5)
+
+
+@responses.activate
+def test_opentelemetry_hook():
+    class FakeInstrument:
+        def __init__(self):
+            self.values = []
+
+        def record(self, value, attributes=None):
+            self.values.append((value, attributes))
+
+        add = record
+
+    class FakeMeter:
+        def __init__(self):
+            self.instruments = {}
+
+        def create_histogram(self, name, unit="", description=""):
+            return self.instruments.setdefault(name, FakeInstrument())
+
+        def create_counter(self, name, unit="", description=""):
+            return self.instruments.setdefault(name, FakeInstrument())
+
+    responses.add(
+        responses.GET,
+        url="https://api.twitter.com/2/tweets/123",
+        json={"data": {"id": "123", "text": "hello"}},
+    )
+    meter = FakeMeter()
+    api = Api(bearer_token="access token", hooks=[OpenTelemetryHook(meter=meter)])
+    api.get_tweet(tweet_id="123")
+
+    durations = meter.instruments["pytwitter.request.duration"].values
+    assert len(durations) == 4
+    assert durations[0][1]["endpoint"] == "/tweets/:id"
+    assert meter.instruments["pytwitter.response.size"].values[0][0] > 0
+
+
+def test_usage_meter():
+    with FakeTwitterServer() as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        meter = UsageMeter(job_budget=25, api=api)
+        api.add_hook(meter)
+
+        api.get_tweet("123")
+        api.search_tweets(query="cat", max_results=10)
+        api.get_users(ids=["1", "2"])
+        assert meter.tweets == 11
+        assert dict(meter.endpoints) == {"/tweets/:id": 1, "/tweets/search/recent": 10}
+        assert meter.project_cap == 10000000
+        assert meter.estimated_usage == 11
+
+        # not send the request will exceed the budget.
+        api.search_tweets(query="cat", max_results=10)
+        with pytest.raises(PyTwitterError):
+            api.search_tweets(query="cat", max_results=10)
+        assert server.requests[("GET", "/tweets/search/recent")] == 2
+
+        projection = meter.projection()
+        assert projection["remaining"] == 10000000 - 21
+        assert projection["reset_at"].day == 1
+        assert projection["exhausted_before_reset"]
+
+        meter = UsageMeter(daily_budget=15, throttle=True)
+        api.hooks = [meter]
+        api.search_tweets(query="cat", max_results=10)
+        with patch("time.sleep", side_effect=lambda _: meter.daily.clear()) as sleep:
+            api.search_tweets(query="cat", max_results=10)
+            assert sleep.call_count == 1
+
+        meter.throttle = False
+        with pytest.raises(PyTwitterError):
+            api.search_tweets(query="cat", max_results=10)
+
+
+def test_stream_stats_tweets():
+    stats = StreamStats()
+    assert stats.lag is None
+
+    def deliver():
+        for _ in range(1000):
+            stats.on_tweet("2021-02-03T04:05:06.000Z")
+
+    threads = [threading.Thread(target=deliver) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.tweets == 4000
+    assert stats.lag > 0
+
+    stats.on_tweet("bad time")
+    assert stats.lag is None
+
+
+def test_usage_meter_reserve():
+    meter = UsageMeter(job_budget=100)
+    # the project usage is not known yet.
+    meter.project_cap = 50
+    records = [
+        RequestRecord(endpoint="/tweets/search/recent", params={"max_results": 20})
+        for _ in range(10)
+    ]
+    sent, errors = [], []
+
+    def request(record):
+        try:
+            meter.on_request(record)
+            sent.append(record)
+        except PyTwitterError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=request, args=(r,)) for r in records]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # requests in flight are reserved from the budget.
+    assert len(errors) == 5
+
+    for record in sent:
+        record.result_count = 10
+        meter.on_response(record)
+    assert meter.tweets == 50
+    assert meter._reserved_total == 0
+    meter.on_request(records[0])
+
+
+def test_usage_meter_endpoints():
+    meter = UsageMeter()
+    for endpoint in TWEET_ENDPOINTS:
+        url = Api.BASE_URL_V2 + endpoint.replace(":id", "123")
+        resource = RateLimit.url_to_endpoint(url).resource
+        assert resource == endpoint
+        record = RequestRecord(endpoint=resource, url=url)
+        meter.on_request(record)
+        record.result_count = 1
+        meter.on_response(record)
+    assert dict(meter.endpoints) == {endpoint: 1 for endpoint in TWEET_ENDPOINTS}
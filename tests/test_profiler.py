@@ -0,0 +1,76 @@
+"""
+    tests for the field profiler
+"""
+
+import pickle
+
+import responses
+
+import pytwitter.models as md
+from pytwitter import Api
+from pytwitter.profiler import FieldProfiler
+
+TWEETS_RESP = {
+    "data": [
+        {
+            "id": "1",
+            "text": "hi @bob",
+            "lang": "en",
+            "created_at": "2022-01-01T00:00:00.000Z",
+            "author_id": "2",
+            "entities": {"mentions": [{"start": 3, "end": 7, "username": "bob"}]},
+        }
+    ],
+    "includes": {
+        "users": [
+            {"id": "2", "name": "Alice", "username": "alice", "description": "a"},
+            {"id": "3", "name": "Bob", "username": "bob", "description": "b"},
+        ]
+    },
+}
+
+
+@responses.activate
+def test_field_profiler():
+    url = "https://api.twitter.com/2/tweets"
+    responses.add(responses.GET, url=url, json=TWEETS_RESP)
+
+    profiler = FieldProfiler(apply=True, min_calls=1)
+    api = Api(bearer_token="bearer token", hooks=[profiler])
+    for _ in range(2):
+        resp = api.get_tweets(
+            ["1"],
+            tweet_fields="lang,created_at,entities",
+            expansions=["author_id", "entities.mentions.username"],
+            user_fields=["description", "created_at"],
+        )
+        tweet = resp.data[0]
+        assert type(tweet) is md.Tweet
+        # not read by the user code.
+        repr(tweet), tweet.to_dict()
+        assert tweet == md.Tweet.new_from_json_dict(TWEETS_RESP["data"][0])
+        assert pickle.loads(pickle.dumps(tweet)) == tweet
+        if tweet.lang == "en":
+            assert resp.includes.get_user(tweet.author_id).description == "a"
+
+    [usage] = profiler.report()
+    assert usage.endpoint == "/tweets"
+    assert "test_profiler.py" in usage.call_site
+    assert usage.calls == 2
+    assert usage.recommended() == {
+        "tweet.fields": ["lang"],
+        "user.fields": ["description"],
+        "expansions": ["author_id"],
+    }
+    assert usage.unused()["expansions"] == ["entities.mentions.username"]
+    assert usage.kwargs()["user_fields"] == "description"
+    assert profiler.recommend("/tweets")["tweet.fields"] == ["lang"]
+
+    # the second call only asks the recommended.
+    params = responses.calls[1].request.params
+    assert params["tweet.fields"] == "lang"
+    assert params["expansions"] == "author_id"
+    assert responses.calls[0].request.params["tweet.fields"] != "lang"
+
+    profiler.close()
+    assert "__getattribute__" not in md.BaseModel.__dict__
@@ -56,6 +56,52 @@ class TestRateLimit:
         )
         assert d.remaining == 10
 
+    def test_acquire(self):
+        rate_limit = pytwitter.RateLimit(auth_type="user")
+        url = "https://api.twitter.com/2/users/123456/following"
+        for _ in range(15):
+            assert rate_limit.acquire(url, method="POST") == 0
+        assert rate_limit.acquire(url, method="POST", block=False) > 0
+
+        # responses for reserved requests do not refill the window.
+        reset = int(time.time()) + 60
+        rate_limit.set_limit(
+            url=url, headers=self.generate_headers(15, 10, reset), method="POST"
+        )
+        assert rate_limit.get_limit(url=url, method="POST").remaining == 0
+
+        # late response for an expired window is ignored.
+        rate_limit.set_limit(
+            url=url,
+            headers=self.generate_headers(15, 14, int(time.time()) - 1),
+            method="POST",
+        )
+        assert rate_limit.acquire(url, method="POST", block=False) > 0
+
+        rate_limit.set_limit(
+            url=url,
+            headers=self.generate_headers(15, 14, reset + 900),
+            method="POST",
+        )
+        assert rate_limit.acquire(url, method="POST", block=False) == 0
+        # no limit for app auth post.
+        assert pytwitter.RateLimit().acquire(url, method="POST", block=False) == 0
+
+    def test_acquire_new_window(self):
+        rate_limit = pytwitter.RateLimit(auth_type="user")
+        url = "https://api.twitter.com/2/users/123456/following"
+        for _ in range(3):
+            rate_limit.acquire(url, method="POST")
+        reset = int(time.time()) + 60
+        rate_limit.set_limit(
+            url=url, headers=self.generate_headers(15, 14, reset), method="POST"
+        )
+        # response from the next window, one reserved request still in flight.
+        rate_limit.set_limit(
+            url=url, headers=self.generate_headers(15, 14, reset + 60), method="POST"
+        )
+        assert rate_limit.get_limit(url=url, method="POST").remaining == 13
+
     def test_getter(self):
         app_rate_limit = pytwitter.RateLimit()
         assert app_rate_limit.get_limit(url=USER_URL).limit == 300
@@ -0,0 +1,97 @@
+"""
+    tests for the spaces monitor
+"""
+
+import pytest
+import responses
+
+from pytwitter import Api, PyTwitterError
+from pytwitter.spaces import SpaceMonitor
+
+
+def spaces_resp(*spaces):
+    return {
+        "data": [dict(zip(("id", "state", "participant_count"), s)) for s in spaces]
+    }
+
+
+@responses.activate
+def test_space_monitor():
+    by_creator = "https://api.twitter.com/2/spaces/by/creator_ids"
+    lookup = "https://api.twitter.com/2/spaces"
+    responses.add(
+        responses.GET,
+        url=by_creator,
+        json=spaces_resp(("1", "live", 10), ("2", "scheduled", None)),
+    )
+    responses.add(responses.GET, url=lookup, json=spaces_resp(("3", "ended", 0)))
+    responses.add(responses.GET, url=lookup, json=spaces_resp(("1", "live", 25)))
+    responses.add(responses.GET, url=lookup, json=spaces_resp(("2", "live", 3)))
+
+    creator_ids = [str(i) for i in range(150)]
+    events = []
+    monitor = SpaceMonitor(
+        Api(bearer_token="bearer token"),
+        creator_ids=creator_ids,
+        space_ids=["3"],
+        discover_interval=1000,
+        live_interval=10,
+        scheduled_interval=20,
+    )
+    monitor.on_event = events.append
+
+    first = monitor.poll(now=0)
+    assert [(e.type, e.space_id) for e in first] == [
+        ("started", "1"),
+        ("participants", "1"),
+        ("scheduled", "2"),
+    ]
+    # creators are looked up 100 for a request, and space 3 by id.
+    assert monitor.requests == 3
+    assert responses.calls[1].request.params["user_ids"].count(",") == 49
+
+    # nothing due.
+    assert monitor.poll(now=5) == []
+    assert monitor.next_poll_at() == 10
+
+    changes = monitor.poll(now=10)
+    assert [(e.type, e.space_id, e.delta) for e in changes] == [
+        ("participants", "1", 15)
+    ]
+    assert changes[0].space.participant_count == 25
+
+    # space 1 is not found anymore.
+    changes = monitor.poll(now=20)
+    assert [(e.type, e.space_id, e.delta) for e in changes] == [
+        ("ended", "1", 0),
+        ("started", "2", 0),
+        ("participants", "2", 3),
+    ]
+    assert len(events) == 7
+    assert set(monitor._next_poll) == {"2"}
+
+
+@responses.activate
+def test_space_monitor_batch_error():
+    lookup = "https://api.twitter.com/2/spaces"
+    responses.add(responses.GET, url=lookup, json=spaces_resp(("1", "live", 10)))
+    responses.add(
+        responses.GET, url=lookup, json={"title": "Service Unavailable"}, status=503
+    )
+
+    events = []
+    monitor = SpaceMonitor(
+        Api(bearer_token="bearer token"),
+        space_ids=[str(i) for i in range(1, 151)],
+        live_interval=10,
+    )
+    monitor.on_event = events.append
+
+    # events for the first batch are dispatched before the error raised.
+    with pytest.raises(PyTwitterError):
+        monitor.poll(now=0)
+    assert [(e.type, e.space_id) for e in events] == [
+        ("started", "1"),
+        ("participants", "1"),
+    ]
+    assert monitor.next_poll_at() == 10
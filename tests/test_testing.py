@@ -0,0 +1,93 @@
+"""
+    tests for the fake twitter api server
+"""
+
+import time
+
+import pytest
+
+from pytwitter import Api, PyTwitterError, StreamApi
+from pytwitter.testing import FakeTwitterServer
+
+
+@pytest.fixture
+def server():
+    with FakeTwitterServer(pages=2) as server:
+        yield server
+
+
+def test_fake_server_lookup(server):
+    api = server.configure(Api(bearer_token="bearer token"))
+
+    resp = api.get_tweet(tweet_id="123")
+    assert resp.data.id == "123"
+
+    resp = api.get_timelines(user_id="12", max_results=5)
+    assert len(resp.data) == 5
+    assert resp.meta.next_token == "1"
+    resp = api.get_timelines(user_id="12", pagination_token=resp.meta.next_token)
+    assert len(resp.data) == 10
+    assert resp.meta.next_token is None
+
+    limit = api.rate_limit.get_limit(url=f"{api.BASE_URL_V2}/tweets/123")
+    assert limit.limit == 300
+    assert limit.remaining == 299
+
+    assert api.like_tweet(user_id="1", tweet_id="2")["data"]["liked"]
+    assert not api.unlike_tweet(user_id="1", tweet_id="2")["data"]["liked"]
+    assert server.requests[("GET", "/users/:id/tweets")] == 2
+
+
+def test_fake_server_templates():
+    with FakeTwitterServer(templates_dir="testdata") as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        resp = api.get_tweet(tweet_id="1067094924124872705")
+        assert resp.includes.media[0].media_key == "13_1064638969197977600"
+
+
+def test_fake_server_rate_limit_and_errors():
+    with FakeTwitterServer() as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        for _ in range(75):
+            api.get_trends_by_woeid(woeid=1)
+        with pytest.raises(PyTwitterError) as exc:
+            api.get_trends_by_woeid(woeid=1)
+        assert exc.value.message["status"] == 429
+
+        server.reset_rate_limits()
+        assert api.get_trends_by_woeid(woeid=1).data
+
+    with FakeTwitterServer(error_rate=1, latency=0.05) as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        start = time.time()
+        with pytest.raises(PyTwitterError) as exc:
+            api.get_tweet(tweet_id="123")
+        assert exc.value.message["status"] == 503
+        assert time.time() - start >= 0.05
+
+
+def test_fake_server_stream(server):
+    class MyStreamApi(StreamApi):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.tweets = []
+
+        def on_tweet(self, tweet):
+            self.tweets.append(tweet)
+            if len(self.tweets) >= 50:
+                self.disconnect()
+
+    # close the connection after 20 tweets, stream will reconnect.
+    server.stream_limit = 20
+    stream_api = server.configure(MyStreamApi(bearer_token="bearer token"))
+    stream_api.manage_rules({"add": [{"value": "cat", "tag": "cats"}]})
+    rules = stream_api.get_rules()
+    assert rules.data[0].value == "cat"
+
+    stream_api.search_stream(return_json=True)
+    assert len(stream_api.tweets) == 50
+    assert stream_api.tweets[0]["matching_rules"][0]["tag"] == "cats"
+    assert server.requests[("GET", "/tweets/search/stream")] == 3
+
+    stream_api.manage_rules({"delete": {"ids": [rules.data[0].id]}})
+    assert server.rules == {}
@@ -0,0 +1,180 @@
+"""
+    tests for token caches
+"""
+
+import os
+import stat
+import threading
+import time
+
+import pytest
+import responses
+
+from pytwitter import Api, PyTwitterError, StreamApi
+from pytwitter.tokens import FileTokenCache, MemoryTokenCache, TokenCache
+
+TOKEN_URL = "https://api.twitter.com/oauth2/token"
+OAUTH2_TOKEN_URL = "https://api.twitter.com/2/oauth2/token"
+ME_URL = "https://api.twitter.com/2/users/me"
+
+
+@responses.activate
+def test_memory_token_cache(helpers):
+    token_data = helpers.load_json_data("testdata/apis/authflow/bearer_token.json")
+    responses.add(responses.POST, url=TOKEN_URL, json=token_data)
+
+    with pytest.raises(TypeError):
+        TokenCache()
+
+    cache = MemoryTokenCache()
+    apis = []
+
+    def create():
+        apis.append(
+            Api(
+                consumer_key="consumer key",
+                consumer_secret="consumer secret",
+                application_only_auth=True,
+                token_cache=cache,
+            )
+        )
+
+    threads = [threading.Thread(target=create) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    StreamApi(
+        consumer_key="consumer key",
+        consumer_secret="consumer secret",
+        token_cache=cache,
+    )
+
+    assert len(apis) == 10
+    assert len(responses.calls) == 1
+    assert cache.get("consumer key") == token_data
+
+    cache.delete("consumer key")
+    Api(
+        consumer_key="consumer key",
+        consumer_secret="consumer secret",
+        application_only_auth=True,
+        token_cache=cache,
+    )
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_file_token_cache(helpers, tmp_path):
+    token_data = helpers.load_json_data("testdata/apis/authflow/bearer_token.json")
+    responses.add(responses.POST, url=TOKEN_URL, json=token_data)
+
+    directory = str(tmp_path / "tokens")
+    for _ in range(3):
+        # a new cache for each instance, like in other processes.
+        StreamApi(
+            consumer_key="consumer key",
+            consumer_secret="consumer secret",
+            token_cache=FileTokenCache(directory),
+        )
+    assert len(responses.calls) == 1
+
+    cache = FileTokenCache(directory)
+    assert cache.get("consumer key") == token_data
+    files = [name for name in os.listdir(directory) if name.endswith(".json")]
+    assert len(files) == 1
+    assert "consumer" not in files[0]
+    mode = os.stat(os.path.join(directory, files[0])).st_mode
+    assert stat.S_IMODE(mode) == 0o600
+
+    # parsed again only if the file changed.
+    assert cache.get("consumer key") is not cache.get("consumer key")
+    cache.set("consumer key", {"access_token": "new"})
+    assert cache.get("consumer key") == {"access_token": "new"}
+
+    cache.delete("consumer key")
+    assert cache.get("consumer key") is None
+
+
+def oauth2_token(access_token, expires_in=7200):
+    return {
+        "token_type": "bearer",
+        "access_token": access_token,
+        "refresh_token": "refresh token",
+        "expires_at": int(time.time()) + expires_in,
+    }
+
+
+@responses.activate
+def test_oauth2_refresh_single_flight():
+    responses.add(
+        responses.POST,
+        url=OAUTH2_TOKEN_URL,
+        json={"access_token": "new token", "expires_in": 7200},
+    )
+    responses.add(responses.GET, url=ME_URL, json={"data": {"id": "1"}})
+
+    api = Api(client_id="client id", oauth2_token=oauth2_token("old token", 10))
+    threads = [threading.Thread(target=api.get_me) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api._auth.refreshes == 1
+    refreshes = [c for c in responses.calls if c.request.url == OAUTH2_TOKEN_URL]
+    assert len(refreshes) == 1
+    assert "grant_type=refresh_token" in refreshes[0].request.body
+    me_calls = [c for c in responses.calls if c.request.url != OAUTH2_TOKEN_URL]
+    assert {c.request.headers["Authorization"] for c in me_calls} == {
+        "Bearer new token"
+    }
+    # refresh token kept if not rotated.
+    assert api._auth.token["refresh_token"] == "refresh token"
+
+
+@responses.activate
+def test_oauth2_refresh_on_unauthorized(tmp_path):
+    responses.add(
+        responses.POST,
+        url=OAUTH2_TOKEN_URL,
+        json={
+            "access_token": "new token",
+            "refresh_token": "new refresh token",
+            "expires_in": 7200,
+        },
+    )
+    responses.add(responses.GET, url=ME_URL, status=401, json={"title": "401"})
+    responses.add(responses.GET, url=ME_URL, json={"data": {"id": "1"}})
+    responses.add(responses.GET, url=ME_URL, json={"data": {"id": "1"}})
+
+    directory = str(tmp_path / "tokens")
+    # the key is needed, users of the app must not share the token.
+    with pytest.raises(PyTwitterError):
+        Api(
+            client_id="client id",
+            oauth2_token=oauth2_token("old token"),
+            token_cache=FileTokenCache(directory),
+        )
+    api = Api(
+        client_id="client id",
+        oauth2_token=oauth2_token("old token"),
+        token_cache=FileTokenCache(directory),
+        token_key="client id:1",
+    )
+    # other process, with the token from the store.
+    other = Api(
+        client_id="client id",
+        token_cache=FileTokenCache(directory),
+        token_key="client id:1",
+    )
+    with pytest.raises(PyTwitterError):
+        Api(client_id="client id", token_cache=FileTokenCache(directory))
+
+    assert api.get_me().data.id == "1"
+    assert api._auth.refreshes == 1
+
+    assert other.get_me().data.id == "1"
+    assert other._auth.refreshes == 0
+    assert responses.calls[-1].request.headers["Authorization"] == "Bearer new token"
+    assert len([c for c in responses.calls if c.request.url == OAUTH2_TOKEN_URL]) == 1
@@ -0,0 +1,103 @@
+"""
+    tests for the trends service
+"""
+
+import threading
+import time
+
+import pytwitter.models as md
+from pytwitter import Api
+from pytwitter.testing import FakeTwitterServer
+from pytwitter.trends import TrendsService, TrendsSnapshot, diff_trends
+
+
+def snapshot(*names):
+    return TrendsSnapshot(
+        woeid=1, trends=[md.Trend(trend_name=name, tweet_count=1) for name in names]
+    )
+
+
+def test_diff_trends():
+    changes = diff_trends(snapshot("a", "b", "c"), snapshot("c", "a", "d"))
+    assert [(c.trend_name, c.rank, c.previous_rank, c.delta) for c in changes] == [
+        ("c", 1, 3, 2),
+        ("a", 2, 1, -1),
+        ("d", 3, None, 0),
+        ("b", None, 2, 0),
+    ]
+    assert len(diff_trends(None, snapshot("a"))) == 1
+
+
+def test_trends_service_coalesce():
+    with FakeTwitterServer(latency=0.2) as server:
+        service = TrendsService(server.configure(Api(bearer_token="bearer token")))
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.get(1)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(result) for result in results}) == 1
+        assert server.requests[("GET", "/trends/by/woeid/:woeid")] == 1
+        assert results[0].trends[0].trend_name
+        assert results[0].age < 1
+
+        # stale trends are refreshed, no rank changes for same trends.
+        assert service.get(1, max_age=0) is not results[0]
+        assert service.changes(1) == []
+        assert service.requests == 2
+
+
+def test_trends_service_background():
+    with FakeTwitterServer() as server:
+        updates = []
+        service = TrendsService(
+            server.configure(Api(bearer_token="bearer token")),
+            woeids=[1, 2, 3],
+            requests_per_window=9000,
+        )
+        service.on_update = lambda snapshot, changes: updates.append(snapshot.woeid)
+        service.start()
+        deadline = time.time() + 5
+        while len(service.snapshots) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        service.stop()
+
+        assert sorted(updates) == [1, 2, 3]
+        assert service.get(2).woeid == 2
+        assert server.requests[("GET", "/trends/by/woeid/:woeid")] == 3
+
+
+def test_trends_service_stale_concurrent():
+    with FakeTwitterServer(latency=0.2) as server:
+        api = server.configure(Api(bearer_token="bearer token"))
+        service = TrendsService(api)
+        first = service.get(1)
+        remaining = api.rate_limit.get_limit(service._url(1)).remaining
+        acquire = api.rate_limit.acquire
+
+        def slow_acquire(*args, **kwargs):
+            # let all threads find the snapshot stale before one owns the fetch.
+            time.sleep(0.05)
+            return acquire(*args, **kwargs)
+
+        api.rate_limit.acquire = slow_acquire
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.get(1, max_age=0)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # only the owner of the fetch reserves a request.
+        assert all(result is not first for result in results)
+        assert server.requests[("GET", "/trends/by/woeid/:woeid")] == 2
+        assert sum(api.rate_limit._inflight.values()) == 0
+        assert api.rate_limit.get_limit(service._url(1)).remaining == remaining - 1